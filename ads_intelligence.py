@@ -26,6 +26,8 @@ import anthropic
 from datetime import date, datetime
 from dotenv import load_dotenv
 
+import http_cache
+
 load_dotenv()
 
 # ── Konfiguration ─────────────────────────────────────────────────────────────
@@ -157,7 +159,6 @@ def fetch_spyfu_keywords(domain: str) -> list[dict]:
     Holt öffentliche Keyword-Daten von SpyFu für einen Advertiser.
     SpyFu zeigt Top-Keywords kostenlos ohne Login.
     """
-    import requests
     from bs4 import BeautifulSoup
 
     results = []
@@ -168,7 +169,7 @@ def fetch_spyfu_keywords(domain: str) -> list[dict]:
     }
 
     try:
-        resp = requests.get(url, headers=headers, timeout=15)
+        resp = http_cache.get(url, headers=headers, timeout=15)
         soup = BeautifulSoup(resp.text, "html.parser")
 
         # SpyFu zeigt Top-Keywords in einer Tabelle
@@ -205,8 +206,6 @@ def fetch_google_suggest(seed_keyword: str) -> list[str]:
     Beispiel: "E-Bike" → ["E-Bike kaufen NRW", "E-Bike Test 2026",
                            "E-Bike günstig Ruhrgebiet", ...]
     """
-    import requests
-
     suggestions = []
     prefixes = ["", "kaufen ", "test ", "vergleich ", "günstig ", "beste "]
 
@@ -220,7 +219,7 @@ def fetch_google_suggest(seed_keyword: str) -> list[str]:
             "gl": "de",
         }
         try:
-            resp = requests.get(url, params=params, timeout=8)
+            resp = http_cache.get(url, params=params, timeout=8)
             data = resp.json()
             if isinstance(data, list) and len(data) > 1:
                 suggestions.extend(data[1])
@@ -248,7 +247,6 @@ def analyze_serp_competition(keyword: str) -> dict:
     Analysiert die organischen Suchergebnisse für ein Keyword.
     Zeigt wie schwer es ist zu ranken und wer bereits oben steht.
     """
-    import requests
     from bs4 import BeautifulSoup
 
     url = "https://www.google.de/search"
@@ -259,7 +257,7 @@ def analyze_serp_competition(keyword: str) -> dict:
     }
 
     try:
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
+        resp = http_cache.get(url, params=params, headers=headers, timeout=10)
         soup = BeautifulSoup(resp.text, "html.parser")
 
         results = []
@@ -591,6 +589,7 @@ def main():
     analysis = ai_analyze_keywords(raw_data)
     save_results(raw_data, analysis)
     print_summary(analysis)
+    print(f"   {http_cache.log_stats()}")
     print("✅ Ads Intelligence fertig!")
     print(f"   → Keywords: output/seo_keywords_{today}.csv")
     print(f"   → Artikel-Ideen: output/artikel_ideen_{today}.csv")
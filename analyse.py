@@ -5,6 +5,7 @@ Liest gesammelte CSV-Daten und erstellt:
 - Zeitreihen-Plots (Läden, Events)
 - Kategorie-Verteilungen
 - Veränderungsberichte (neu / geschlossen)
+- Einrichtungen je PLZ (fehlende PLZ über den Raumindex)
 - HTML-Dashboard Export
 
 Voraussetzungen:
@@ -12,17 +13,28 @@ Voraussetzungen:
 """
 
 import os
-import glob
 import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import seaborn as sns
+import jinja2
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
+import dashboard_data
+import event_store
+import loader
+import osm_store
+import osm_lifecycle
+import osm_rollup
+import osm_spatial
+import render_pool
+
 OUTPUT_DIR = "output"
 REPORT_DIR = "reports"
+ANALYSE_PNG = os.getenv("ANALYSE_PNG", "0") == "1"  # Matplotlib-PNGs zusätzlich – das Dashboard braucht sie nicht
 os.makedirs(REPORT_DIR, exist_ok=True)
 
 # Stil
@@ -34,29 +46,24 @@ today = datetime.today().strftime("%Y-%m-%d")
 
 # ── Daten laden ──────────────────────────────────────────────────────────────
 
-def load_all_osm() -> pd.DataFrame:
-    """Lädt alle historischen OSM-CSVs und kombiniert sie."""
-    files = sorted(glob.glob(f"{OUTPUT_DIR}/osm_*.csv"))
-    if not files:
+def load_osm() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Neuester OSM-Snapshot und Tages-Rollup (Anzahl je Tag × Kategorie × Typ × PLZ).
+    Die komplette Historie wird dafür nicht gelesen – nur noch nicht gezählte Tage.
+    """
+    osm_store.sync_from_csv()  # Neue Tages-CSVs übernehmen (meist nichts zu tun)
+    rollup = osm_rollup.update_rollup()
+    if rollup.empty:
         print("Keine OSM-Daten gefunden. Zuerst collector.py ausführen.")
-        return pd.DataFrame()
-    frames = []
-    for f in files:
-        df = pd.read_csv(f, dtype=str)
-        frames.append(df)
-    combined = pd.concat(frames, ignore_index=True)
-    combined["datum"] = pd.to_datetime(combined["datum"])
-    return combined
+        return pd.DataFrame(), rollup
+    return osm_store.snapshot(), rollup
 
 
 def load_all_events() -> pd.DataFrame:
-    files = sorted(glob.glob(f"{OUTPUT_DIR}/events_*.csv"))
-    if not files:
-        return pd.DataFrame()
-    frames = [pd.read_csv(f, dtype=str) for f in files]
-    df = pd.concat(frames, ignore_index=True)
-    df["datum_abruf"] = pd.to_datetime(df["datum_abruf"])
-    return df
+    """Eine Zeile je Veranstaltung (event_store) mit first_seen/last_seen statt aller Tages-Scrapes."""
+    event_store.sync_from_csv()  # Neue Tages-CSVs übernehmen (meist nichts zu tun)
+    df = event_store.load_events()
+    return df if not df.empty else pd.DataFrame()
 
 
 def load_population() -> pd.DataFrame:
@@ -105,13 +112,14 @@ def plot_population(df: pd.DataFrame):
 
 # ── Plot 2: OSM Kategorie-Verteilung ────────────────────────────────────────
 
-def plot_osm_categories(df: pd.DataFrame):
-    if df.empty:
+def plot_osm_categories(rollup: pd.DataFrame):
+    if rollup.empty:
         return None
 
     # Neueste Snapshot
-    latest = df[df["datum"] == df["datum"].max()]
-    counts = latest["kategorie"].value_counts()
+    latest = rollup[rollup["datum"] == rollup["datum"].max()]
+    counts = latest.groupby("kategorie", observed=True)["anzahl"].sum().sort_values(ascending=False, kind="stable")
+    counts = counts[counts > 0]  # Kategorien aus älteren Snapshots ausblenden
 
     fig, axes = plt.subplots(1, 2, figsize=(14, 6))
 
@@ -148,12 +156,12 @@ def plot_osm_categories(df: pd.DataFrame):
 
 # ── Plot 3: OSM Zeitreihe (Veränderung über Zeit) ────────────────────────────
 
-def plot_osm_timeseries(df: pd.DataFrame):
-    if df.empty or df["datum"].nunique() < 2:
+def plot_osm_timeseries(rollup: pd.DataFrame):
+    if rollup.empty or rollup["datum"].nunique() < 2:
         print("⚠ Zeitreihe braucht mind. 2 Messzeitpunkte")
         return None
 
-    ts = df.groupby(["datum", "kategorie"]).size().unstack(fill_value=0)
+    ts = rollup.groupby(["datum", "kategorie"], observed=True)["anzahl"].sum().unstack(fill_value=0)
 
     fig, ax = plt.subplots(figsize=(12, 5))
     colors = ["#2563EB", "#10B981", "#F59E0B", "#EF4444"]
@@ -183,12 +191,14 @@ def plot_events_trend(df: pd.DataFrame):
     if df.empty:
         return None
 
-    ts = df.groupby("datum_abruf").size().reset_index(name="anzahl_events")
+    ts = event_store.daily_counts(df)
 
     fig, ax = plt.subplots(figsize=(10, 4))
-    ax.fill_between(ts["datum_abruf"], ts["anzahl_events"], alpha=0.2, color="#8B5CF6")
-    ax.plot(ts["datum_abruf"], ts["anzahl_events"], "o-", color="#8B5CF6", linewidth=2)
-    ax.set_title("Veranstaltungen gescrapt (pro Tag)", fontsize=13, fontweight="bold")
+    ax.fill_between(ts["datum"], ts["gelistet"], alpha=0.2, color="#8B5CF6")
+    ax.plot(ts["datum"], ts["gelistet"], "-", color="#8B5CF6", linewidth=2, label="Gelistet")
+    ax.bar(ts["datum"], ts["neu"], color="#10B981", width=0.8, label="Neu")
+    ax.set_title("Veranstaltungen (gelistet / neu pro Tag)", fontsize=13, fontweight="bold")
+    ax.legend(loc="upper left")
     ax.set_xlabel("Datum")
     ax.set_ylabel("Anzahl Events")
     ax.grid(alpha=0.3)
@@ -203,24 +213,29 @@ def plot_events_trend(df: pd.DataFrame):
 
 # ── Veränderungsreport: Neu / Geschlossen ────────────────────────────────────
 
-def detect_changes(df: pd.DataFrame) -> dict:
-    """Vergleicht letzten Snapshot mit vorherigem – findet neue/geschlossene Läden."""
-    if df.empty or df["datum"].nunique() < 2:
+def detect_changes() -> dict:
+    """
+    Neue/geschlossene Läden seit dem vorherigen Snapshot – ausgewertet über die ganze Historie,
+    damit einmalige Aussetzer von Overpass nicht als Schließung + Neueröffnung auftauchen.
+    """
+    dates = osm_store.list_dates()
+    if len(dates) < 2:
         return {}
 
-    dates = sorted(df["datum"].unique())
-    prev_date, curr_date = dates[-2], dates[-1]
-
-    prev_ids = set(df[df["datum"] == prev_date]["osm_id"].dropna())
-    curr_ids = set(df[df["datum"] == curr_date]["osm_id"].dropna())
+    prev_date, curr_date = pd.Timestamp(dates[-2]), pd.Timestamp(dates[-1])
+    lebenszyklus, events = osm_lifecycle.load_lifecycle()
+    lebenszyklus.to_csv(f"{REPORT_DIR}/osm_lebenszyklus.csv", index=False, encoding="utf-8-sig")
 
-    neu = df[(df["datum"] == curr_date) & (df["osm_id"].isin(curr_ids - prev_ids))]
-    geschlossen = df[(df["datum"] == prev_date) & (df["osm_id"].isin(prev_ids - curr_ids))]
+    # Gemeldet wird, was seit dem letzten Lauf feststeht (Schließungen erst nach Bestätigung)
+    aktuell = osm_lifecycle.changes_between(events, dates[-2], dates[-1], by="bestaetigt_am")
+    neu = aktuell[aktuell["ereignis"] == "eroeffnet"]
+    geschlossen = aktuell[aktuell["ereignis"] == "geschlossen"]
 
     changes = {
         "zeitraum": f"{prev_date.date()} → {curr_date.date()}",
         "neu_anzahl": len(neu),
         "geschlossen_anzahl": len(geschlossen),
+        "unsicher_anzahl": int((lebenszyklus["status"] == "unsicher").sum()),
         "neu": neu[["name", "kategorie", "strasse", "hausnummer"]].to_dict("records"),
         "geschlossen": geschlossen[["name", "kategorie", "strasse", "hausnummer"]].to_dict("records"),
     }
@@ -235,61 +250,97 @@ def detect_changes(df: pd.DataFrame) -> dict:
     return changes
 
 
+# ── Einrichtungen je PLZ ─────────────────────────────────────────────────────
+
+def osm_by_plz(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Einrichtungen je PLZ und Kategorie im neuesten Snapshot. Fehlende PLZ
+    (kein addr:postcode) kommen aus dem Raumindex – per PLZ-Grenze oder Nachbarschaft.
+    """
+    index = osm_spatial.load_index()
+    if df.empty or index is None:
+        return pd.DataFrame()
+
+    latest = osm_spatial.with_plz(df[df["datum"] == df["datum"].max()], index)
+    table = pd.crosstab(latest["plz_geo"].replace("", "unbekannt"), latest["kategorie"])
+    table.to_csv(f"{REPORT_DIR}/osm_plz.csv", encoding="utf-8-sig")
+
+    quelle = latest["plz_quelle"].value_counts()
+    print(f"✓ PLZ-Zuordnung: {quelle.get('polygon', 0)} per Grenze, "
+          f"{quelle.get('nachbarn', 0)} per Nachbarschaft, {quelle.get('', 0)} unbekannt")
+    return table
+
+
 # ── HTML Dashboard ───────────────────────────────────────────────────────────
 
-HTML_TEMPLATE = """<!DOCTYPE html>
+DASHBOARD_PAGE_SIZE = 100  # Zeilen pro Seite; die erste Seite steht auch ohne JavaScript im HTML
+
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
 <html lang="de">
 <head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>Castrop-Rauxel Dashboard – {today}</title>
+<title>Castrop-Rauxel Dashboard – {{ today }}</title>
 <style>
-  * {{ box-sizing: border-box; margin: 0; padding: 0; }}
-  body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-          background: #f1f5f9; color: #1e293b; }}
-  header {{ background: #1e3a5f; color: white; padding: 1.5rem 2rem;
-            display: flex; align-items: center; gap: 1rem; }}
-  header h1 {{ font-size: 1.6rem; }}
-  header p {{ font-size: 0.9rem; opacity: 0.7; margin-top: 0.2rem; }}
-  .badge {{ background: #3b82f6; padding: 0.3rem 0.8rem; border-radius: 20px;
-            font-size: 0.8rem; font-weight: 600; }}
-  main {{ max-width: 1200px; margin: 2rem auto; padding: 0 1rem; }}
-  .kpi-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-               gap: 1rem; margin-bottom: 2rem; }}
-  .kpi {{ background: white; border-radius: 12px; padding: 1.5rem;
-          box-shadow: 0 1px 4px rgba(0,0,0,0.08); }}
-  .kpi .label {{ font-size: 0.8rem; color: #64748b; text-transform: uppercase;
-                 letter-spacing: 0.05em; margin-bottom: 0.5rem; }}
-  .kpi .value {{ font-size: 2rem; font-weight: 700; color: #1e3a5f; }}
-  .kpi .sub {{ font-size: 0.85rem; color: #64748b; margin-top: 0.2rem; }}
-  .section {{ background: white; border-radius: 12px; padding: 1.5rem;
-              box-shadow: 0 1px 4px rgba(0,0,0,0.08); margin-bottom: 1.5rem; }}
-  .section h2 {{ font-size: 1.1rem; font-weight: 600; margin-bottom: 1rem;
-                 color: #1e3a5f; border-bottom: 2px solid #e2e8f0;
-                 padding-bottom: 0.5rem; }}
-  .plots {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(480px, 1fr));
-            gap: 1rem; margin-bottom: 1.5rem; }}
-  .plot-card {{ background: white; border-radius: 12px; padding: 1rem;
-                box-shadow: 0 1px 4px rgba(0,0,0,0.08); }}
-  .plot-card img {{ width: 100%; border-radius: 6px; }}
-  table {{ width: 100%; border-collapse: collapse; font-size: 0.88rem; }}
-  th {{ background: #f8fafc; padding: 0.6rem 0.8rem; text-align: left;
-        font-weight: 600; color: #475569; border-bottom: 2px solid #e2e8f0; }}
-  td {{ padding: 0.55rem 0.8rem; border-bottom: 1px solid #f1f5f9; }}
-  tr:hover td {{ background: #f8fafc; }}
-  .tag {{ display: inline-block; padding: 0.15rem 0.5rem; border-radius: 4px;
-          font-size: 0.75rem; font-weight: 600; }}
-  .tag-shop {{ background: #dbeafe; color: #1d4ed8; }}
-  .tag-food {{ background: #d1fae5; color: #065f46; }}
-  .tag-lei {{ background: #fef3c7; color: #92400e; }}
-  footer {{ text-align: center; padding: 2rem; font-size: 0.8rem; color: #94a3b8; }}
+  * { box-sizing: border-box; margin: 0; padding: 0; }
+  body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
+         background: #f1f5f9; color: #1e293b; }
+  header { background: #1e3a5f; color: white; padding: 1.5rem 2rem;
+           display: flex; align-items: center; gap: 1rem; }
+  header h1 { font-size: 1.6rem; }
+  header p { font-size: 0.9rem; opacity: 0.7; margin-top: 0.2rem; }
+  .badge { background: #3b82f6; padding: 0.3rem 0.8rem; border-radius: 20px;
+           font-size: 0.8rem; font-weight: 600; }
+  main { max-width: 1200px; margin: 2rem auto; padding: 0 1rem; }
+  .kpi-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+              gap: 1rem; margin-bottom: 2rem; }
+  .kpi { background: white; border-radius: 12px; padding: 1.5rem;
+         box-shadow: 0 1px 4px rgba(0,0,0,0.08); }
+  .kpi .label { font-size: 0.8rem; color: #64748b; text-transform: uppercase;
+                letter-spacing: 0.05em; margin-bottom: 0.5rem; }
+  .kpi .value { font-size: 2rem; font-weight: 700; color: #1e3a5f; }
+  .kpi .sub { font-size: 0.85rem; color: #64748b; margin-top: 0.2rem; }
+  .section { background: white; border-radius: 12px; padding: 1.5rem;
+             box-shadow: 0 1px 4px rgba(0,0,0,0.08); margin-bottom: 1.5rem; }
+  .section h2 { font-size: 1.1rem; font-weight: 600; margin-bottom: 1rem;
+                color: #1e3a5f; border-bottom: 2px solid #e2e8f0;
+                padding-bottom: 0.5rem; }
+  .plots { display: grid; grid-template-columns: repeat(auto-fit, minmax(480px, 1fr));
+           gap: 1rem; margin-bottom: 1.5rem; }
+  .plot-card { background: white; border-radius: 12px; padding: 1rem;
+               box-shadow: 0 1px 4px rgba(0,0,0,0.08); }
+  .plot-card h3 { margin-bottom: 0.5rem; font-size: 0.95rem; color: #1e3a5f; }
+  .chart { min-height: 240px; font-size: 0.8rem; color: #64748b; }
+  .chart svg, .chart canvas { width: 100%; height: auto; display: block; }
+  .chart svg text { font-size: 11px; fill: #475569; }
+  .chart svg .grid { stroke: #e2e8f0; }
+  .legend { display: flex; flex-wrap: wrap; gap: 0.8rem; margin-top: 0.4rem; }
+  .legend i { display: inline-block; width: 10px; height: 10px; border-radius: 2px; margin-right: 0.3rem; }
+  table { width: 100%; border-collapse: collapse; font-size: 0.88rem; }
+  th { background: #f8fafc; padding: 0.6rem 0.8rem; text-align: left;
+       font-weight: 600; color: #475569; border-bottom: 2px solid #e2e8f0; }
+  td { padding: 0.55rem 0.8rem; border-bottom: 1px solid #f1f5f9; }
+  tr:hover td { background: #f8fafc; }
+  .tag { display: inline-block; padding: 0.15rem 0.5rem; border-radius: 4px;
+         font-size: 0.75rem; font-weight: 600; }
+  .tag-shop { background: #dbeafe; color: #1d4ed8; }
+  .tag-food { background: #d1fae5; color: #065f46; }
+  .tag-lei { background: #fef3c7; color: #92400e; }
+  .pager { display: flex; align-items: center; gap: 0.6rem; margin-top: 0.8rem;
+           font-size: 0.85rem; color: #64748b; }
+  .pager input { flex: 1; padding: 0.35rem 0.6rem; border: 1px solid #e2e8f0; border-radius: 6px; }
+  .pager button { padding: 0.3rem 0.7rem; border: 1px solid #e2e8f0; border-radius: 6px;
+                  background: white; cursor: pointer; }
+  .pager button:disabled { opacity: 0.4; cursor: default; }
+  .muted { font-size: 0.75rem; color: #64748b; }
+  footer { text-align: center; padding: 2rem; font-size: 0.8rem; color: #94a3b8; }
 </style>
 </head>
 <body>
 <header>
   <div>
     <h1>📊 Castrop-Rauxel Daten-Dashboard</h1>
-    <p>Automatisch generiert am {today} · Quellen: OSM, IT.NRW, Stadtwebsite</p>
+    <p>Automatisch generiert am {{ today }} · Quellen: OSM, IT.NRW, Stadtwebsite</p>
   </div>
   <span class="badge">Kostenlos</span>
 </header>
@@ -303,112 +354,398 @@ HTML_TEMPLATE = """<!DOCTYPE html>
     </div>
     <div class="kpi">
       <div class="label">Einrichtungen (OSM)</div>
-      <div class="value">{osm_total}</div>
+      <div class="value">{{ osm_total }}</div>
       <div class="sub">Läden, Gastronomie, Freizeit</div>
     </div>
     <div class="kpi">
       <div class="label">Events gescrapt</div>
-      <div class="value">{events_total}</div>
+      <div class="value">{{ events_total }}</div>
       <div class="sub">Stadtwebsite heute</div>
     </div>
+    <div class="kpi">
+      <div class="label">Events nächste 7 Tage</div>
+      <div class="value">{{ events_7_tage }}</div>
+      <div class="sub">Nach geparstem Datum</div>
+    </div>
     <div class="kpi">
       <div class="label">Neu (letzte Änderung)</div>
-      <div class="value" style="color:#10b981">{neu_count}</div>
+      <div class="value" style="color:#10b981">{{ neu_count }}</div>
       <div class="sub">Neue Einrichtungen in OSM</div>
     </div>
     <div class="kpi">
       <div class="label">Geschlossen</div>
-      <div class="value" style="color:#ef4444">{closed_count}</div>
+      <div class="value" style="color:#ef4444">{{ closed_count }}</div>
       <div class="sub">Aus OSM entfernt</div>
     </div>
   </div>
 
   <div class="plots">
     <div class="plot-card">
-      <h3 style="margin-bottom:0.5rem;font-size:0.95rem;color:#1e3a5f">Bevölkerungstrend</h3>
-      <img src="../reports/bevoelkerung_trend.png" alt="Bevölkerung">
+      <h3>Bevölkerungstrend</h3>
+      <div class="chart" data-chart="bevoelkerung"></div>
     </div>
     <div class="plot-card">
-      <h3 style="margin-bottom:0.5rem;font-size:0.95rem;color:#1e3a5f">Einrichtungen nach Kategorie</h3>
-      <img src="../reports/osm_kategorien.png" alt="OSM Kategorien">
+      <h3>Einrichtungen nach Kategorie</h3>
+      <div class="chart" data-chart="kategorien"></div>
+    </div>
+    <div class="plot-card">
+      <h3>Entwicklung Einrichtungen über Zeit</h3>
+      <div class="chart" data-chart="osm_zeitreihe"></div>
+    </div>
+    <div class="plot-card">
+      <h3>Einrichtungen auf der Karte</h3>
+      <div class="chart" data-chart="karte"></div>
+    </div>
+    <div class="plot-card">
+      <h3>Veranstaltungen (gelistet / neu pro Tag)</h3>
+      <div class="chart" data-chart="events"></div>
     </div>
   </div>
 
   <div class="section">
-    <h2>🏪 Aktuelle Einrichtungen (Top 50)</h2>
+    <h2>🏪 Aktuelle Einrichtungen ({{ osm.zeilen|length }})</h2>
     <table>
       <thead>
         <tr><th>Name</th><th>Kategorie</th><th>Typ</th><th>Adresse</th><th>Öffnungszeiten</th></tr>
       </thead>
-      <tbody>
-        {osm_rows}
+      <tbody id="osm-body">
+        {% for name, kat, typ, adresse, zeiten in osm.zeilen[:page_size] %}
+        <tr>
+          <td><strong>{{ name or "–" }}</strong></td>
+          <td><span class="tag {{ osm.kategorien[kat][1] }}">{{ osm.kategorien[kat][0] }}</span></td>
+          <td>{{ osm.typen[typ] }}</td>
+          <td>{{ adresse }}</td>
+          <td class="muted">{{ zeiten }}</td>
+        </tr>
+        {% else %}
+        <tr><td colspan="5">Keine Daten</td></tr>
+        {% endfor %}
       </tbody>
     </table>
+    <div class="pager" data-table="osm"></div>
   </div>
 
   <div class="section">
-    <h2>📅 Aktuelle Veranstaltungen</h2>
+    <h2>📅 Aktuelle Veranstaltungen ({{ events.zeilen|length }})</h2>
     <table>
       <thead>
         <tr><th>Titel</th><th>Datum</th><th>Ort</th><th>Link</th></tr>
       </thead>
-      <tbody>
-        {event_rows}
+      <tbody id="events-body">
+        {% for titel, datum, ort, link in events.zeilen[:page_size] %}
+        <tr>
+          <td><strong>{{ titel or "–" }}</strong></td>
+          <td>{{ datum }}</td>
+          <td>{{ ort }}</td>
+          <td>{% if link %}<a href="{{ link }}" target="_blank" rel="noopener" style="color:#3b82f6">→ Link</a>{% else %}–{% endif %}</td>
+        </tr>
+        {% else %}
+        <tr><td colspan="4">Keine Daten</td></tr>
+        {% endfor %}
       </tbody>
     </table>
+    <div class="pager" data-table="events"></div>
   </div>
 
 </main>
-<footer>Daten: OpenStreetMap (ODbL), IT.NRW, Bertelsmann Stiftung, Stadt Castrop-Rauxel · 
+<footer>Daten: OpenStreetMap (ODbL), IT.NRW, Bertelsmann Stiftung, Stadt Castrop-Rauxel ·
 Generiert mit Python · Für Forschungs- und Analysezwecke</footer>
+<script type="application/json" id="osm-data">{{ osm|tojson }}</script>
+<script type="application/json" id="events-data">{{ events|tojson }}</script>
+<script>
+(function () {
+  var PAGE = {{ page_size }};
+  function esc(s) {
+    return String(s).replace(/[&<>"']/g, function (c) {
+      return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[c];
+    });
+  }
+  var render = {
+    osm: function (d, r) {
+      var k = d.kategorien[r[1]];
+      return "<td><strong>" + esc(r[0] || "–") + "</strong></td>" +
+             '<td><span class="tag ' + k[1] + '">' + esc(k[0]) + "</span></td>" +
+             "<td>" + esc(d.typen[r[2]]) + "</td><td>" + esc(r[3]) + "</td>" +
+             '<td class="muted">' + esc(r[4]) + "</td>";
+    },
+    events: function (d, r) {
+      var link = r[3] ? '<a href="' + esc(r[3]) + '" target="_blank" rel="noopener" style="color:#3b82f6">→ Link</a>' : "–";
+      return "<td><strong>" + esc(r[0] || "–") + "</strong></td><td>" + esc(r[1]) + "</td>" +
+             "<td>" + esc(r[2]) + "</td><td>" + link + "</td>";
+    }
+  };
+  var text = {
+    osm: function (d, r) { return [r[0], d.kategorien[r[1]][0], d.typen[r[2]], r[3], r[4]].join(" "); },
+    events: function (d, r) { return r.slice(0, 3).join(" "); }
+  };
+  document.querySelectorAll(".pager").forEach(function (pager) {
+    var name = pager.dataset.table;
+    var data = JSON.parse(document.getElementById(name + "-data").textContent);
+    if (data.zeilen.length <= PAGE) return;
+    var body = document.getElementById(name + "-body");
+    var rows = data.zeilen, page = 0;
+    pager.innerHTML = '<input type="search" placeholder="Filtern …">' +
+      '<button data-step="-1">‹</button><span></span><button data-step="1">›</button>';
+    var input = pager.querySelector("input"), info = pager.querySelector("span");
+    var buttons = pager.querySelectorAll("button");
+    function show() {
+      var pages = Math.max(1, Math.ceil(rows.length / PAGE));
+      page = Math.min(Math.max(page, 0), pages - 1);
+      body.innerHTML = rows.slice(page * PAGE, (page + 1) * PAGE).map(function (r) {
+        return "<tr>" + render[name](data, r) + "</tr>";
+      }).join("") || '<tr><td colspan="5">Keine Treffer</td></tr>';
+      info.textContent = "Seite " + (page + 1) + " / " + pages + " · " + rows.length + " Zeilen";
+      buttons[0].disabled = page === 0;
+      buttons[1].disabled = page >= pages - 1;
+    }
+    buttons.forEach(function (b) {
+      b.addEventListener("click", function () { page += +b.dataset.step; show(); });
+    });
+    input.addEventListener("input", function () {
+      var q = input.value.toLowerCase();
+      rows = !q ? data.zeilen : data.zeilen.filter(function (r) {
+        return text[name](data, r).toLowerCase().indexOf(q) >= 0;
+      });
+      page = 0;
+      show();
+    });
+    show();
+  });
+})();
+</script>
+<script>
+(function () {
+  // Diagramme aus dashboard_data_<datum>.json – erst geladen, wenn ein Diagramm sichtbar wird
+  var COLORS = ["#2563EB", "#10B981", "#F59E0B", "#EF4444", "#8B5CF6", "#0EA5E9"];
+  var W = 480, H = 240, L = 56, R = 12, T = 10, B = 26;
+  var bundle = null;
+  function load() {
+    return bundle || (bundle = fetch({{ bundle|tojson }}).then(function (r) {
+      if (!r.ok) throw new Error(r.status);
+      return r.json();
+    }));
+  }
+  function esc(s) {
+    return String(s).replace(/[&<>"']/g, function (c) {
+      return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[c];
+    });
+  }
+  function undelta(a) { var s = 0; return a.map(function (v) { return s += v; }); }
+  function days(d) {
+    var t0 = Date.parse(d.start);
+    return undelta(d.tage).map(function (t) { return t0 + t * 864e5; });
+  }
+  function num(v) { return Math.round(v).toLocaleString("de-DE"); }
+  function date(ms) { var d = new Date(ms); return d.getDate() + "." + (d.getMonth() + 1) + "." + String(d.getFullYear()).slice(2); }
+  function min(a) { return a.reduce(function (m, v) { return v < m ? v : m; }, Infinity); }
+  function max(a) { return a.reduce(function (m, v) { return v > m ? v : m; }, -Infinity); }
+  function svg(inner) { return '<svg viewBox="0 0 ' + W + " " + H + '" role="img">' + inner + "</svg>"; }
+  function legend(names, colors) {
+    return '<div class="legend">' + names.map(function (n, i) {
+      return '<span><i style="background:' + (colors || COLORS)[i % COLORS.length] + '"></i>' + esc(n) + "</span>";
+    }).join("") + "</div>";
+  }
+
+  function lineChart(xs, series, fmtX, zero) {
+    var all = [].concat.apply([], series.map(function (s) { return s.ys; }));
+    var x0 = min(xs), x1 = max(xs), y0 = zero ? 0 : min(all), y1 = max(all);
+    var pad = (y1 - y0) * 0.08 || 1;
+    y1 += pad; if (!zero) y0 -= pad;
+    function X(v) { return L + (x1 === x0 ? 0.5 : (v - x0) / (x1 - x0)) * (W - L - R); }
+    function Y(v) { return T + (1 - (v - y0) / (y1 - y0)) * (H - T - B); }
+    var out = "";
+    for (var i = 0; i <= 4; i++) {
+      var v = y0 + (y1 - y0) * i / 4;
+      out += '<line x1="' + L + '" x2="' + (W - R) + '" y1="' + Y(v) + '" y2="' + Y(v) + '" class="grid"/>' +
+             '<text x="' + (L - 6) + '" y="' + (Y(v) + 4) + '" text-anchor="end">' + num(v) + "</text>";
+    }
+    out += '<text x="' + L + '" y="' + (H - 6) + '">' + fmtX(x0) + "</text>" +
+           '<text x="' + (W - R) + '" y="' + (H - 6) + '" text-anchor="end">' + fmtX(x1) + "</text>";
+    series.forEach(function (s) {
+      var pts = s.xs.map(function (x, j) { return X(x).toFixed(1) + "," + Y(s.ys[j]).toFixed(1); });
+      out += '<polyline fill="none" stroke="' + s.color + '" stroke-width="2"' +
+             (s.dashed ? ' stroke-dasharray="6 4"' : "") + ' points="' + pts.join(" ") + '"/>';
+      if (s.xs.length <= 40) {
+        out += pts.map(function (p) {
+          var c = p.split(",");
+          return '<circle cx="' + c[0] + '" cy="' + c[1] + '" r="3" fill="' + s.color + '"/>';
+        }).join("");
+      }
+    });
+    return svg(out);
+  }
+
+  var DRAW = {
+    bevoelkerung: function (el, d) {
+      var jahre = undelta(d.jahre), werte = undelta(d.werte), ab = d.prognose_ab;
+      var real = jahre.map(function (j, i) { return i; }).filter(function (i) { return ab === null || jahre[i] < ab; });
+      var prog = ab === null ? [] : jahre.map(function (j, i) { return i; }).filter(function (i) { return jahre[i] >= ab; });
+      if (prog.length && real.length) prog.unshift(real[real.length - 1]);
+      function pick(idx, a) { return idx.map(function (i) { return a[i]; }); }
+      var series = [{xs: pick(real, jahre), ys: pick(real, werte), color: COLORS[0]}];
+      if (prog.length) series.push({xs: pick(prog, jahre), ys: pick(prog, werte), color: COLORS[2], dashed: true});
+      el.innerHTML = lineChart(jahre, series, String, false) +
+                     (prog.length ? legend(["Tatsächlich", "Prognose (Bertelsmann)"], [COLORS[0], COLORS[2]]) : "");
+    },
+    kategorien: function (el, d) {
+      var names = d.kategorien, werte = d.werte.map(function (w) { var u = undelta(w); return u[u.length - 1]; });
+      var order = names.map(function (n, i) { return i; }).filter(function (i) { return werte[i] > 0; })
+                       .sort(function (a, b) { return werte[b] - werte[a]; });
+      var top = max(werte) || 1, row = (H - T) / Math.max(order.length, 1), left = 150;
+      var out = order.map(function (i, k) {
+        var y = T + k * row, w = werte[i] / top * (W - left - 50);
+        return '<text x="' + (left - 8) + '" y="' + (y + row / 2 + 4) + '" text-anchor="end">' + esc(names[i]) + "</text>" +
+               '<rect x="' + left + '" y="' + (y + row * 0.15) + '" width="' + w.toFixed(1) + '" height="' + (row * 0.7).toFixed(1) +
+               '" rx="3" fill="' + COLORS[k % COLORS.length] + '"/>' +
+               '<text x="' + (left + w + 6) + '" y="' + (y + row / 2 + 4) + '">' + num(werte[i]) + "</text>";
+      }).join("");
+      el.innerHTML = svg(out);
+    },
+    osm_zeitreihe: function (el, d) {
+      if (d.tage.length < 2) { el.textContent = "Zeitreihe braucht mind. 2 Messzeitpunkte"; return; }
+      var xs = days(d);
+      el.innerHTML = lineChart(xs, d.werte.map(function (w, i) {
+        return {xs: xs, ys: undelta(w), color: COLORS[i % COLORS.length]};
+      }), date, true) + legend(d.kategorien);
+    },
+    events: function (el, d) {
+      var xs = days(d);
+      el.innerHTML = lineChart(xs, [{xs: xs, ys: undelta(d.werte), color: COLORS[4]},
+                                    {xs: xs, ys: undelta(d.neu), color: COLORS[1]}], date, true) +
+                     legend(["Gelistet", "Neu"], [COLORS[4], COLORS[1]]);
+    },
+    karte: function (el, d) {
+      var lat = undelta(d.lat), lon = undelta(d.lon), kat = d.kategorie;
+      var la0 = min(lat), la1 = max(lat), lo0 = min(lon), lo1 = max(lon);
+      var k = Math.cos((la0 + la1) / 2 * d.schritt * Math.PI / 180);  // Längengrade schrumpfen nach Norden
+      var scale = Math.min((W - 20) / ((lo1 - lo0) * k || 1), (H - 20) / ((la1 - la0) || 1));
+      var ratio = window.devicePixelRatio || 1, canvas = document.createElement("canvas");
+      canvas.width = W * ratio; canvas.height = H * ratio;
+      var ctx = canvas.getContext("2d");
+      ctx.scale(ratio, ratio);
+      ctx.globalAlpha = 0.7;
+      for (var i = 0; i < lat.length; i++) {
+        ctx.fillStyle = COLORS[kat[i] % COLORS.length];
+        ctx.fillRect(W / 2 + (lon[i] - (lo0 + lo1) / 2) * k * scale - 1.5,
+                     H / 2 - (lat[i] - (la0 + la1) / 2) * scale - 1.5, 3, 3);
+      }
+      el.innerHTML = "";
+      el.appendChild(canvas);
+      el.insertAdjacentHTML("beforeend", legend(d.kategorien));
+    }
+  };
+  var SOURCE = {bevoelkerung: "bevoelkerung", kategorien: "osm_zeitreihe", osm_zeitreihe: "osm_zeitreihe",
+                events: "events", karte: "punkte"};
+
+  function draw(el) {
+    load().then(function (b) {
+      var d = b[SOURCE[el.dataset.chart]];
+      if (!d || !Object.keys(d).length) { el.textContent = "Keine Daten"; return; }
+      DRAW[el.dataset.chart](el, d);
+    }).catch(function () {
+      el.textContent = "Diagrammdaten nicht geladen – Dashboard über einen Webserver öffnen (python -m http.server)";
+    });
+  }
+  var charts = document.querySelectorAll(".chart");
+  if ("IntersectionObserver" in window) {
+    var io = new IntersectionObserver(function (entries) {
+      entries.forEach(function (e) {
+        if (e.isIntersecting) { io.unobserve(e.target); draw(e.target); }
+      });
+    }, {rootMargin: "200px"});
+    charts.forEach(function (c) { io.observe(c); });
+  } else {
+    charts.forEach(draw);
+  }
+})();
+</script>
 </body>
 </html>"""
 
 
-def generate_html_dashboard(df_osm: pd.DataFrame, df_events: pd.DataFrame, changes: dict):
-    # OSM Zeilen
-    osm_rows = ""
-    if not df_osm.empty:
-        latest = df_osm[df_osm["datum"] == df_osm["datum"].max()].head(50)
-        for _, r in latest.iterrows():
-            tag_class = "tag-shop" if "Laden" in str(r["kategorie"]) else \
-                        "tag-food" if "Gastro" in str(r["kategorie"]) else "tag-lei"
-            osm_rows += f"""<tr>
-              <td><strong>{r.get('name','–')}</strong></td>
-              <td><span class="tag {tag_class}">{r.get('kategorie','')}</span></td>
-              <td>{r.get('typ','')}</td>
-              <td>{r.get('strasse','')} {r.get('hausnummer','')}, {r.get('plz','')}</td>
-              <td style="font-size:0.75rem;color:#64748b">{r.get('oeffnungszeiten','')}</td>
-            </tr>"""
-
-    # Event Zeilen
-    event_rows = ""
-    if not df_events.empty:
-        latest_events = df_events[df_events["datum_abruf"] == df_events["datum_abruf"].max()].head(30)
-        for _, r in latest_events.iterrows():
-            link = r.get("link", "")
-            link_html = f'<a href="{link}" target="_blank" style="color:#3b82f6">→ Link</a>' if link else "–"
-            event_rows += f"""<tr>
-              <td><strong>{r.get('titel','–')[:80]}</strong></td>
-              <td>{r.get('datum_event','')}</td>
-              <td>{r.get('ort','')}</td>
-              <td>{link_html}</td>
-            </tr>"""
-
-    html = HTML_TEMPLATE.format(
+@lru_cache(maxsize=1)
+def _dashboard_template() -> jinja2.Template:
+    """Einmal kompilieren; Werte werden automatisch HTML-escaped."""
+    env = jinja2.Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+    env.policies["json.dumps_kwargs"] = {"ensure_ascii": False, "separators": (",", ":")}
+    return env.from_string(DASHBOARD_TEMPLATE)
+
+
+def _text(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].astype(object).where(df[col].notna(), "").astype(str)
+
+
+def _tag_class(kategorie: str) -> str:
+    return "tag-shop" if "Laden" in kategorie else "tag-food" if "Gastro" in kategorie else "tag-lei"
+
+
+def _osm_payload(df_osm: pd.DataFrame) -> dict:
+    """
+    Alle Einrichtungen des neuesten Tages als kompakte Tabelle für das Dashboard:
+    Kategorie und Typ als Index in eine Liste (wie die Dictionary-Spalten im Store).
+    """
+    if df_osm.empty:
+        return {"kategorien": [], "typen": [], "zeilen": []}
+    latest = df_osm[df_osm["datum"] == df_osm["datum"].max()]
+    kategorien, kat_codes = pd.factorize(_text(latest, "kategorie"))
+    typen, typ_codes = pd.factorize(_text(latest, "typ"))
+    adresse = (_text(latest, "strasse") + " " + _text(latest, "hausnummer") + ", " + _text(latest, "plz")).str.strip(" ,")
+    zeilen = list(zip(_text(latest, "name").tolist(), kategorien.tolist(), typen.tolist(),
+                      adresse.tolist(), _text(latest, "oeffnungszeiten").tolist()))
+    return {"kategorien": [[k, _tag_class(k)] for k in kat_codes],
+            "typen": list(typ_codes), "zeilen": zeilen}
+
+
+def _event_payload(df_events: pd.DataFrame) -> dict:
+    if df_events.empty:
+        return {"zeilen": []}
+    latest = df_events[df_events["last_seen"] == df_events["last_seen"].max()].sort_values("beginn", kind="stable")
+    link = _text(latest, "link")
+    link = link.where(link.str.match(r"https?://"), "")  # Kein javascript: o.ä. im href
+    zeilen = list(zip(_text(latest, "titel").str[:80].tolist(), _text(latest, "datum_event").tolist(),
+                      _text(latest, "ort").tolist(), link.tolist()))
+    return {"zeilen": zeilen}
+
+
+def write_dashboard_data(df_osm: pd.DataFrame, rollup: pd.DataFrame,
+                         df_events: pd.DataFrame, df_pop: pd.DataFrame) -> str:
+    """Datenpaket für die Diagramme im Dashboard (ersetzt die PNGs)."""
+    bundle = dashboard_data.build_bundle(rollup, df_osm, df_events, df_pop, today)
+    path = dashboard_data.write_bundle(bundle, dashboard_data.bundle_path(REPORT_DIR, today))
+    print(f"✓ Dashboard-Daten: {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    return path
+
+
+def generate_html_dashboard(df_osm: pd.DataFrame, rollup: pd.DataFrame,
+                            df_events: pd.DataFrame, changes: dict):
+    """
+    Dashboard mit allen Einrichtungen und Events des neuesten Tages. Die Zeilen stecken
+    als JSON im HTML und werden seitenweise angezeigt; das Template schreibt stückweise
+    direkt in die Datei statt erst einen großen String aufzubauen. Die Diagramme zeichnet
+    der Browser aus dashboard_data_<datum>.json (write_dashboard_data), sobald sie sichtbar werden.
+    """
+    osm = _osm_payload(df_osm)
+    events = _event_payload(df_events)
+    context = dict(
         today=today,
-        osm_total=len(df_osm[df_osm["datum"] == df_osm["datum"].max()]) if not df_osm.empty else 0,
-        events_total=len(df_events[df_events["datum_abruf"] == df_events["datum_abruf"].max()]) if not df_events.empty else 0,
+        osm_total=int(rollup.loc[rollup["datum"] == rollup["datum"].max(), "anzahl"].sum()) if not rollup.empty else 0,
+        events_total=len(events["zeilen"]),
+        events_7_tage=len(event_store.upcoming(7)),
         neu_count=changes.get("neu_anzahl", 0),
         closed_count=changes.get("geschlossen_anzahl", 0),
-        osm_rows=osm_rows or "<tr><td colspan='5'>Keine Daten</td></tr>",
-        event_rows=event_rows or "<tr><td colspan='4'>Keine Daten</td></tr>",
+        osm=osm,
+        events=events,
+        page_size=DASHBOARD_PAGE_SIZE,
+        bundle=os.path.basename(dashboard_data.bundle_path(REPORT_DIR, today)),
     )
 
     path = f"{REPORT_DIR}/dashboard_{today}.html"
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"✓ HTML Dashboard: {path}")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.writelines(_dashboard_template().generate(**context))
+    os.replace(f"{path}.tmp", path)
+    print(f"✓ HTML Dashboard: {path} ({len(osm['zeilen'])} Einrichtungen, {len(events['zeilen'])} Events)")
     return path
 
 
@@ -417,17 +754,23 @@ def generate_html_dashboard(df_osm: pd.DataFrame, df_events: pd.DataFrame, chang
 def main():
     print(f"\n🔍 Trend-Analyse Castrop-Rauxel – {today}\n{'='*50}")
 
-    df_osm = load_all_osm()
+    df_osm, rollup = load_osm()
     df_events = load_all_events()
     df_pop = load_population()
 
-    plot_population(df_pop)
-    plot_osm_categories(df_osm)
-    plot_osm_timeseries(df_osm)
-    plot_events_trend(df_events)
-
-    changes = detect_changes(df_osm)
-    generate_html_dashboard(df_osm, df_events, changes)
+    if ANALYSE_PNG:
+        render_pool.render_all([
+            (plot_population, df_pop),
+            (plot_osm_categories, rollup),
+            (plot_osm_timeseries, rollup),
+            (plot_events_trend, df_events),
+        ])
+
+    changes = detect_changes()
+    osm_by_plz(df_osm)
+    write_dashboard_data(df_osm, rollup, df_events, df_pop)
+    generate_html_dashboard(df_osm, rollup, df_events, changes)
+    print(f"✓ Index: {loader.write_index(OUTPUT_DIR)}")  # Letzter Schritt vor dem Commit – für das WordPress-Plugin
 
     print(f"\n✅ Alle Reports in: ./{REPORT_DIR}/")
 
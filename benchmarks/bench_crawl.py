@@ -0,0 +1,138 @@
+"""
+Benchmark: Erste Listenseite vs. Crawl mit Frontier
+====================================================
+Startet einen lokalen HTTP-Server mit synthetischen Veranstaltungskalendern (mehrere
+Listenseiten mit rel="next", je Event eine Detailseite mit Beschreibung) und vergleicht:
+- bisher: nur die erste Listenseite je Quelle (collector.scrape_events_from)
+- Crawl, vollständig: alle Listenseiten + Detailseiten (collector.crawl_events)
+- Crawl, inkrementell: zweiter Lauf mit den Events des ersten als bekannt – stoppt
+  auf der ersten Seite, die nur bekannte Events enthält
+Jedes Event hat einen eigenen .ics-Link ("In Kalender eintragen"), Quelle 0 bietet im
+Kopf einen iCal-Feed mit nur einem Termin an – beides darf die Listenseiten nicht ersetzen.
+
+    python benchmarks/bench_crawl.py                          # 6 Quellen × 8 Seiten × 20 Events
+    python benchmarks/bench_crawl.py --seiten 12 --budget 100
+"""
+
+import os
+import sys
+import argparse
+import logging
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Vor dem Import: jeder Abruf geht ans Netz (sonst misst der zweite Lauf den Cache),
+# kurzer Host-Abstand, damit der Lauf nicht Minuten dauert
+os.environ["HTTP_CACHE_DIR"] = ""
+os.environ.setdefault("SCRAPE_HOST_DELAY", "0.1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import collector  # noqa: E402
+import scrape_engine  # noqa: E402
+
+PORT = 8767
+
+
+def listing_page(quelle: int, seite: int, seiten: int, items: int) -> str:
+    events = "\n".join(
+        f'<div class="event-item"><h3>Veranstaltung {quelle}-{seite}-{i} im Stadtgarten</h3>'
+        f'<time datetime="2026-0{1 + seite % 9}-1{i % 10}T19:30">1{i % 10}.0{1 + seite % 9}.2026</time>'
+        f'<a href="/q{quelle}/event/{seite}-{i}">Details</a>'
+        f'<a href="/q{quelle}/event/{seite}-{i}.ics">In Kalender eintragen</a></div>'
+        for i in range(items))
+    weiter = f'<a rel="next" href="?seite={seite + 1}">Weiter</a>' if seite < seiten else ""
+    feed = '<link rel="alternate" type="text/calendar" href="/q0/feed.ics">' if quelle == 0 else ""
+    return (f"<html><head>{feed}</head><body><main>{events}</main>"
+            f"<nav class='pagination'>{weiter}</nav></body></html>")
+
+
+def ics(titel: str) -> str:
+    return ("BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\n"
+            f"SUMMARY:{titel}\r\nDTSTART:20261120T193000\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n")
+
+
+def detail_page(pfad: str) -> str:
+    return (f"<html><head><meta name='description' content='Stadtportal'></head><body><main>"
+            f"<h1>{pfad}</h1><div class='event-description'><p>Ausführliche Beschreibung zu {pfad}: "
+            f"Einlass ab 19 Uhr, Tickets an der Abendkasse.</p></div></main></body></html>")
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    delay = 0.05
+    seiten = 8
+    items = 20
+    abrufe = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        PageHandler.abrufe += 1
+        pfad, _, query = self.path.partition("?")
+        teile = pfad.strip("/").split("/")
+        if pfad.endswith(".ics"):
+            body = ics(f"Termin {pfad}")
+        elif len(teile) == 3 and teile[1] == "event":
+            body = detail_page(pfad)
+        elif len(teile) == 2 and teile[1] == "kalender":
+            seite = int(query.split("=")[1]) if query.startswith("seite=") else 1
+            body = listing_page(int(teile[0][1:]), seite, self.seiten, self.items)
+        else:
+            body = ""
+        data = body.encode("utf-8")
+        self.send_response(200 if data else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label: str, fn):
+    PageHandler.abrufe = 0
+    start = time.perf_counter()
+    events = fn()
+    dauer = time.perf_counter() - start
+    mit_text = sum(bool(e["beschreibung"]) for e in events)
+    print(f"  {label:<22} {dauer:6.2f}s  {PageHandler.abrufe:>4} Seiten  {len(events):>4} Events  "
+          f"{mit_text:>4} mit Beschreibung")
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quellen", type=int, default=6)
+    parser.add_argument("--seiten", type=int, default=8)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=None, help="Seiten je Lauf (Standard: alle)")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    PageHandler.seiten, PageHandler.items = args.seiten, args.items
+    server = ThreadingHTTPServer(("0.0.0.0", PORT), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sources = [{"name": f"Quelle {q}", "url": f"http://127.0.0.{2 + q}:{PORT}/q{q}/kalender",
+                "selectors": [".event-item"]} for q in range(args.quellen)]
+    erwartet = args.quellen * args.seiten * args.items
+    budget = args.budget or args.quellen * args.seiten * (1 + args.items) + 1  # + iCal-Feed von Quelle 0
+
+    print(f"{args.quellen} Quellen × {args.seiten} Seiten × {args.items} Events = {erwartet}, "
+          f"Budget {budget} Seiten, Host-Abstand {scrape_engine.HOST_DELAY:.1f}s")
+    plans = os.path.join(tempfile.mkdtemp(), "scrape_plans.json")  # Zweiter Lauf nutzt die gelernten Pläne
+    run("erste Seite", lambda: collector.scrape_events_from(sources))
+    voll = run("Crawl vollständig", lambda: collector.crawl_events(sources, budget=budget, plans_path=plans))
+    known = {e["link"]: e["beschreibung"] for e in voll}
+    inkr = run("Crawl inkrementell", lambda: collector.crawl_events(sources, known=known, full=False,
+                                                                    budget=budget, plans_path=plans))
+    server.shutdown()
+
+    ok = (len({e["link"] for e in voll}) == len(voll) and all(e["beschreibung"] for e in inkr)
+          and (len(voll) == erwartet or args.budget is not None))
+    print(f"Ergebnis: {'ok' if ok else 'FEHLER'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
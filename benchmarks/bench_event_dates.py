@@ -0,0 +1,95 @@
+"""
+Benchmark: Event-Datumsangaben → Zeitstempel
+=============================================
+Misst event_dates.parse auf synthetischen Datumsangaben in den Formaten der
+Veranstaltungsquellen und prüft eine Handvoll Referenzfälle – auch, dass der
+Formatcache je Quelle das Ergebnis nicht von der Aufrufreihenfolge abhängig macht.
+
+    python benchmarks/bench_event_dates.py                 # 10k / 100k Angaben
+    python benchmarks/bench_event_dates.py --sizes 5000
+"""
+
+import os
+import sys
+import argparse
+import random
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import event_dates  # noqa: E402
+
+WOCHENTAGE = ["Mo.", "Di.", "Mi.", "Do.", "Fr.", "Sa.", "So."]
+MONATE = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August",
+          "September", "Oktober", "November", "Dezember"]
+
+# Text, Referenz (Abrufdatum), erwarteter Beginn, erwartetes Ende
+REFERENZ = [
+    ("Sa., 14.03.2026, 19:30 Uhr", "2026-03-01", "2026-03-14 19:30", "2026-03-14 19:30"),
+    ("14. März", "2026-03-01", "2026-03-14 00:00", "2026-03-14 23:59"),
+    ("10. Januar", "2026-12-01", "2027-01-10 00:00", "2027-01-10 23:59"),
+    ("14.-16. März 2026", "2026-03-01", "2026-03-14 00:00", "2026-03-16 23:59"),
+    ("14.-16.03.2026", "2026-03-01", "2026-03-14 00:00", "2026-03-16 23:59"),
+    ("2026-03-14T19:30:00+01:00", "2026-03-01", "2026-03-14 19:30", "2026-03-14 19:30"),
+    ("14.03.2026, 19:30 - 22:00 Uhr", "2026-03-01", "2026-03-14 19:30", "2026-03-14 22:00"),
+    ("30.12. - 02.01.2027", "2026-12-01", "2026-12-30 00:00", "2027-01-02 23:59"),
+    ("ab 18 Uhr, 5. Mai", "2026-03-01", "2026-05-05 18:00", "2026-05-05 18:00"),
+]
+
+
+def make_texts(n: int, seed: int = 1) -> tuple[list[str], list[str]]:
+    rnd = random.Random(seed)
+    texts, quellen = [], []
+    for _ in range(n):
+        tag = pd.Timestamp("2026-01-01") + pd.Timedelta(days=rnd.randint(0, 400), minutes=15 * rnd.randint(40, 90))
+        art = rnd.randint(0, 3)
+        if art == 0:
+            text = f"{WOCHENTAGE[tag.dayofweek]}, {tag:%d.%m.%Y}, {tag:%H:%M} Uhr"
+        elif art == 1:
+            text = f"{tag.day}. {MONATE[tag.month - 1]}"
+        elif art == 2:
+            text = tag.isoformat()
+        else:
+            text = f"{tag:%d.%m.%Y}, {tag:%H:%M} - {(tag + pd.Timedelta(hours=2)):%H:%M} Uhr"
+        texts.append(text)
+        quellen.append(f"Quelle {art}")
+    return texts, quellen
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    texte, refs, beginn, ende = zip(*REFERENZ)
+    result = event_dates.parse(list(texte), reference=pd.to_datetime(pd.Series(refs)))
+    ok = (result["beginn"].to_numpy() == pd.to_datetime(pd.Series(beginn)).to_numpy()).all() and \
+         (result["ende"].to_numpy() == pd.to_datetime(pd.Series(ende)).to_numpy()).all()
+    print(f"Referenzfälle: {'ok' if ok else 'FEHLER'}")
+    if not ok:
+        print(pd.concat([pd.Series(texte, name="text"), result], axis=1).to_string())
+
+    # Formatcache: dieselbe Angabe muss gleich geparst werden, egal was die Quelle vorher lieferte
+    reihenfolge = []
+    for vorher in ([], ["14.03.2026"], ["14. März 2026"], ["2026-03-14"]):
+        event_dates._SOURCE_FORMATS.clear()
+        event_dates.parse(vorher, ["Quelle"] * len(vorher), pd.Timestamp("2026-03-01"))
+        reihenfolge.append(event_dates.parse(texte, ["Quelle"] * len(texte), pd.to_datetime(pd.Series(refs))))
+    gleich = all(r.equals(result) for r in reihenfolge)
+    print(f"Aufrufreihenfolge: {'ok' if gleich else 'FEHLER'}")
+    ok &= gleich
+
+    print(f"{'Angaben':>10}  {'Durchsatz':>12}  erkannt")
+    for n in args.sizes:
+        texts, quellen = make_texts(n)
+        start = time.perf_counter()
+        result = event_dates.parse(texts, quellen, pd.Timestamp("2026-01-01"))
+        dauer = time.perf_counter() - start
+        print(f"{n:>10,}  {n / dauer:>10,.0f}/s  {result['beginn'].notna().mean():.1%}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
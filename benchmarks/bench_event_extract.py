@@ -0,0 +1,111 @@
+"""
+Benchmark: Event-Extraktion BeautifulSoup vs. lxml
+===================================================
+Wertet die gespeicherten Seiten in benchmarks/fixtures/events/ (eine je Eintrag in
+collector.EVENT_SOURCES, Dateiname = Quellenname klein mit Bindestrichen, dazu eine
+Seite für den article/li-Fallback) mit beiden Wegen aus, prüft, dass exakt dieselben
+Events herauskommen, und misst die Zeit je Seite. Dritte Spalte: lxml mit dem
+Extraktionsplan, den der erste Lauf gelernt hat (scrape_plans) – ebenfalls identisch.
+
+    python benchmarks/bench_event_extract.py                 # 20 Durchläufe je Seite
+    python benchmarks/bench_event_extract.py --repeat 100
+    python benchmarks/bench_event_extract.py --record        # Fixtures von den Live-Seiten erneuern
+"""
+
+import os
+import re
+import sys
+import argparse
+import logging
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import collector  # noqa: E402
+import event_extract  # noqa: E402
+import scrape_engine  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "events")
+FALLBACK_SOURCE = {"name": "Fallback article/li", "url": "https://example.org/termine",
+                   "selectors": [".event-list-item", ".veranstaltung"]}
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def fixtures() -> list[tuple[dict, str]]:
+    out = []
+    for source in collector.EVENT_SOURCES + [FALLBACK_SOURCE]:
+        path = os.path.join(FIXTURE_DIR, f"{slug(source['name'])}.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                out.append((source, f.read()))
+        else:
+            print(f"  fehlt: {path}")
+    return out
+
+
+def record():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    http = scrape_engine.session()
+    for source in collector.EVENT_SOURCES:
+        resp = http.get(source["url"], timeout=scrape_engine.REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        path = os.path.join(FIXTURE_DIR, f"{slug(source['name'])}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        print(f"  ✓ {path} ({len(resp.text) / 1024:.0f} KB)")
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def with_plan(source: dict, html: str, plan: dict | None) -> list[dict]:
+    rows, _ = event_extract.extract(source, event_extract.parse(html), plan)
+    return collector._rows(source, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--record", action="store_true")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)  # Treffer-Logs je Durchlauf ausblenden
+
+    if args.record:
+        record()
+
+    ok = True
+    print(f"{'Quelle':<32} {'KB':>5} {'Events':>6} {'bs4':>9} {'lxml':>9} {'Plan':>9}  Faktor")
+    for source, html in fixtures():
+        soup = collector.parse_source(source, html, parser="bs4")
+        fast = collector.parse_source(source, html, parser="lxml")
+        plan = event_extract.extract(source, event_extract.parse(html))[1]["plan"]
+        planned = with_plan(source, html, plan)
+        gleich = soup == fast == planned
+        ok &= gleich
+        t_soup = timed(lambda: collector.parse_source(source, html, parser="bs4"), args.repeat)
+        t_fast = timed(lambda: collector.parse_source(source, html, parser="lxml"), args.repeat)
+        t_plan = timed(lambda: with_plan(source, html, plan), args.repeat)
+        print(f"{source['name'][:32]:<32} {len(html) / 1024:>5.0f} {len(fast):>6} "
+              f"{t_soup * 1000:>7.1f}ms {t_fast * 1000:>7.1f}ms {t_plan * 1000:>7.1f}ms  {t_soup / t_plan:>5.1f}×"
+              f"{'' if gleich else '  ABWEICHUNG'}")
+        print(f"    Plan: {plan}")
+        if not gleich:
+            for a, b in zip(soup, planned if fast == soup else fast):
+                if a != b:
+                    print(f"    bs4:  {a}\n    lxml: {b}")
+                    break
+            if len(soup) != len(fast):
+                print(f"    Anzahl: bs4 {len(soup)}, lxml {len(fast)}")
+
+    print(f"Ergebnis: {'identisch' if ok else 'ABWEICHUNG'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
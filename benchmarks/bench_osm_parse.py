@@ -0,0 +1,112 @@
+"""
+Benchmark: OSM-Elemente → Tabelle
+==================================
+Vergleicht die zeilenweise Auswertung (parse_osm_elements) mit der spaltenweisen
+(osm_frame, OsmColumns) auf synthetischen Overpass-Antworten und prüft,
+dass alle drei exakt dieselbe Tabelle liefern.
+
+    python benchmarks/bench_osm_parse.py                  # 10k / 100k / 1M Elemente
+    python benchmarks/bench_osm_parse.py --sizes 10000 50000
+
+Die Elemente decken auch die Sonderfälle ab: fehlende Tags, leere Werte,
+Ways mit center, lat = 0, website vs. contact:website, fremde Tags.
+"""
+
+import os
+import sys
+import argparse
+import random
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import collector  # noqa: E402
+
+TYPEN = {
+    "shop": ["bakery", "supermarket", "kiosk", "hairdresser", "clothes", ""],
+    "amenity": ["restaurant", "cafe", "pharmacy", "bank", "fast_food", ""],
+    "leisure": ["playground", "park", "sports_centre", ""],
+    "tourism": ["hotel", "museum", "information", ""],
+}
+STRASSEN = ["Marktplatz", "Bahnhofstraße", "Wittener Straße", "Lange Straße", "Dortmunder Straße"]
+EXTRA = {"wheelchair": "yes", "check_date": "2024-05-01", "brand": "Kette", "level": "0"}
+
+
+def make_elements(n: int, seed: int = 1) -> list[dict]:
+    rnd = random.Random(seed)
+    elements = []
+    for i in range(n):
+        tags = {}
+        for key in rnd.sample(list(TYPEN), k=rnd.choice([0, 1, 1, 1, 2])):
+            tags[key] = rnd.choice(TYPEN[key])
+        if rnd.random() < 0.8:
+            tags["name"] = f"Einrichtung {i}"
+        if rnd.random() < 0.4:
+            tags["addr:street"] = rnd.choice(STRASSEN)
+            tags["addr:housenumber"] = str(rnd.randint(1, 200))
+            tags["addr:postcode"] = rnd.choice(collector.POSTCODES)
+        if rnd.random() < 0.1:
+            tags["addr:city"] = "Dortmund"
+        if rnd.random() < 0.3:
+            tags["opening_hours"] = "Mo-Fr 08:00-18:00"
+        if rnd.random() < 0.2:
+            tags["website"] = rnd.choice(["https://example.de", ""])
+        if rnd.random() < 0.2:
+            tags["contact:website"] = "https://kontakt.example.de"
+        for k, v in EXTRA.items():
+            if rnd.random() < 0.3:
+                tags[k] = v
+
+        el = {"type": rnd.choice(["node", "node", "way"]), "id": 10_000 + i}
+        lat, lon = 51.55 + rnd.random() * 0.05, 7.28 + rnd.random() * 0.08
+        if rnd.random() < 0.01:
+            lat = 0.0
+        if el["type"] == "node":
+            el["lat"], el["lon"] = lat, lon
+        elif rnd.random() < 0.98:
+            el["center"] = {"lat": lat, "lon": lon}
+        if tags or rnd.random() < 0.5:
+            el["tags"] = tags
+        elements.append(el)
+    return elements
+
+
+def _streamed(elements: list[dict]) -> pd.DataFrame:
+    columns = collector.OsmColumns()
+    for el in elements:
+        columns.append(el)
+    return columns.to_frame()
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'Elemente':>10}  {'zeilenweise':>12}  {'osm_frame':>12}  {'OsmColumns':>12}  {'Faktor':>7}  identisch")
+    ok = True
+    for n in args.sizes:
+        elements = make_elements(n)
+        ref, t_ref = _timed(lambda e: pd.DataFrame(collector.parse_osm_elements(e), columns=collector.OSM_COLUMNS),
+                            elements)
+        batch, t_batch = _timed(collector.osm_frame, elements)
+        stream, t_stream = _timed(_streamed, elements)
+
+        same = ref.equals(batch) and ref.equals(stream) and (ref.dtypes == batch.dtypes).all()
+        ok &= bool(same)
+        print(f"{n:>10,}  {n / t_ref:>10,.0f}/s  {n / t_batch:>10,.0f}/s  {n / t_stream:>10,.0f}/s  "
+              f"{t_ref / t_batch:>6.1f}x  {'ja' if same else 'NEIN'}")
+        del elements, ref, batch, stream
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: Event-Quellen nacheinander vs. Scrape-Engine
+========================================================
+Startet einen lokalen HTTP-Server mit synthetischen Veranstaltungsseiten (feste
+Antwortzeit je Seite) und scrapt sie einmal nacheinander wie bisher (Abruf, Parsen,
+Pause) und einmal über scrape_engine.scrape_all. Die Quellen verteilen sich auf
+mehrere Loopback-Adressen (127.0.0.x = eigene Hosts), damit die Host-Limits greifen.
+Beide Wege müssen dieselben Events liefern.
+
+    python benchmarks/bench_scrape_engine.py                       # 24 Quellen auf 8 Hosts
+    python benchmarks/bench_scrape_engine.py --quellen 48 --hosts 12 --delay 1.0
+"""
+
+import os
+import sys
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import collector  # noqa: E402
+import scrape_engine  # noqa: E402
+
+PORT = 8766
+
+
+def make_page(n: int, seed: int) -> str:
+    items = "\n".join(
+        f'<div class="event-item"><h3>Veranstaltung {seed}-{i} im Stadtgarten</h3>'
+        f'<time datetime="2026-0{1 + i % 9}-1{i % 10}T19:30">Sa., 1{i % 10}.0{1 + i % 9}.2026</time>'
+        f'<span class="location">Stadthalle {i % 4}</span><a href="/event/{seed}/{i}">mehr</a>'
+        f'<p>{"Lorem ipsum dolor sit amet. " * 20}</p></div>'
+        for i in range(n))
+    nav = "".join(f'<li><a href="/seite/{i}">Menüpunkt {i} mit etwas Text dazu</a></li>' for i in range(200))
+    return f"<html><body><ul>{nav}</ul><main>{items}</main></body></html>"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    delay = 0.5
+    pages: dict[str, bytes] = {}
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = self.pages.get(self.path.split("?")[0], b"")
+        self.send_response(200 if body else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quellen", type=int, default=24)
+    parser.add_argument("--hosts", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.5, help="Antwortzeit je Seite (s)")
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--pause", type=float, default=0.0,
+                        help="Pause zwischen Quellen im alten Ablauf (dort 2 s)")
+    args = parser.parse_args()
+
+    PageHandler.delay = args.delay
+    PageHandler.pages = {f"/quelle/{i}": make_page(args.items, i).encode("utf-8") for i in range(args.quellen)}
+    server = ThreadingHTTPServer(("0.0.0.0", PORT), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    sources = [{"name": f"Quelle {i}", "url": f"http://127.0.0.{2 + i % args.hosts}:{PORT}/quelle/{i}",
+                "selectors": [".event-list-item", ".event-item", "article"]} for i in range(args.quellen)]
+
+    start = time.perf_counter()
+    http = scrape_engine.session()
+    seriell = []
+    for source in sources:
+        seriell.extend(collector.parse_source(source, http.get(source["url"], timeout=15).text))
+        time.sleep(args.pause)
+    t_seriell = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = scrape_engine.scrape_all(sources, collector.parse_source)
+    engine = [e for r in report for e in (r["ergebnis"] or [])]
+    t_engine = time.perf_counter() - start
+    server.shutdown()
+
+    gleich = seriell == engine
+    print(f"{args.quellen} Quellen auf {args.hosts} Hosts, {args.delay:.2f}s Antwortzeit, "
+          f"Host-Abstand {scrape_engine.HOST_DELAY:.1f}s")
+    print(f"  nacheinander: {t_seriell:6.2f}s")
+    print(f"  Engine:       {t_engine:6.2f}s  ({t_seriell / t_engine:.1f}×)")
+    print(f"  Events: {len(engine)} – {'identisch' if gleich else 'ABWEICHUNG'}")
+    sys.exit(0 if gleich else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: DOM-Heuristik vs. strukturierte Event-Daten
+=======================================================
+Wertet gespeicherte Seiten aus benchmarks/fixtures/events/ einmal mit der DOM-Heuristik
+(collector.parse_source) und einmal über event_structured aus:
+- JSON-LD:   stadt-castrop-rauxel-kalender-jsonld.html (ItemList in @graph)
+- Microdata: regioactive-stadthalle.html
+- iCal:      eventforum-castrop.ics (zur Listenseite eventforum-castrop.html)
+Prüft, dass dieselben Veranstaltungen (Titel, Reihenfolge) herauskommen und die
+strukturierten Daten jedes Event mit Termin liefern, und misst die Zeit (Microdata
+einschließlich Parsen – im Crawl teilt es sich das Dokument mit der Heuristik).
+
+    python benchmarks/bench_structured.py
+    python benchmarks/bench_structured.py --repeat 100
+"""
+
+import os
+import sys
+import argparse
+import logging
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import collector  # noqa: E402
+import event_extract  # noqa: E402
+import event_structured  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "events")
+SOURCES = {s["name"]: s for s in collector.EVENT_SOURCES}
+
+
+def read(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def cases() -> list[tuple[str, dict, str, str, object]]:
+    """(Format, Quelle, Listenseite, Text für den strukturierten Weg, Auswertung)."""
+    stadt = read("stadt-castrop-rauxel-kalender-jsonld.html")
+    regio = read("regioactive-stadthalle.html")
+    forum = read("eventforum-castrop.html")
+    return [
+        ("JSON-LD", SOURCES["Stadt Castrop-Rauxel Kalender"], stadt, stadt, event_structured.jsonld),
+        ("Microdata", SOURCES["Regioactive Stadthalle"], regio, regio,
+         lambda page: event_structured.microdata(event_extract.parse(page))),
+        ("iCal", SOURCES["Eventforum Castrop"], forum, read("eventforum-castrop.ics"), event_structured.ics_events),
+    ]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    ok = True
+    print(f"{'Format':<10} {'Quelle':<30} {'Events':>6} {'DOM':>9} {'strukt.':>9}  Faktor  mit Beschreibung")
+    for art, source, page, data, extract in cases():
+        dom = collector.parse_source(source, page, parser="lxml")
+        structured = collector._rows(source, extract(data))
+        gleich = [e["titel"] for e in dom] == [e["titel"] for e in structured]
+        vollstaendig = all(e["datum_event"] for e in structured)
+        ok &= gleich and vollstaendig
+        t_dom = timed(lambda: collector.parse_source(source, page, parser="lxml"), args.repeat)
+        t_structured = timed(lambda: extract(data), args.repeat)
+        print(f"{art:<10} {source['name'][:30]:<30} {len(structured):>6} {t_dom * 1000:>7.1f}ms "
+              f"{t_structured * 1000:>7.1f}ms {t_dom / t_structured:>6.1f}×  "
+              f"{sum(bool(e['beschreibung']) for e in structured)}/{len(structured)}"
+              f"{'' if gleich else '  ABWEICHUNG'}")
+        if not gleich:
+            print(f"    DOM:   {[e['titel'] for e in dom][:3]}\n    strukt.: {[e['titel'] for e in structured][:3]}")
+        print(f"    DOM:     {dom[0]['datum_event']!r:<34} {dom[0]['ort']!r}")
+        print(f"    strukt.: {structured[0]['datum_event']!r:<34} {structured[0]['ort']!r}")
+
+    print(f"Ergebnis: {'ok' if ok else 'ABWEICHUNG'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
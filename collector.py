@@ -19,21 +19,57 @@ import requests
 import json
 import csv
 import os
+import re
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain, repeat
 from datetime import datetime, date
+from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
+import numpy as np
 import pandas as pd
 
+import event_dedup
+import event_extract
+import event_structured
+import event_store
+import http_cache
+import osm_spatial
+import osm_store
+import overpass
+import scrape_engine
+import scrape_plans
+
 # ── Konfiguration ────────────────────────────────────────────────────────────
 
 CITY = "Castrop-Rauxel"
 POSTCODES = ["44575", "44577", "44579", "44581"]
-OSM_OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+# Overpass-Server in Wunschreihenfolge – die Rangliste lernt aus Latenz und Fehlern (overpass.py)
+OSM_OVERPASS_MIRRORS = [u for u in os.getenv("OSM_OVERPASS_MIRRORS", ",".join(overpass.MIRRORS)).split(",") if u]
+OSM_BUDGET = int(os.getenv("OSM_BUDGET", 8 * 60))  # Sekunden für Castrop-Rauxel inkl. aller Wiederholungen
 EVENTS_URL = "https://www.castrop-rauxel.de/veranstaltungen"
 OUTPUT_DIR = "output"
 LOG_FILE = "collector.log"
 
+# Weitere Städte für die OSM-Sammlung: "ruhr" = alle RUHR_CITIES, sonst kommagetrennte Liste
+OSM_STAEDTE = os.getenv("OSM_STAEDTE", "")
+OSM_STAEDTE_DIR = f"{OUTPUT_DIR}/osm_staedte"
+OSM_MAX_PARALLEL = 2               # overpass-api.de vergibt ~2 Slots pro IP
+OSM_SHARD_BUDGET = int(os.getenv("OSM_SHARD_BUDGET", 12 * 60))  # Sekunden – höchstens, s. COLLECTOR_BUDGET
+OSM_SHARD_MIN = 60                 # Weniger Restzeit lohnt die weiteren Städte nicht
+
+# Gesamtbudget des Collectors: das Job-Limit (30 min) gilt für den ganzen Workflow –
+# Trends, Ads, KI, Social, Analyse und der Commit brauchen den Rest. OSM Castrop-Rauxel,
+# die weiteren Städte und der Event-Crawl teilen sich diese Zeit (in dieser Rangfolge)
+COLLECTOR_BUDGET = int(os.getenv("COLLECTOR_BUDGET", 14 * 60))
+COLLECTOR_RESERVE = 90             # Sekunden nach dem Crawl: Bevölkerung, Sheets, Zusammenfassung
+
+# Inkrementell: nur Änderungen seit dem letzten Lauf holen ([adiff:...]) und einspielen
+OSM_INCREMENTAL = os.getenv("OSM_INCREMENTAL", "1") == "1"
+OSM_FULL_REFRESH_DAYS = 7          # Spätestens dann wieder alles komplett abfragen
+PLZ_REFRESH_DAYS = 30              # PLZ-Grenzen ändern sich selten
+
 # Google Sheets (optional) – leer lassen wenn nicht genutzt
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "")
 GOOGLE_CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
@@ -61,45 +97,196 @@ OSM_TAGS = {
 }
 
 
-def fetch_osm_data_all() -> dict:
+OSM_COLUMNS = [
+    "datum", "kategorie", "name", "typ", "strasse", "hausnummer",
+    "plz", "ort", "lat", "lon", "oeffnungszeiten", "website", "osm_id", "osm_typ",
+]
+
+
+# Die 53 Kommunen des Regionalverbands Ruhr
+RUHR_CITIES = [
+    # Kreisfreie Städte
+    "Bochum", "Bottrop", "Dortmund", "Duisburg", "Essen", "Gelsenkirchen",
+    "Hagen", "Hamm", "Herne", "Mülheim an der Ruhr", "Oberhausen",
+    # Kreis Recklinghausen
+    "Castrop-Rauxel", "Datteln", "Dorsten", "Gladbeck", "Haltern am See", "Herten",
+    "Marl", "Oer-Erkenschwick", "Recklinghausen", "Waltrop",
+    # Kreis Unna
+    "Bergkamen", "Bönen", "Fröndenberg/Ruhr", "Holzwickede", "Kamen", "Lünen",
+    "Schwerte", "Selm", "Unna", "Werne",
+    # Ennepe-Ruhr-Kreis
+    "Breckerfeld", "Ennepetal", "Gevelsberg", "Hattingen", "Herdecke", "Schwelm",
+    "Sprockhövel", "Wetter (Ruhr)", "Witten",
+    # Kreis Wesel
+    "Alpen", "Dinslaken", "Hamminkeln", "Hünxe", "Kamp-Lintfort", "Moers",
+    "Neukirchen-Vluyn", "Rheinberg", "Schermbeck", "Sonsbeck", "Voerde (Niederrhein)",
+    "Wesel", "Xanten",
+]
+
+
+def build_osm_query(city: str = CITY, since: str | None = None) -> str:
     """
-    Holt ALLE Tags in einer einzigen Overpass-Anfrage.
-    Bei Timeout (504) wird bis zu 3x mit Wartezeit wiederholt.
+    Overpass-Abfrage für alle OSM_TAGS in einer Stadt.
+    Mit `since` (ISO-Zeitstempel) als Augmented Diff – Overpass kann Diffs nur als XML.
     """
     tag_union = "\n      ".join([
         f"node(area.a)[{tag}]; way(area.a)[{tag}];"
         for tag in OSM_TAGS.keys()
     ])
-    query = f"""
-    [out:json][timeout:60];
-    area[name="{CITY}"]->.a;
+    settings = f'[out:xml][timeout:60][adiff:"{since}"]' if since else "[out:json][timeout:60]"
+    out = "out center meta;" if since else "out center tags;"
+    # Verwaltungsgrenze erzwingen – sonst trifft z.B. "Alpen" auch das Gebirge
+    return f"""
+    {settings};
+    area[name="{city}"][boundary=administrative][admin_level~"^(6|8)$"]->.a;
     (
       {tag_union}
     );
-    out center tags;
+    {out}
     """
-    for versuch in range(1, 4):  # Max 3 Versuche
-        try:
-            log.info(f"OSM: Abfrage Versuch {versuch}/3...")
-            response = requests.post(
-                OSM_OVERPASS_URL,
-                data={"data": query},
-                timeout=90,
-                headers={"User-Agent": "RuhrFinds-DataBot/1.0 (research; contact@ruhrfinds.de)"}
-            )
-            response.raise_for_status()
-            elements = response.json().get("elements", [])
-            log.info(f"OSM: {len(elements)} Einträge gefunden")
-            return elements
-        except Exception as e:
-            log.warning(f"OSM Versuch {versuch} fehlgeschlagen: {e}")
-            if versuch < 3:
-                wartezeit = versuch * 30  # 30s, 60s
-                log.info(f"Warte {wartezeit}s vor nächstem Versuch...")
-                time.sleep(wartezeit)
-
-    log.error("OSM: Alle 3 Versuche fehlgeschlagen – überspringe OSM-Daten")
-    return []
+
+
+def _fetch_osm(consume, city: str = CITY, query: str | None = None,
+               versuche: int = 4, deadline: float | None = None):
+    """
+    Schickt die Overpass-Abfrage ab und übergibt die (gestreamte) Antwort an `consume`.
+    Wiederholungen, Serverwechsel und Zeitbudget regelt overpass.request().
+    """
+    result = overpass.request(query or build_osm_query(city), consume, OSM_OVERPASS_MIRRORS,
+                              versuche=versuche, deadline=deadline, label=city)
+    if result is None:
+        log.error(f"OSM [{city}]: Alle Versuche fehlgeschlagen – überspringe OSM-Daten")
+    return result
+
+
+def fetch_osm_data_all() -> list[dict]:
+    """Holt ALLE Tags in einer einzigen Overpass-Anfrage als Liste roher Elemente."""
+    elements = _fetch_osm(lambda r: list(overpass.iter_elements(r))) or []
+    log.info(f"OSM: {len(elements)} Einträge gefunden")
+    return elements
+
+
+def fetch_osm_frame(city: str = CITY, meta: dict | None = None, **retry) -> pd.DataFrame | None:
+    """
+    Wie fetch_osm_data_all() + parse_osm_elements(), aber gestreamt:
+    jedes Element wandert direkt in die Spaltenpuffer, ohne Zwischenliste.
+    """
+    def consume(response):
+        columns = OsmColumns(city=city)
+        for el in overpass.iter_elements(response, meta):
+            columns.append(el)
+        return columns.to_frame()
+
+    df = _fetch_osm(consume, city=city, **retry)
+    if df is not None:
+        log.info(f"OSM [{city}]: {len(df)} Einträge gefunden")
+    return df
+
+
+def fetch_osm_diff(city: str, since: str, store_dir: str, **retry) -> pd.DataFrame | None:
+    """
+    Holt nur die Elemente, die sich seit `since` geändert haben, und spielt sie
+    in den zuletzt gespeicherten Snapshot ein. Ergebnis hat dasselbe Format wie fetch_osm_frame().
+    """
+    meta = {}
+
+    def consume(response):
+        upsert = OsmColumns(batch=256, city=city)
+        betroffen = []
+        for aktion, el in overpass.iter_adiff(response, meta):
+            betroffen.append((el["type"], el["id"]))
+            # Wer keinen der OSM_TAGS mehr trägt, fällt genauso raus wie Gelöschtes
+            if aktion != "delete" and any(tag in el.get("tags", {}) for tag in OSM_TAGS):
+                upsert.append(el)
+        return upsert.to_frame(), betroffen
+
+    result = _fetch_osm(consume, city=city, query=build_osm_query(city, since=since), **retry)
+    if result is None:
+        return None
+    upsert, betroffen = result
+
+    prev = osm_store.snapshot(store_dir=store_dir)[OSM_COLUMNS]
+    prev = prev.astype({"kategorie": str, "typ": str, "osm_typ": str}).assign(datum=today)
+    keys = pd.MultiIndex.from_frame(prev[["osm_typ", "osm_id"]])
+    bleibt = prev[~keys.isin(betroffen)]
+    df = pd.concat([bleibt, upsert]) if len(upsert) else bleibt
+    df = osm_store.sort_like_overpass(df)[OSM_COLUMNS]
+    df.attrs.update(modus="diff", osm_base=meta.get("osm_base"))
+    log.info(f"OSM [{city}]: Diff seit {since} – {len(betroffen)} Änderungen, {len(df)} Einträge")
+    return df
+
+
+def fetch_osm_snapshot(city: str = CITY, store_dir: str = osm_store.OSM_STORE_DIR,
+                       **retry) -> pd.DataFrame | None:
+    """
+    Aktueller Bestand einer Stadt: inkrementell per Diff, wenn ein gültiger Datenstand
+    vorliegt und die letzte Vollabfrage jung genug ist – sonst (oder bei Fehlern) komplett.
+    """
+    stand = osm_store.read_stand(store_dir)
+    dates = osm_store.list_dates(store_dir)
+    voll = stand.get("letzte_vollabfrage", "")
+    frisch = bool(voll) and (date.fromisoformat(today) - date.fromisoformat(voll)).days < OSM_FULL_REFRESH_DAYS
+    if OSM_INCREMENTAL and stand.get("osm_base") and dates and stand.get("datum") == dates[-1] and frisch:
+        df = fetch_osm_diff(city, stand["osm_base"], store_dir, **retry)
+        if df is not None:
+            return df
+        log.warning(f"OSM [{city}]: Diff fehlgeschlagen – frage komplett ab")
+
+    meta = {}
+    df = fetch_osm_frame(city, meta=meta, **retry)
+    if df is not None:
+        df.attrs.update(modus="voll", osm_base=meta.get("osm3s", {}).get("timestamp_osm_base"))
+    return df
+
+
+def build_plz_query(city: str = CITY) -> str:
+    """PLZ-Grenzen (boundary=postal_code) mit Geometrie; für CITY nur die POSTCODES."""
+    plz_filter = f'[postal_code~"^({"|".join(POSTCODES)})$"]' if city == CITY else ""
+    return f"""
+    [out:json][timeout:60];
+    area[name="{city}"][boundary=administrative][admin_level~"^(6|8)$"]->.a;
+    relation(area.a)[boundary=postal_code]{plz_filter};
+    out geom;
+    """
+
+
+def fetch_plz_polygons(city: str = CITY, store_dir: str = osm_store.OSM_STORE_DIR, **retry):
+    """PLZ-Grenzen für die PLZ-Zuordnung im Raumindex holen – nur wenn keine frischen vorliegen."""
+    path = osm_spatial.polygons_path(store_dir)
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < PLZ_REFRESH_DAYS * 86400:
+        return
+
+    def consume(response):
+        polygons = {}
+        for el in overpass.iter_elements(response):
+            plz = el.get("tags", {}).get("postal_code")
+            ways = [[(p["lon"], p["lat"]) for p in m["geometry"]]
+                    for m in el.get("members", []) if m.get("type") == "way" and m.get("geometry")]
+            rings = osm_spatial.rings_from_ways(ways)
+            if plz and rings:
+                polygons.setdefault(plz, []).extend(rings)
+        return polygons
+
+    polygons = _fetch_osm(consume, city=city, query=build_plz_query(city), **retry)
+    if polygons:
+        osm_spatial.write_polygons(polygons, store_dir)
+        log.info(f"OSM [{city}]: {len(polygons)} PLZ-Grenzen gespeichert")
+
+
+def store_osm_snapshot(df: pd.DataFrame, store_dir: str = osm_store.OSM_STORE_DIR):
+    """Snapshot speichern und den Datenstand für den nächsten Diff fortschreiben."""
+    osm_store.write_snapshot(df, today, store_dir=store_dir)
+    stand = osm_store.read_stand(store_dir)
+    stand["datum"] = today
+    if df.attrs.get("osm_base"):
+        stand["osm_base"] = df.attrs["osm_base"]
+    else:
+        stand.pop("osm_base", None)  # Ohne Zeitstempel beim nächsten Mal wieder komplett
+    if df.attrs.get("modus") == "voll":
+        stand["letzte_vollabfrage"] = today
+    osm_store.write_stand(stand, store_dir)
+    # Raumindex (Umkreis, nächste Nachbarn, PLZ) gleich mit ablegen
+    osm_spatial.write_index(df, today, store_dir)
 
 
 def classify_element(el: dict) -> str:
@@ -111,73 +298,253 @@ def classify_element(el: dict) -> str:
     return "Sonstiges"
 
 
+def _osm_row(el: dict, city: str = CITY) -> tuple:
+    """Werte eines Elements in der Reihenfolge von OSM_COLUMNS."""
+    tags     = el.get("tags", {})
+    lat      = el.get("lat") or el.get("center", {}).get("lat")
+    lon      = el.get("lon") or el.get("center", {}).get("lon")
+    return (
+        today,
+        classify_element(el),
+        tags.get("name", "–"),
+        tags.get("shop") or tags.get("amenity") or tags.get("leisure") or tags.get("tourism") or "–",
+        tags.get("addr:street", ""),
+        tags.get("addr:housenumber", ""),
+        tags.get("addr:postcode", ""),
+        tags.get("addr:city", city),
+        lat,
+        lon,
+        tags.get("opening_hours", ""),
+        tags.get("website", tags.get("contact:website", "")),
+        el.get("id"),
+        el.get("type"),
+    )
+
+
 def parse_osm_elements(elements: list) -> list[dict]:
-    rows = []
-    for el in elements:
-        tags     = el.get("tags", {})
-        lat      = el.get("lat") or el.get("center", {}).get("lat")
-        lon      = el.get("lon") or el.get("center", {}).get("lon")
-        category = classify_element(el)
-        rows.append({
-            "datum":          today,
-            "kategorie":      category,
-            "name":           tags.get("name", "–"),
-            "typ":            tags.get("shop") or tags.get("amenity") or tags.get("leisure") or tags.get("tourism") or "–",
-            "strasse":        tags.get("addr:street", ""),
-            "hausnummer":     tags.get("addr:housenumber", ""),
-            "plz":            tags.get("addr:postcode", ""),
-            "ort":            tags.get("addr:city", CITY),
-            "lat":            lat,
-            "lon":            lon,
-            "oeffnungszeiten": tags.get("opening_hours", ""),
-            "website":        tags.get("website", tags.get("contact:website", "")),
-            "osm_id":         el.get("id"),
-            "osm_typ":        el.get("type"),
-        })
-    return rows
+    return [dict(zip(OSM_COLUMNS, _osm_row(el))) for el in elements]
+
 
+# Tags, die _osm_row() ausliest – osm_frame() holt genau diese in einem Durchgang
+ROW_TAGS = list(OSM_TAGS) + [
+    "name", "addr:street", "addr:housenumber", "addr:postcode", "addr:city",
+    "opening_hours", "website", "contact:website",
+]
+_ROW_TAG_INDEX = pd.Index(ROW_TAGS)
+_NO_TAGS = {}
 
-def collect_osm() -> pd.DataFrame:
-    """OSM-Daten sammeln mit automatischem Retry bei Timeout."""
-    import time
 
-    # Leerer DataFrame mit korrekten Spalten als Fallback
-    empty_df = pd.DataFrame(columns=[
-        "datum","kategorie","name","typ","strasse","hausnummer",
-        "plz","ort","lat","lon","oeffnungszeiten","website","osm_id","osm_typ"
-    ])
+def _osm_arrays(elements: list[dict], city: str = CITY) -> dict[str, np.ndarray]:
+    """
+    Spaltenweise Variante von _osm_row() für viele Elemente auf einmal – gleiche Werte, gleiche Regeln.
+    Alle Tags werden einmal zu (Zeile, Schlüssel, Wert) flachgeklopft; Kategorie, Typ,
+    Adresse und Website entstehen danach durch Einsetzen in vorbelegte Spalten.
+    """
+    n = len(elements)
+    get = dict.get
+    tags = list(map(get, elements, repeat("tags"), repeat(_NO_TAGS)))
+    row = np.repeat(np.arange(n), np.fromiter(map(len, tags), np.int64, n))
+    keys = _ROW_TAG_INDEX.get_indexer(list(chain.from_iterable(tags)))
+    values = np.array(list(chain.from_iterable(map(dict.values, tags))), dtype=object)
+    bekannt = keys >= 0  # Alle übrigen Tags (brand, wheelchair, ...) interessieren nicht
+    row, keys, values = row[bekannt], keys[bekannt], values[bekannt]
+
+    # Nach Tag gruppieren: ein Sortierlauf statt eines Vergleichs pro Tag
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(len(ROW_TAGS) + 1))
+    found = {tag: (row[order[bounds[i]:bounds[i + 1]]], values[order[bounds[i]:bounds[i + 1]]])
+             for i, tag in enumerate(ROW_TAGS)}
+
+    def filled(default):
+        out = np.empty(n, dtype=object)
+        out.fill(default)
+        return out
+
+    def column(tag, default):
+        out = filled(default)
+        r, v = found[tag]
+        out[r] = v
+        return out
+
+    # Erster passender Tag gewinnt – also in umgekehrter Reihenfolge einsetzen
+    kategorie, typ = filled("Sonstiges"), filled("–")
+    for tag in reversed(OSM_TAGS):
+        r, v = found[tag]
+        kategorie[r] = OSM_TAGS[tag]
+        gesetzt = v != ""
+        typ[r[gesetzt]] = v[gesetzt]
+
+    website = column("contact:website", "")
+    website[found["website"][0]] = found["website"][1]
+
+    def coordinate(axis):
+        # el["lat"] or el["center"]["lat"] – 0.0 zählt wie fehlend
+        direct = np.fromiter(map(get, elements, repeat(axis), repeat(np.nan)), np.float64, n)
+        centers = map(get, elements, repeat("center"), repeat(_NO_TAGS))
+        center = np.fromiter(map(get, centers, repeat(axis), repeat(np.nan)), np.float64, n)
+        return np.where(np.isnan(direct) | (direct == 0), center, direct)
+
+    return {
+        "datum":           filled(today),
+        "kategorie":       kategorie,
+        "name":            column("name", "–"),
+        "typ":             typ,
+        "strasse":         column("addr:street", ""),
+        "hausnummer":      column("addr:housenumber", ""),
+        "plz":             column("addr:postcode", ""),
+        "ort":             column("addr:city", city),
+        "lat":             coordinate("lat"),
+        "lon":             coordinate("lon"),
+        "oeffnungszeiten": column("opening_hours", ""),
+        "website":         website,
+        "osm_id":          np.fromiter(map(get, elements, repeat("id")), np.int64, n),
+        "osm_typ":         np.array(list(map(get, elements, repeat("type"))), dtype=object),
+    }
 
-    elements = []
-    for versuch in range(1, 4):  # Max 3 Versuche
-        log.info(f"OSM: Versuch {versuch}/3 – warte kurz vor Anfrage...")
-        time.sleep(10 * versuch)  # 10s, 20s, 30s zwischen Versuchen
-        elements = fetch_osm_data_all()
-        if elements:
-            break
-        log.warning(f"OSM: Versuch {versuch} fehlgeschlagen – versuche erneut...")
 
-    if not elements:
-        log.error("OSM: Alle Versuche fehlgeschlagen – speichere leere CSV")
-        path = f"{OUTPUT_DIR}/osm_{today}.csv"
-        empty_df.to_csv(path, index=False, encoding="utf-8-sig")
-        log.info(f"OSM Daten gespeichert: {path} (0 Einträge)")
-        return empty_df
+def osm_frame(elements: list[dict], city: str = CITY) -> pd.DataFrame:
+    """Wie pd.DataFrame(parse_osm_elements(elements)), aber spaltenweise berechnet."""
+    return pd.DataFrame(_osm_arrays(elements, city), columns=OSM_COLUMNS)
 
-    all_rows = parse_osm_elements(elements)
-    df = pd.DataFrame(all_rows) if all_rows else empty_df
 
-    if not df.empty and "kategorie" in df.columns:
-        for cat, count in df["kategorie"].value_counts().items():
-            log.info(f"  OSM [{cat}]: {count} Einträge")
+class OsmColumns:
+    """
+    Spaltenpuffer für gestreamte Overpass-Antworten.
+    Elemente werden in Blöcken gesammelt und blockweise mit _osm_arrays() ausgewertet –
+    es liegen nie mehr als `batch` rohe Elemente gleichzeitig im Speicher.
+    """
 
-    path = f"{OUTPUT_DIR}/osm_{today}.csv"
-    df.to_csv(path, index=False, encoding="utf-8-sig")
-    log.info(f"OSM Daten gespeichert: {path} ({len(df)} Einträge)")
+    def __init__(self, batch: int = 4096, city: str = CITY):
+        self.batch = batch
+        self.city = city
+        self.pending = []
+        self.blocks = []
+
+    def append(self, el: dict):
+        self.pending.append(el)
+        if len(self.pending) >= self.batch:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.blocks.append(_osm_arrays(self.pending, self.city))
+            self.pending = []
+
+    def to_frame(self) -> pd.DataFrame:
+        self._flush()
+        if not self.blocks:
+            return osm_frame([], self.city)
+        data = {c: np.concatenate([b[c] for b in self.blocks]) for c in OSM_COLUMNS}
+        return pd.DataFrame(data, columns=OSM_COLUMNS)
+
+
+def collect_osm(budget: float = OSM_BUDGET) -> pd.DataFrame:
+    """OSM-Daten sammeln – Wiederholungen innerhalb von `budget` Sekunden."""
+    deadline = time.monotonic() + budget
+    # Alte Tages-CSVs zuerst übernehmen – der Speicher nimmt danach keine früheren Tage mehr an
+    osm_store.sync_from_csv()
+
+    df = fetch_osm_snapshot(deadline=deadline)
+    if df is None or df.empty:
+        # Der Tag fehlt dann im Speicher ("keine Daten") – Sheets bekommt die leere Tabelle
+        log.error("OSM: Alle Versuche fehlgeschlagen – keine Daten für heute")
+        return pd.DataFrame(columns=OSM_COLUMNS)
+
+    for cat, count in df["kategorie"].value_counts().items():
+        log.info(f"  OSM [{cat}]: {count} Einträge")
+
+    # Nur die Änderungen ggü. dem Vortag landen im Snapshot-Speicher – keine Tages-CSV mehr,
+    # Plugin (output/index.json) und analyse.py lesen aus dem Speicher
+    fetch_plz_polygons(versuche=1, deadline=deadline)
+    store_osm_snapshot(df)
+    return df
+
+
+# ── 1b. Weitere Städte im Ruhrgebiet (parallel, je Stadt ein eigener Speicher) ─
+
+def city_slug(city: str) -> str:
+    """"Mülheim an der Ruhr" → "muelheim-an-der-ruhr" (Verzeichnisname)."""
+    s = city.lower()
+    for a, b in (("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss")):
+        s = s.replace(a, b)
+    return re.sub(r"[^a-z0-9]+", "-", s).strip("-")
+
+
+def city_store_dir(city: str) -> str:
+    return osm_store.OSM_STORE_DIR if city == CITY else f"{OSM_STAEDTE_DIR}/{city_slug(city)}"
+
+
+def _collect_city(city: str, deadline: float) -> dict:
+    """Eine Stadt abfragen und in ihren Speicher schreiben – Fehler bleiben bei dieser Stadt."""
+    start = time.monotonic()
+    result = {"stadt": city, "status": "fehler", "eintraege": 0}
+    try:
+        if start >= deadline:
+            result["status"] = "zeitbudget"
+        else:
+            df = fetch_osm_snapshot(city, city_store_dir(city), versuche=2, deadline=deadline)
+            if df is not None and not df.empty:
+                fetch_plz_polygons(city, city_store_dir(city), versuche=1, deadline=deadline)
+                store_osm_snapshot(df, city_store_dir(city))
+                result.update(status="ok", eintraege=len(df))
+            elif time.monotonic() >= deadline - 5:
+                result["status"] = "zeitbudget"
+    except Exception as e:
+        log.warning(f"OSM [{city}]: {e}")
+    result["sekunden"] = round(time.monotonic() - start, 1)
+    return result
+
+
+def collect_osm_shards(cities: list[str], max_parallel: int = OSM_MAX_PARALLEL,
+                       budget: int = OSM_SHARD_BUDGET) -> pd.DataFrame:
+    """
+    Sammelt OSM-Daten für mehrere Städte mit höchstens `max_parallel` gleichzeitigen
+    Overpass-Abfragen. Städte, die bis zum Ende des Zeitbudgets nicht drankommen,
+    werden übersprungen und beim nächsten Lauf wieder versucht.
+    """
+    deadline = time.monotonic() + budget
+    log.info(f"OSM: {len(cities)} Städte, {max_parallel} parallel, Budget {budget}s")
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        futures = [pool.submit(_collect_city, city, deadline) for city in cities]
+        for future in as_completed(futures):
+            r = future.result()
+            log.info(f"  OSM [{r['stadt']}]: {r['status']} ({r['eintraege']} Einträge, {r['sekunden']}s)")
+            results.append(r)
+
+    df = pd.DataFrame(results)
+    log.info(f"OSM Städte: {int((df['status'] == 'ok').sum())}/{len(df)} erfolgreich")
     return df
 
 
+def configured_cities() -> list[str]:
+    """Zusätzliche Städte laut OSM_STAEDTE (ohne CITY – die sammelt collect_osm())."""
+    if not OSM_STAEDTE:
+        return []
+    if OSM_STAEDTE.strip().lower() == "ruhr":
+        cities = RUHR_CITIES
+    else:
+        cities = [c.strip() for c in OSM_STAEDTE.split(",") if c.strip()]
+    return [c for c in cities if c != CITY]
+
+
 # ── 2. Veranstaltungs-Scraper ────────────────────────────────────────────────
 
+# HTML-Auswertung: "lxml" (event_extract, schnell) oder "bs4" (BeautifulSoup, Referenz)
+EVENT_PARSER = os.getenv("EVENT_PARSER", "lxml")
+
+# Strukturierte Daten (JSON-LD/Microdata) ab so vielen Events je Listenseite bevorzugen –
+# ein einzelnes Event-Objekt ist dort oft nur ein Teaser
+STRUCTURED_MIN_EVENTS = 2
+
+# Crawl: Listenseiten weiterblättern + Detailseiten für die Beschreibung
+CRAWL_BUDGET = int(os.getenv("CRAWL_BUDGET", 150))        # Seiten je Lauf über alle Quellen
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", 10))   # Listenseiten je Quelle
+CRAWL_SECONDS = int(os.getenv("CRAWL_SECONDS", 5 * 60))   # Danach startet kein neuer Abruf
+CRAWL_DETAILS = os.getenv("CRAWL_DETAILS", "1") == "1"
+CRAWL_FULL_REFRESH_DAYS = 7                               # Spätestens dann wieder ohne Früh-Stopp
+
 # Mehrere Quellen – wenn eine ausfällt springen die anderen ein
 EVENT_SOURCES = [
     {
@@ -208,120 +575,259 @@ EVENT_SOURCES = [
 ]
 
 
-def scrape_source(source: dict) -> list[dict]:
-    """Scrapt Events von einer einzelnen Quelle."""
-    events  = []
-    headers = {
-        "User-Agent":      "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Accept-Language": "de-DE,de;q=0.9",
-        "Accept":          "text/html,application/xhtml+xml",
-    }
+def _soup_fields(source: dict, html: str) -> list[tuple[str, str, str | None, str | None]]:
+    """(titel, datum, ort, href) je Kandidat über BeautifulSoup (langsamer Weg, Referenz für event_extract)."""
+    soup = BeautifulSoup(html, "html.parser")
 
-    try:
-        resp = requests.get(source["url"], headers=headers, timeout=15)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # Selektoren der Reihe nach versuchen
-        candidates = []
-        for selector in source["selectors"]:
-            candidates = soup.select(selector)
-            if candidates:
-                log.info(f"  [{source['name']}] Selektor '{selector}': {len(candidates)} Treffer")
-                break
-
-        if not candidates:
-            # Fallback: alle <article> oder <li> mit Textinhalt
-            candidates = soup.find_all(["article", "li"], limit=50)
-            candidates = [c for c in candidates if len(c.get_text(strip=True)) > 30]
-            log.info(f"  [{source['name']}] Fallback auf article/li: {len(candidates)} Treffer")
-
-        for item in candidates[:30]:
-            # Titel extrahieren
-            title_el = (
-                item.find(["h2", "h3", "h4"]) or
-                item.find(class_=lambda c: c and any(x in c for x in ["title","titel","name","heading"]))
-            )
-            # Datum extrahieren
-            date_el = (
-                item.find("time") or
-                item.find(class_=lambda c: c and any(x in c for x in ["date","datum","zeit","time"]))
-            )
-            # Ort extrahieren
-            loc_el = item.find(class_=lambda c: c and any(x in c for x in ["location","ort","venue","place"]))
-            # Link extrahieren
-            link_el = item.find("a", href=True)
-
-            titel = (title_el.get_text(strip=True) if title_el else item.get_text(strip=True)[:80]).strip()
-            if not titel or len(titel) < 5:
-                continue
-
-            datum = ""
-            if date_el:
-                datum = date_el.get("datetime", "") or date_el.get_text(strip=True)[:30]
-
-            link = ""
-            if link_el:
-                href = link_el["href"]
-                # Relative URLs zu absoluten machen
-                if href.startswith("/"):
-                    from urllib.parse import urlparse
-                    base = urlparse(source["url"])
-                    link = f"{base.scheme}://{base.netloc}{href}"
-                elif href.startswith("http"):
-                    link = href
-
-            events.append({
-                "datum_abruf": today,
-                "titel":       titel[:200],
-                "datum_event": datum,
-                "ort":         loc_el.get_text(strip=True)[:100] if loc_el else "Castrop-Rauxel",
-                "beschreibung": "",
-                "link":        link,
-                "quelle":      source["name"],
-            })
-
-        log.info(f"  [{source['name']}]: {len(events)} Events extrahiert")
-
-    except requests.exceptions.Timeout:
-        log.warning(f"  [{source['name']}]: Timeout – überspringe")
-    except requests.exceptions.HTTPError as e:
-        log.warning(f"  [{source['name']}]: HTTP {e.response.status_code} – überspringe")
-    except Exception as e:
-        log.warning(f"  [{source['name']}]: Fehler – {e}")
+    # Selektoren der Reihe nach versuchen
+    candidates = []
+    for selector in source["selectors"]:
+        candidates = soup.select(selector)
+        if candidates:
+            log.info(f"  [{source['name']}] Selektor '{selector}': {len(candidates)} Treffer")
+            break
+
+    if not candidates:
+        # Fallback: alle <article> oder <li> mit Textinhalt
+        candidates = soup.find_all(["article", "li"], limit=50)
+        candidates = [c for c in candidates if len(c.get_text(strip=True)) > 30]
+        log.info(f"  [{source['name']}] Fallback auf article/li: {len(candidates)} Treffer")
+
+    out = []
+    for item in candidates[:30]:
+        # Titel extrahieren
+        title_el = (
+            item.find(["h2", "h3", "h4"]) or
+            item.find(class_=lambda c: c and any(x in c for x in ["title","titel","name","heading"]))
+        )
+        # Datum extrahieren
+        date_el = (
+            item.find("time") or
+            item.find(class_=lambda c: c and any(x in c for x in ["date","datum","zeit","time"]))
+        )
+        # Ort extrahieren
+        loc_el = item.find(class_=lambda c: c and any(x in c for x in ["location","ort","venue","place"]))
+        # Link extrahieren
+        link_el = item.find("a", href=True)
+
+        titel = (title_el.get_text(strip=True) if title_el else item.get_text(strip=True)[:80]).strip()
+        datum = ""
+        if date_el:
+            datum = date_el.get("datetime", "") or date_el.get_text(" ", strip=True)[:60]
+        out.append((titel, datum, loc_el.get_text(strip=True)[:100] if loc_el else None,
+                    link_el["href"] if link_el else None))
+    return out
+
+
+def _rows(source: dict, fields: list[tuple]) -> list[dict]:
+    """(titel, datum, ort, href[, beschreibung]) → Event-Zeilen wie in events_<datum>.csv."""
+    events = []
+    for titel, datum, ort, href, *beschreibung in fields:
+        if not titel or len(titel) < 5:
+            continue
+
+        link = ""
+        if href:
+            # Relative URLs zu absoluten machen (Basis ist die jeweilige Listenseite)
+            absolut = urljoin(source["url"], href)
+            if urlparse(absolut).scheme in ("http", "https"):
+                link = absolut
+
+        events.append({
+            "datum_abruf": today,
+            "titel":       titel[:200],
+            "datum_event": datum,
+            "ort":         ort if ort is not None else "Castrop-Rauxel",
+            "beschreibung": beschreibung[0] if beschreibung else "",
+            "link":        link,
+            "quelle":      source["name"],
+        })
 
+    log.info(f"  [{source['name']}]: {len(events)} Events extrahiert")
     return events
 
 
-def scrape_events() -> list[dict]:
-    """Scrapt Veranstaltungen aus allen konfigurierten Quellen."""
-    all_events = []
+def parse_source(source: dict, html: str, parser: str = EVENT_PARSER) -> list[dict]:
+    """Events aus dem HTML einer Quelle (läuft in einem Worker-Prozess der Scrape-Engine)."""
+    if parser == "lxml":
+        fields = event_extract.fields(source, html)
+    else:
+        fields = _soup_fields(source, html)
+    return _rows(source, fields)
 
-    for source in EVENT_SOURCES:
-        log.info(f"Scrape Events: {source['name']}...")
-        events = scrape_source(source)
-        all_events.extend(events)
-        time.sleep(2)  # Höfliche Pause zwischen Quellen
 
-    # Duplikate entfernen (gleicher Titel)
-    seen   = set()
-    unique = []
-    for e in all_events:
-        key = e["titel"].lower()[:50]
-        if key not in seen:
-            seen.add(key)
-            unique.append(e)
+def parse_page(job: dict, html: str, parser: str = EVENT_PARSER) -> dict:
+    """
+    Eine Seite des Crawls (Worker-Prozess):
+    - Listenseite → {"events", "weiter", "ical", "info"}: strukturierte Daten (JSON-LD,
+      Microdata) vor der DOM-Heuristik; info = Plan/Selektoren laut event_extract.extract,
+      None bei strukturierten Daten; ical = angebotener iCal-Feed
+    - iCal-Feed → {"events"} ab heute
+    - Detailseite → {"beschreibung"}
+    """
+    if job["art"] == "detail":
+        return {"beschreibung": event_structured.description(html) or event_extract.description(html)}
+    if job["art"] == "ical":
+        return {"events": _rows(job, event_structured.ics_events(html, since=today))}
+    doc = event_extract.parse(html)
+    fields, art = event_structured.page_events(html, doc)
+    if len(fields) >= STRUCTURED_MIN_EVENTS:
+        log.info(f"  [{job['name']}] {art}: {len(fields)} Events")
+        info = None
+    elif parser == "lxml":
+        fields, info = event_extract.extract(job, doc, plan=job.get("plan"))
+    else:  # Referenzweg ohne Extraktionspläne
+        fields, info = _soup_fields(job, html), None
+    return {"events": _rows(job, fields), "weiter": event_extract.next_page(doc, job["url"]),
+            "ical": event_structured.ical_link(doc, job["url"]), "info": info}
+
+
+def known_descriptions(store_dir: str = event_store.EVENT_STORE_DIR) -> dict[str, str]:
+    """link → beschreibung aller Veranstaltungen im Event-Speicher (beschreibung ggf. leer)."""
+    known = event_store.load_events(store_dir=store_dir, columns=["link", "beschreibung"])
+    known = known[known["link"].fillna("").astype(str) != ""]
+    return dict(zip(known["link"].astype(str), known["beschreibung"].fillna("").astype(str)))
+
+
+def crawl_events(sources: list[dict], known: dict[str, str] | None = None, full: bool = True,
+                 budget: int = CRAWL_BUDGET, max_pages: int = CRAWL_MAX_PAGES,
+                 details: bool = CRAWL_DETAILS, seconds: float = CRAWL_SECONDS,
+                 plans_path: str | None = scrape_plans.PLANS_PATH) -> list[dict]:
+    """
+    Crawlt alle Quellen über die Frontier der Scrape-Engine: Listenseiten bis max_pages
+    je Quelle (vor den Detailseiten), dazu die Detailseite jedes Events ohne Beschreibung.
+    Bietet die erste Listenseite einen iCal-Feed an, kommen die Events der Quelle aus dem
+    Feed (ohne Blättern) – sofern er mindestens so viele Events liefert wie die erste
+    Listenseite (und STRUCTURED_MIN_EVENTS), sonst geht es über die Listenseiten weiter.
+    Höchstens `budget` Seiten und `seconds` Sekunden je Lauf.
+    Ohne `full` wird nicht weitergeblättert, sobald eine Listenseite nur bekannte Events
+    enthält. `known`: link → beschreibung aus dem Event-Speicher.
+    Mit `plans_path` kommt je Quelle zuerst der gespeicherte Extraktionsplan zum Zug,
+    danach wird er fortgeschrieben (scrape_plans); None = ohne Pläne.
+    Reihenfolge: Quelle, Listenseite, Position auf der Seite.
+    """
+    known = known or {}
+    plans = scrape_plans.load(plans_path) if plans_path else {}
+    seeds = [{**source, "art": "liste", "quelle_nr": nr, "seite": 1,
+              "selectors": scrape_plans.ordered(source["selectors"], plans.get(source["name"])),
+              "plan": scrape_plans.active(plans.get(source["name"]), today) if plans_path else None}
+             for nr, source in enumerate(sources)]
+
+    wartend: dict[int, tuple[dict, dict]] = {}  # quelle_nr → erste Listenseite, solange der iCal-Feed läuft
+    feeds: set[int] = set()                     # Quellen, deren Events aus dem iCal-Feed kommen
+
+    def detail_jobs(job: dict, events: list[dict]) -> list[tuple[dict, int]]:
+        if not details:
+            return []
+        return [({"name": job["name"], "url": e["link"], "art": "detail"}, 1)
+                for e in events if e["link"] and not e["beschreibung"] and not known.get(e["link"])]
+
+    def next_pages(job: dict, result: dict) -> list[tuple[dict, int]]:
+        neu = []
+        links = [e["link"] for e in result["events"] if e["link"]]
+        nur_bekannte = bool(links) and all(link in known for link in links)
+        if result["weiter"] and job["seite"] < max_pages:
+            if nur_bekannte and not full:
+                log.info(f"  [{job['name']}] Seite {job['seite']}: nur bekannte Events – nicht weitergeblättert")
+            else:
+                neu.append(({**job, "url": result["weiter"], "seite": job["seite"] + 1}, 0))
+        return neu + detail_jobs(job, result["events"])
+
+    def follow(job: dict, result: dict | None) -> list[tuple[dict, int]]:
+        if job["art"] == "ical":
+            liste = wartend.pop(job["quelle_nr"], None)
+            # Der Feed ersetzt die Listenseiten nur, wenn er mindestens so viel liefert wie Seite 1
+            mindestens = max(STRUCTURED_MIN_EVENTS, len(liste[1]["events"]) if liste else 0)
+            if result and len(result["events"]) >= mindestens:
+                feeds.add(job["quelle_nr"])
+                return detail_jobs(job, result["events"])
+            log.info(f"  [{job['name']}] iCal-Feed mit {len(result['events']) if result else 0} Events "
+                     f"(nötig: {mindestens}) – weiter über die Listenseiten")
+            return next_pages(*liste) if liste else []
+        if job["art"] != "liste" or result is None:
+            return []
+        if result["ical"] and job["seite"] == 1:
+            # Der Feed enthält alle Termine – Blättern nur, wenn er nichts liefert
+            wartend[job["quelle_nr"]] = (job, result)
+            return [({"name": job["name"], "url": result["ical"], "art": "ical",
+                      "quelle_nr": job["quelle_nr"], "seite": 0}, 0)]
+        return next_pages(job, result)
+
+    report = scrape_engine.crawl(seeds, parse_page, follow=follow, budget=budget,
+                                 deadline=time.monotonic() + seconds)
+    # Quellen mit ergiebigem iCal-Feed nur aus dem Feed, alle übrigen aus den Listenseiten
+    listen = sorted((r for r in report if r["job"]["art"] in ("liste", "ical") and r["ergebnis"]
+                     and (r["job"]["art"] == "ical") == (r["job"]["quelle_nr"] in feeds)),
+                    key=lambda r: (r["job"]["quelle_nr"], r["job"]["seite"]))
+    beschreibung = {r["job"]["url"]: r["ergebnis"]["beschreibung"]
+                    for r in report if r["job"]["art"] == "detail" and r["ergebnis"]}
+    events = []
+    for r in listen:
+        for event in r["ergebnis"]["events"]:
+            text = event["beschreibung"] or beschreibung.get(event["link"]) or known.get(event["link"], "")
+            events.append({**event, "beschreibung": text} if event["link"] else event)
+
+    if plans_path:
+        # Je Quelle zählt die erste ausgewertete Listenseite
+        infos = {}
+        for r in listen:
+            if r["job"]["art"] == "liste" and r["ergebnis"]["info"] is not None:
+                infos.setdefault(r["job"]["name"], r["ergebnis"]["info"])
+        for name, info in infos.items():
+            plans[name] = scrape_plans.update(plans.get(name), info, today)
+        if infos:
+            scrape_plans.save(plans, plans_path)
+            scrape_plans.log_summary(infos)
+
+    seiten = sum(r["job"]["art"] == "liste" and r["ergebnis"] is not None for r in report)
+    log.info(f"Crawl: {seiten} Listenseiten, {len(feeds)} iCal-Feeds, {sum(bool(t) for t in beschreibung.values())}/{len(beschreibung)} "
+             f"Detailseiten mit Beschreibung, {len(events)} Events")
+    return events
 
-    log.info(f"Events gesamt: {len(unique)} eindeutige Einträge aus {len(EVENT_SOURCES)} Quellen")
+
+def scrape_source(source: dict) -> list[dict]:
+    """
+    Scrapt Events von einer einzelnen Quelle (alle Listenseiten, mit Beschreibungen) –
+    iCal-Feed, JSON-LD oder Microdata, wenn vorhanden, sonst die DOM-Heuristik.
+    """
+    return crawl_events([source], known=known_descriptions())
+
+
+def scrape_events_from(sources: list[dict]) -> list[dict]:
+    """Nur die erste Listenseite je Quelle – gleichzeitig abrufen (höflich je Host), Quellen-Reihenfolge bleibt."""
+    report = scrape_engine.scrape_all(sources, parse_source)
+    return [event for r in report for event in (r["ergebnis"] or [])]
+
+
+def scrape_events(seconds: float = CRAWL_SECONDS) -> list[dict]:
+    """Scrapt Veranstaltungen aus allen konfigurierten Quellen (Crawl höchstens `seconds`)."""
+    # Alte Tages-CSVs zuerst übernehmen – upsert setzt letzter_abruf danach auf heute
+    event_store.sync_from_csv()
+    stand = event_store.read_stand()
+    voller_crawl = stand.get("voller_crawl", "")
+    # Inkrementell (Stopp bei bekannten Events), alle CRAWL_FULL_REFRESH_DAYS Tage wieder komplett
+    full = not voller_crawl or (date.fromisoformat(today) - date.fromisoformat(voller_crawl)).days >= CRAWL_FULL_REFRESH_DAYS
+    log.info(f"Scrape Events: {len(EVENT_SOURCES)} Quellen gleichzeitig, "
+             f"{'vollständig' if full else 'inkrementell'}, Budget {CRAWL_BUDGET} Seiten...")
+    all_events = crawl_events(EVENT_SOURCES, known=known_descriptions(), full=full, seconds=seconds)
+    if full and all_events:
+        event_store.write_stand({**stand, "voller_crawl": today})
+
+    # Dieselbe Veranstaltung aus mehreren Quellen zusammenführen (ähnlicher Titel + gleicher Termin)
+    unique = event_dedup.dedupe(pd.DataFrame(all_events), reference=pd.Timestamp(today)).to_dict("records")
+
+    log.info(f"Events gesamt: {len(unique)} eindeutige Einträge aus {len(EVENT_SOURCES)} Quellen "
+             f"({len(all_events) - len(unique)} Dubletten zusammengeführt)")
     return unique
 
 
-def collect_events() -> pd.DataFrame:
-    events = scrape_events()
+def collect_events(seconds: float = CRAWL_SECONDS) -> pd.DataFrame:
+    events = scrape_events(seconds)
     df = pd.DataFrame(events)
     path = f"{OUTPUT_DIR}/events_{today}.csv"
     df.to_csv(path, index=False, encoding="utf-8-sig")
     log.info(f"Events gespeichert: {path}")
+    event_store.upsert(df, today)  # Kanonische Tabelle: eine Zeile je Veranstaltung
     return df
 
 
@@ -427,9 +933,21 @@ def generate_summary(df_osm: pd.DataFrame, df_events: pd.DataFrame, df_pop: pd.D
 
 def main():
     log.info(f"Starte Datensammlung für {CITY} – {today}")
-
-    df_osm = collect_osm()
-    df_events = collect_events()
+    overpass.prune_cache()
+    http_cache.prune()
+
+    ende = time.monotonic() + COLLECTOR_BUDGET
+    rest = lambda: ende - time.monotonic() - COLLECTOR_RESERVE  # noqa: E731
+
+    # Castrop-Rauxel zuerst, der Crawl behält seine Zeit – die weiteren Städte bekommen den Rest
+    df_osm = collect_osm(budget=min(OSM_BUDGET, rest() - CRAWL_SECONDS))
+    if configured_cities():
+        shard_budget = min(OSM_SHARD_BUDGET, rest() - CRAWL_SECONDS)
+        if shard_budget >= OSM_SHARD_MIN:
+            collect_osm_shards(configured_cities(), budget=int(shard_budget))
+        else:
+            log.warning(f"OSM: nur noch {max(shard_budget, 0):.0f}s Zeitbudget – weitere Städte diesmal übersprungen")
+    df_events = collect_events(seconds=max(0, min(CRAWL_SECONDS, rest())))
     df_pop = collect_population()
 
     # Google Sheets Upload (wenn konfiguriert)
@@ -438,6 +956,7 @@ def main():
     upload_to_sheets(df_pop, "Bevoelkerung")
 
     generate_summary(df_osm, df_events, df_pop)
+    http_cache.log_stats()
     log.info("Fertig!")
 
 
@@ -84,7 +84,21 @@ function cr_clear_cache(): void {
 // DATEN PARSEN
 // ═══════════════════════════════════════════════════════════════
 
+// output/index.json (loader.py): neueste Datei je Art – eine kleine Datei statt Ordnerliste
+function cr_load_index(): array {
+    static $index = null;
+    if ($index === null) {
+        $body  = cr_fetch('output/index.json');
+        $index = $body ? (json_decode($body, true) ?? []) : [];
+    }
+    return $index;
+}
+
 function cr_latest_file(string $dir, string $prefix, string $ext): ?string {
+    $name = cr_load_index()['dateien'][rtrim($prefix, '_')]['neueste'] ?? null;
+    if ($dir === 'output' && $name && str_ends_with($name, $ext)) return $name;
+
+    // Fallback ohne Index: GitHub-Ordnerliste
     $files = array_filter(cr_list_dir($dir), fn($f) =>
         isset($f['name']) &&
         str_starts_with($f['name'], $prefix) &&
@@ -128,24 +142,9 @@ function cr_load_articles(): array {
 }
 
 function cr_load_osm(): array {
-    $file = cr_latest_file('output', 'osm_', '.csv');
-    if ($file) {
-        $body = cr_fetch("output/{$file}");
-        if ($body) {
-            $rows   = array_map('str_getcsv', explode("\n", trim($body)));
-            $header = array_shift($rows);
-            $cats   = [];
-            foreach ($rows as $row) {
-                if ($header && count($row) >= count($header)) {
-                    $d   = array_combine($header, array_slice($row, 0, count($header)));
-                    $cat = $d['kategorie'] ?? 'Unbekannt';
-                    $cats[$cat] = ($cats[$cat] ?? 0) + 1;
-                }
-            }
-            if ($cats) return $cats;
-        }
-    }
-    return cr_demo_osm();
+    // Anzahl je Kategorie am letzten OSM-Tag (loader.py aus dem OSM-Speicher) – Tages-CSVs gibt es nicht mehr
+    $cats = cr_load_index()['osm_kategorien']['anzahl'] ?? [];
+    return $cats ?: cr_demo_osm();
 }
 
 // ═══════════════════════════════════════════════════════════════
@@ -0,0 +1,106 @@
+"""
+Dashboard-Datenpaket
+=====================
+Kompakte Daten für die Diagramme im HTML-Dashboard (reports/dashboard_data_<datum>.json),
+gezeichnet im Browser statt als PNG von Matplotlib:
+- Zeitreihen delta-kodiert (erster Wert, danach nur Differenzen – meist 0 oder klein)
+- Kategorien und Typen als Wörterbuch + Index
+- Koordinaten auf COORD_STEP gerundet, als ganze Zahlen und nach Breite sortiert delta-kodiert
+
+Viele kleine, sich wiederholende Zahlen – das komprimiert per gzip sehr gut.
+Die Dekodierung im Dashboard ist eine laufende Summe (cumsum).
+
+Voraussetzungen:
+    pip install pandas numpy
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+import event_store
+
+BUNDLE_VERSION = 1
+COORD_STEP = 1e-4  # ≈ 11 m in Breite – für eine Punktkarte der Stadt genau genug
+
+
+def delta(values) -> list[int]:
+    """[a, b, c] → [a, b-a, c-b] (ganzzahlig)."""
+    arr = np.asarray(values, dtype=np.int64)
+    return np.diff(arr, prepend=0).tolist() if arr.size else []
+
+
+def undelta(values) -> list[int]:
+    return np.cumsum(np.asarray(values, dtype=np.int64)).tolist()
+
+
+def _days(dates: pd.Series | pd.Index) -> dict:
+    """Datumsachse als Startdatum + Tagesabstände."""
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    if dates.empty:
+        return {"start": None, "tage": []}
+    offsets = (dates - dates.iloc[0]).dt.days
+    return {"start": dates.iloc[0].strftime("%Y-%m-%d"), "tage": delta(offsets)}
+
+
+def population_series(df_pop: pd.DataFrame) -> dict:
+    if df_pop.empty:
+        return {}
+    df = df_pop.sort_values("jahr")
+    prognose = df.get("prognose", pd.Series(False, index=df.index)).eq(True)
+    return {"jahre": delta(df["jahr"]), "werte": delta(df["bevoelkerung"]),
+            "prognose_ab": int(df.loc[prognose, "jahr"].min()) if prognose.any() else None}
+
+
+def category_series(rollup: pd.DataFrame) -> dict:
+    """Anzahl je Tag und Kategorie aus dem Rollup, eine delta-kodierte Reihe pro Kategorie."""
+    if rollup.empty:
+        return {}
+    ts = rollup.groupby(["datum", "kategorie"], observed=True)["anzahl"].sum().unstack(fill_value=0)
+    return {**_days(ts.index), "kategorien": [str(c) for c in ts.columns],
+            "werte": [delta(ts[c]) for c in ts.columns]}
+
+
+def event_series(df_events: pd.DataFrame) -> dict:
+    """Gelistete und neue Veranstaltungen je Tag (aus first_seen/last_seen des Event-Speichers)."""
+    if df_events.empty:
+        return {}
+    ts = event_store.daily_counts(df_events)
+    return {**_days(ts["datum"]), "werte": delta(ts["gelistet"]), "neu": delta(ts["neu"])}
+
+
+def points(df_osm: pd.DataFrame) -> dict:
+    """Einrichtungen des neuesten Tages als quantisierte Punkte mit Kategorie-Index."""
+    if df_osm.empty:
+        return {}
+    latest = df_osm[(df_osm["datum"] == df_osm["datum"].max()) & df_osm["lat"].notna() & df_osm["lon"].notna()]
+    lat = np.rint(latest["lat"].to_numpy(float) / COORD_STEP).astype(np.int64)
+    lon = np.rint(latest["lon"].to_numpy(float) / COORD_STEP).astype(np.int64)
+    codes, kategorien = pd.factorize(latest["kategorie"].astype(str), sort=True)
+    order = np.lexsort((lon, lat))
+    return {"schritt": COORD_STEP, "kategorien": list(kategorien),
+            "lat": delta(lat[order]), "lon": delta(lon[order]), "kategorie": codes[order].tolist()}
+
+
+def build_bundle(rollup: pd.DataFrame, df_osm: pd.DataFrame, df_events: pd.DataFrame,
+                 df_pop: pd.DataFrame, stand: str) -> dict:
+    return {
+        "version": BUNDLE_VERSION,
+        "stand": stand,
+        "bevoelkerung": population_series(df_pop),
+        "osm_zeitreihe": category_series(rollup),
+        "events": event_series(df_events),
+        "punkte": points(df_osm),
+    }
+
+
+def bundle_path(report_dir: str, datum: str) -> str:
+    return f"{report_dir}/dashboard_data_{datum}.json"
+
+
+def write_bundle(bundle: dict, path: str) -> str:
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+    return path
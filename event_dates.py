@@ -0,0 +1,199 @@
+"""
+Event-Datumsparser
+===================
+Macht aus den Datumsangaben der Veranstaltungsseiten (datum_event, Rohtext)
+echte Zeitstempel – spaltenweise per Regex über alle Zeilen statt Zeile für Zeile:
+
+    "Sa., 14.03.2026, 19:30 Uhr"        → 2026-03-14 19:30
+    "14. März" / "14.-16. März 2026"     → Jahr aus dem Abrufdatum, ggf. Zeitraum
+    "2026-03-14T19:30:00+01:00"          → datetime-Attribut aus <time>
+    "14.03.2026, 19:30 - 22:00 Uhr"      → Beginn und Ende
+
+Ergebnis je Zeile: beginn, ende, ganztags (keine Uhrzeit angegeben) und das erkannte
+Format. Ohne Uhrzeit reicht ende bis zum Tagesende, ohne Endangabe ist ende = beginn.
+Fehlt das Jahr, gilt das Jahr des Abrufs – liegt der Tag mehr als YEAR_ROLLOVER_DAYS
+zurück, das folgende ("10. Januar", gescrapt im Dezember).
+
+Welche Formate eine Quelle verwendet, wird pro Quelle gemerkt: weitere Zeilen dieser
+Quelle werden zuerst nur mit diesen Formaten geprüft, alle anderen erst bei Fehlschlag.
+Formate mit Vorrang (_PRECEDENCE) werden dabei immer mitgeprüft – das Ergebnis hängt
+nicht davon ab, welche Zeilen vorher geparst wurden.
+
+Voraussetzungen:
+    pip install pandas numpy
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+YEAR_ROLLOVER_DAYS = 60
+
+_MONTHS = {
+    "jan": 1, "jän": 1, "feb": 2, "mär": 3, "mae": 3, "mrz": 3, "apr": 4, "mai": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "okt": 10, "oct": 10, "nov": 11, "dez": 12, "dec": 12,
+}
+_MONTH_NAME = (r"(?:jan(?:uar)?|jän(?:ner)?|feb(?:ruar)?|märz?|maerz|mrz|apr(?:il)?|mai|jun[i]?|jul[i]?"
+               r"|aug(?:ust)?|sep(?:t(?:ember)?)?|o[kc]t(?:ober)?|nov(?:ember)?|de[zc](?:ember)?)")
+_DASH = r"\s*(?:-|–|bis)\s*"
+
+# Reihenfolge = Vorrang, wenn mehrere Formate auf denselben Text passen
+FORMATS = {
+    "iso": re.compile(
+        r"(?P<y>\d{4})-(?P<m>\d{2})-(?P<d>\d{2})(?:[t ](?P<h>\d{2}):(?P<mi>\d{2}))?"
+        r"(?:.*?(?P<y2>\d{4})-(?P<m2>\d{2})-(?P<d2>\d{2})(?:[t ](?P<h2>\d{2}):(?P<mi2>\d{2}))?)?"),
+    "tag_bis_tag": re.compile(  # 14.-16.03.2026
+        r"^(?P<vor>.*?)(?<![\d.])(?P<d>\d{1,2})\." + _DASH + r"(?P<d2>\d{1,2})\.\s?(?P<m>\d{1,2})\.(?:\s?(?P<y>\d{4}))?"
+        r"(?P<rest>.*)"),
+    "numerisch": re.compile(  # 14.03.2026 / 14.03. / 14.03.26, optional bis 16.03.2026
+        r"^(?P<vor>.*?)(?<![\d.])(?P<d>\d{1,2})\.\s?(?P<m>\d{1,2})\.(?:\s?(?P<y>\d{4}|\d{2})(?!\d))?"
+        r"(?:" + _DASH + r"(?P<d2>\d{1,2})\.\s?(?P<m2>\d{1,2})\.(?:\s?(?P<y2>\d{4}))?)?"
+        r"(?P<rest>.*)"),
+    "monatsname": re.compile(  # 14. März / 14.-16. März 2026 / 14. März - 2. April
+        r"^(?P<vor>.*?)(?<![\d.])(?P<d>\d{1,2})\.?(?:" + _DASH + r"(?P<d2>\d{1,2})\.?)?\s*(?P<mn>" + _MONTH_NAME + r")\b\.?"
+        r"(?:\s*(?P<y>\d{4}))?"
+        r"(?:" + _DASH + r"(?P<d3>\d{1,2})\.?\s*(?P<mn2>" + _MONTH_NAME + r")\b\.?(?:\s*(?P<y2>\d{4}))?)?"
+        r"(?P<rest>.*)"),
+}
+_TIME = re.compile(
+    r"(?<![\d.:])(?P<h>\d{1,2})[:.](?P<mi>\d{2})(?![.\d])"
+    r"(?:\s*(?:uhr)?" + _DASH + r"(?P<h2>\d{1,2})[:.](?P<mi2>\d{2})(?![.\d]))?")
+_HOUR = re.compile(r"(?<![\d.:])(?P<h>\d{1,2})\s*uhr")
+
+# Quelle → Formate, die dort schon erkannt wurden
+_SOURCE_FORMATS: dict[str, set[str]] = {}
+
+# Formate, die auch auf Texte eines späteren Formats passen und dann Vorrang haben –
+# sie laufen mit, sobald das spätere bekannt ist ("14.-16.03.2026" trifft auch numerisch)
+_PRECEDENCE = {"numerisch": {"tag_bis_tag"}}
+
+RESULT_COLUMNS = ["beginn", "ende", "ganztags", "format"]
+
+
+def _num(col: pd.Series) -> np.ndarray:
+    return pd.to_numeric(col, errors="coerce").to_numpy(float)
+
+
+def _times(rest: pd.Series, vor: pd.Series) -> pd.DataFrame:
+    """Uhrzeit(en) hinter dem Datum, sonst davor ("ab 18 Uhr, 5. Mai")."""
+    found = rest.str.extract(_TIME)
+    for text in (rest, vor):
+        offen = found["h"].isna()
+        if not offen.any():
+            break
+        found.loc[offen, ["h", "mi", "h2", "mi2"]] = text[offen].str.extract(_TIME).to_numpy()
+        offen = found["h"].isna()
+        stunde = text[offen].str.extract(_HOUR)["h"].dropna()
+        found.loc[stunde.index, "h"] = stunde
+        found.loc[stunde.index, "mi"] = "0"
+    return found
+
+
+def _stamp(y, m, d, h=None, mi=None) -> pd.Series:
+    parts = pd.DataFrame({"year": y, "month": m, "day": d,
+                          "hour": 0 if h is None else np.nan_to_num(h),
+                          "minute": 0 if mi is None else np.nan_to_num(mi)})
+    valid = parts[["year", "month", "day"]].notna().all(axis=1).to_numpy()
+    out = pd.Series(pd.NaT, index=range(len(parts)), dtype="datetime64[ns]")
+    if valid.any():
+        out[valid] = pd.to_datetime(parts[valid].astype("int64"), errors="coerce").to_numpy()
+    return out
+
+
+def _convert(found: pd.DataFrame, fmt: str, reference: np.ndarray) -> pd.DataFrame:
+    """Extrahierte Gruppen eines Formats → beginn/ende/ganztags."""
+    col = lambda name: _num(found[name]) if name in found else np.full(len(found), np.nan)  # noqa: E731
+    ref = pd.DatetimeIndex(reference)
+
+    d, d2 = col("d"), col("d2")
+    if fmt == "monatsname":
+        m = found["mn"].str[:3].map(_MONTHS).to_numpy(float)
+        m2 = found["mn2"].str[:3].map(_MONTHS).to_numpy(float)
+        d2 = np.where(np.isnan(col("d3")), d2, col("d3"))
+    else:
+        m, m2 = col("m"), col("m2")
+    m2 = np.where(np.isnan(m2) & ~np.isnan(d2), m, m2)
+
+    y = col("y")
+    y = np.where(y < 100, 2000 + y, y)
+    ohne_jahr = np.isnan(y)
+    y2 = col("y2")
+    if fmt == "tag_bis_tag":
+        m2 = m
+    # "14.03. - 16.03.2026": Jahr steht nur hinter dem zweiten Teil (bei 30.12. - 02.01.2027 das Vorjahr)
+    von_ende = ohne_jahr & ~np.isnan(y2)
+    y = np.where(von_ende, y2 - ((m > m2) | ((m == m2) & (d > d2))), y)
+    ohne_jahr = np.isnan(y)
+    y = np.where(ohne_jahr, ref.year.to_numpy(float), y)
+
+    if fmt == "iso":
+        h, mi, h2, mi2 = col("h"), col("mi"), col("h2"), col("mi2")
+    else:
+        times = _times(found["rest"].fillna(""), found["vor"].fillna(""))
+        h, mi, h2, mi2 = _num(times["h"]), _num(times["mi"]), _num(times["h2"]), _num(times["mi2"])
+
+    beginn = _stamp(y, m, d, h, mi)
+    # Ohne Jahresangabe: weit zurückliegende Tage gehören ins nächste Jahr
+    naechstes = ohne_jahr & (beginn < ref - pd.Timedelta(days=YEAR_ROLLOVER_DAYS)).to_numpy()
+    if naechstes.any():
+        y = np.where(naechstes, y + 1, y)
+        beginn = _stamp(y, m, d, h, mi)
+
+    y2 = np.where(np.isnan(y2), y, y2)
+    ende_tag = _stamp(y2, m2, d2)
+    ende_tag = ende_tag.where(~(ende_tag < beginn.dt.normalize()), ende_tag + pd.DateOffset(years=1))
+    ende_tag = ende_tag.fillna(beginn.dt.normalize())
+    ganztags = np.isnan(h)
+    tagesende = ende_tag + pd.Timedelta(hours=23, minutes=59)
+    mit_endzeit = ende_tag + pd.to_timedelta(np.nan_to_num(h2) * 60 + np.nan_to_num(mi2), unit="min")
+    eintaegig = (ende_tag == beginn.dt.normalize()).to_numpy()
+    ende = pd.Series(np.select([~np.isnan(h2), ganztags | ~eintaegig],
+                               [mit_endzeit.to_numpy(), tagesende.to_numpy()], beginn.to_numpy()))
+    return pd.DataFrame({"beginn": beginn, "ende": ende.where(beginn.notna()), "ganztags": ganztags})
+
+
+def parse(texts, sources=None, reference=None) -> pd.DataFrame:
+    """
+    Datumsangaben spaltenweise parsen. `sources` (gleich lang) aktiviert den Formatcache
+    je Quelle, `reference` (Zeitstempel oder Serie, z.B. Abrufdatum) ergänzt fehlende Jahre.
+    Rückgabe mit demselben Index: beginn, ende, ganztags, format ("" = nicht erkannt).
+    """
+    texts = pd.Series(texts, dtype=object)
+    index = texts.index
+    text = texts.fillna("").astype(str).str.lower().reset_index(drop=True)
+    n = len(text)
+    if reference is None:
+        reference = pd.Timestamp.today().normalize()
+    ref = (pd.to_datetime(pd.Series(reference)).to_numpy() if not np.isscalar(reference) and not isinstance(reference, pd.Timestamp)
+           else np.full(n, pd.Timestamp(reference).to_datetime64()))
+    quellen = (pd.Series(sources, dtype=object).fillna("").astype(str).to_numpy() if sources is not None
+               else np.full(n, "", dtype=object))
+
+    out = pd.DataFrame({"beginn": pd.Series(pd.NaT, index=range(n), dtype="datetime64[ns]"),
+                        "ende": pd.Series(pd.NaT, index=range(n), dtype="datetime64[ns]"),
+                        "ganztags": np.zeros(n, bool), "format": np.full(n, "", dtype=object)})
+    for quelle in pd.unique(quellen):
+        rows = np.flatnonzero(quellen == quelle)
+        bekannt = _SOURCE_FORMATS.setdefault(quelle, set())
+        # Erst die Formate, die diese Quelle schon benutzt hat (samt denen mit Vorrang vor
+        # ihnen), dann alle übrigen – innerhalb jeder Runde gilt die Reihenfolge von FORMATS
+        zuerst = bekannt.union(*(_PRECEDENCE.get(f, ()) for f in bekannt))
+        for runde in (zuerst, set(FORMATS) - zuerst):
+            for fmt in [f for f in FORMATS if f in runde]:
+                if not len(rows):
+                    break
+                found = text.iloc[rows].str.extract(FORMATS[fmt])
+                hit = found["d"].notna().to_numpy()
+                if not hit.any():
+                    continue
+                matched = rows[hit]
+                result = _convert(found[hit].reset_index(drop=True), fmt, ref[matched])
+                ok = result["beginn"].notna().to_numpy()
+                for col in ("beginn", "ende", "ganztags"):
+                    out.loc[matched[ok], col] = result.loc[ok, col].to_numpy()
+                out.loc[matched[ok], "format"] = fmt
+                if ok.any():
+                    bekannt.add(fmt)
+                rows = np.setdiff1d(rows, matched[ok], assume_unique=True)
+    out.index = index
+    return out
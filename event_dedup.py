@@ -0,0 +1,156 @@
+"""
+Event-Dubletten
+================
+Erkennt dieselbe Veranstaltung über Quellen hinweg, auch wenn die Titel leicht
+abweichen ("Tickets!Edelle - a night about Adele" vs. "Edelle – A Night About Adele"):
+
+1. Titel normalisieren, in Zeichen-Shingles (SHINGLE_SIZE) zerlegen
+2. MinHash-Signatur je Titel (NUM_PERM Hashfunktionen, spaltenweise mit numpy)
+3. LSH: Signatur in BANDS Bänder – nur Titel mit einem gemeinsamen Band werden verglichen
+4. Kandidaten bestätigen: geschätzte Ähnlichkeit ≥ SIMILARITY und Beginn höchstens
+   DATE_TOLERANCE auseinander (ohne Datum strenger: ≥ SIMILARITY_UNDATED)
+5. Bestätigte Paare per Union-Find zu Gruppen zusammenfassen
+
+Der Aufwand wächst damit etwa linear mit der Anzahl Events statt quadratisch.
+Pro Gruppe bleibt die erste Zeile (Quellen-Reihenfolge) stehen, leere Felder werden aus
+den anderen ergänzt, und `quellen` listet alle beteiligten Quellen.
+
+Voraussetzungen:
+    pip install pandas numpy
+"""
+
+import zlib
+import numpy as np
+import pandas as pd
+
+import event_dates
+import event_store
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16                     # 16 Bänder × 4 Zeilen → Kandidat ab etwa 50 % Ähnlichkeit
+SIMILARITY = 0.6
+SIMILARITY_UNDATED = 0.8
+DATE_TOLERANCE = pd.Timedelta(hours=3)
+MAX_BUCKET = 32                # Größere LSH-Eimer nur mit Nachbarn vergleichen (bleibt linear)
+QUELLEN_SEP = "; "
+
+_rng = np.random.default_rng(20260301)  # Fester Seed – Signaturen sind zwischen Läufen vergleichbar
+_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_EMPTY = np.uint64(2**32 - 1)
+
+
+def shingles(titel: str) -> list[int]:
+    text = event_store.normalize_title(titel)
+    if len(text) <= SHINGLE_SIZE:
+        return [zlib.crc32(text.encode("utf-8"))] if text else []
+    return list({zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8"))
+                 for i in range(len(text) - SHINGLE_SIZE + 1)})
+
+
+def signatures(titles, chunk: int = 65_536) -> np.ndarray:
+    """MinHash-Signaturen (n × NUM_PERM) per Multiply-Shift-Hashing auf den Shingles."""
+    sets = [shingles(t) for t in titles]
+    lengths = np.fromiter((len(s) for s in sets), dtype=np.int64, count=len(sets))
+    values = np.fromiter((h for s in sets for h in s), dtype=np.uint64, count=int(lengths.sum()))
+    sig = np.full((len(sets), NUM_PERM), _EMPTY, dtype=np.uint64)
+
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    docs = np.flatnonzero(lengths)
+    # Dokumente blockweise, damit die Zwischenmatrix (Shingles × NUM_PERM) klein bleibt
+    i = 0
+    while i < len(docs):
+        j = i
+        while j < len(docs) and starts[docs[j]] + lengths[docs[j]] - starts[docs[i]] <= chunk:
+            j += 1
+        j = max(j, i + 1)
+        lo, hi = starts[docs[i]], starts[docs[j - 1]] + lengths[docs[j - 1]]
+        hashed = (values[lo:hi, None] * _A + _B) >> np.uint64(32)
+        sig[docs[i:j]] = np.minimum.reduceat(hashed, starts[docs[i:j]] - lo, axis=0)
+        i = j
+    return sig
+
+
+def candidate_pairs(sig: np.ndarray) -> np.ndarray:
+    """
+    Paare (i < j), die in mindestens einem LSH-Band übereinstimmen. Innerhalb eines Eimers
+    alle Paare, bei mehr als MAX_BUCKET Einträgen nur direkte Nachbarn.
+    """
+    rows = NUM_PERM // BANDS
+    pairs = []
+    for band in range(BANDS):
+        keys = np.ascontiguousarray(sig[:, band * rows:(band + 1) * rows]).view(f"V{rows * 8}").ravel()
+        order = np.argsort(keys, kind="stable")
+        neu = np.concatenate([[True], keys[order][1:] != keys[order][:-1]])
+        eimer = np.cumsum(neu) - 1
+        anfang = np.flatnonzero(neu)
+        groesse = np.diff(np.append(anfang, len(order)))[eimer]
+        offset = np.arange(len(order)) - anfang[eimer]
+        anzahl = np.where(groesse <= MAX_BUCKET, groesse - 1 - offset, offset < groesse - 1)
+        i = np.repeat(np.arange(len(order)), anzahl)
+        j = i + np.arange(len(i)) - np.repeat(np.cumsum(anzahl) - anzahl, anzahl) + 1
+        pairs.append(np.stack([order[i], order[j]], axis=1))
+    pairs = np.sort(np.concatenate(pairs), axis=1) if pairs else np.empty((0, 2), dtype=np.int64)
+    pairs = pairs[sig[pairs[:, 0], 0] != _EMPTY]  # Leere Titel nie verbinden
+    codes = np.unique(pairs[:, 0] * len(sig) + pairs[:, 1])
+    return np.stack([codes // len(sig), codes % len(sig)], axis=1)
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def clusters(n: int, pairs: np.ndarray) -> np.ndarray:
+    """Union-Find: Gruppen-Nr. je Zeile (= kleinster Zeilenindex der Gruppe)."""
+    parent = np.arange(n)
+    for i, j in pairs:
+        ri, rj = _find(parent, i), _find(parent, j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    return np.array([_find(parent, i) for i in range(n)], dtype=np.int64)
+
+
+def find_duplicates(df: pd.DataFrame, reference=None) -> np.ndarray:
+    """Gruppen-Nr. je Zeile von df (Spalten titel, datum_event, quelle)."""
+    if df.empty:
+        return np.empty(0, dtype=np.int64)
+    sig = signatures(df["titel"].fillna("").astype(str))
+    pairs = candidate_pairs(sig)
+    if len(pairs):
+        aehnlich = (sig[pairs[:, 0]] == sig[pairs[:, 1]]).mean(axis=1)
+        if "beginn" in df.columns:
+            beginn = df["beginn"].to_numpy("datetime64[ns]")
+        else:
+            beginn = event_dates.parse(df["datum_event"], df.get("quelle"), reference)["beginn"].to_numpy()
+        b0, b1 = beginn[pairs[:, 0]], beginn[pairs[:, 1]]
+        datiert = ~np.isnat(b0) & ~np.isnat(b1)
+        nah = datiert & (np.abs(b0 - b1) <= DATE_TOLERANCE.to_timedelta64())
+        ok = np.where(datiert, nah & (aehnlich >= SIMILARITY), aehnlich >= SIMILARITY_UNDATED)
+        pairs = pairs[ok]
+    return clusters(len(df), pairs)
+
+
+def dedupe(df: pd.DataFrame, reference=None) -> pd.DataFrame:
+    """
+    Dubletten zusammenführen: erste Zeile je Gruppe, leere Felder aus den anderen Zeilen
+    ergänzt, `quellen` = alle beteiligten Quellen in Reihenfolge.
+    """
+    if df.empty:
+        return df.assign(quellen=pd.Series(dtype=str))
+    df = df.reset_index(drop=True)
+    gruppe = find_duplicates(df, reference)
+    grouped = df.where(df.ne("")).groupby(gruppe, sort=True)
+    out = grouped.first().reindex(columns=df.columns)
+    text = out.columns[out.dtypes == object]
+    out[text] = out[text].fillna("")
+    # Quellen nur für echte Gruppen zusammensetzen – Einzelzeilen behalten ihre Quelle
+    quellen = pd.DataFrame({"gruppe": gruppe, "quelle": df["quelle"]})
+    quellen = quellen[quellen["quelle"].notna() & quellen["quelle"].ne("")].drop_duplicates()
+    mehrere = quellen[quellen["gruppe"].duplicated(keep=False)]
+    out["quellen"] = out["quelle"]
+    out.loc[mehrere["gruppe"].unique(), "quellen"] = mehrere.groupby("gruppe", sort=True)["quelle"].agg(QUELLEN_SEP.join)
+    return out.reset_index(drop=True)
@@ -0,0 +1,372 @@
+"""
+Event-Extraktion mit lxml
+==========================
+Schneller Weg für collector.parse_source – liefert dieselben Felder wie der
+BeautifulSoup-Weg, nur ohne Python-Baum:
+- HTML wird von libxml2 (lxml) geparst statt von html.parser
+- Die CSS-Selektoren der Quellen werden einmal nach XPath übersetzt und kompiliert
+  (css_to_xpath, unterstützt das, was EVENT_SOURCES benutzt: Tag, .klasse, #id,
+  [attr], [attr=…], [attr*=…], [attr^=…], [attr$=…], Nachfahre, >, Komma)
+- Titel, Datum, Ort und Link werden mit vorkompilierten XPath-Abfragen nur innerhalb
+  der Kandidaten gesucht – eine Abfrage je Feld statt find()-Lambdas über alle Tags
+- Text wie BeautifulSoup.get_text: Kommentare, <script>, <style>, <template>, <rt>/<rp>
+  zählen nicht mit
+- Für den Crawl: next_page() findet die nächste Listenseite, description() den
+  Beschreibungstext einer Detailseite
+- Extraktionspläne (extract/learn): Selektor und Feld-Sub-Selektoren, die bei einer
+  Quelle gewonnen haben – beim nächsten Mal eine gezielte Abfrage statt der Kaskade
+  (gespeichert von scrape_plans)
+
+benchmarks/bench_event_extract.py prüft auf gespeicherten Seiten jeder Quelle,
+dass beide Wege dieselben Events liefern.
+
+Voraussetzungen:
+    pip install lxml
+"""
+
+import re
+import logging
+from functools import lru_cache
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import lxml.etree
+
+MAX_ITEMS = 30
+FALLBACK_LIMIT = 50
+
+log = logging.getLogger(__name__)
+
+# ── CSS → XPath ──────────────────────────────────────────────────────────────
+
+_TOKEN = re.compile(r"""
+    (?P<ws>\s*>\s*|\s+)                                           # Kombinator
+  | (?P<tag>\*|[a-zA-Z][\w-]*)
+  | \.(?P<cls>[\w-]+)
+  | \#(?P<id>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~]?=)\s*(?P<q>['"]?)(?P<val>.*?)(?P=q))?\s*\]
+""", re.X)
+
+
+def _class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _attr(name: str, op: str | None, val: str) -> str:
+    if op is None:
+        return f"@{name}"
+    lit = f"'{val}'" if "'" not in val else f'"{val}"'
+    return {
+        "=":  f"@{name}={lit}",
+        "*=": f"contains(@{name}, {lit})",
+        "^=": f"starts-with(@{name}, {lit})",
+        "$=": f"substring(@{name}, string-length(@{name}) - string-length({lit}) + 1)={lit}",
+        "~=": f"contains(concat(' ', normalize-space(@{name}), ' '), concat(' ', {lit}, ' '))",
+    }[op]
+
+
+def _compound(selector: str) -> str:
+    """Ein einzelner Selektor (ohne Komma) → XPath ab dem Dokument."""
+    path, tag, conds, axis = [], "*", [], "descendant::"
+    pos = 0
+    selector = selector.strip()
+    while pos < len(selector):
+        m = _TOKEN.match(selector, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"CSS-Selektor nicht unterstützt: {selector!r}")
+        pos = m.end()
+        if m["ws"] is not None:
+            path.append(axis + tag + "".join(f"[{c}]" for c in conds))
+            tag, conds = "*", []
+            axis = "child::" if ">" in m["ws"] else "descendant::"
+        elif m["tag"]:
+            tag = m["tag"].lower()
+        elif m["cls"]:
+            conds.append(_class(m["cls"]))
+        elif m["id"]:
+            conds.append(f"@id='{m['id']}'")
+        else:
+            conds.append(_attr(m["attr"], m["op"], m["val"] or ""))
+    path.append(axis + tag + "".join(f"[{c}]" for c in conds))
+    return "/".join(path)
+
+
+def css_to_xpath(selector: str) -> str:
+    """CSS-Selektor (Teilmenge, siehe oben) → XPath; Treffer in Dokumentreihenfolge wie soup.select."""
+    return " | ".join(_compound(part) for part in selector.split(","))
+
+
+@lru_cache(maxsize=256)
+def compiled(selector: str) -> lxml.etree.XPath:
+    return lxml.etree.XPath(css_to_xpath(selector))
+
+
+# ── Felder ───────────────────────────────────────────────────────────────────
+
+def _class_contains(*parts: str) -> str:
+    return " or ".join(f"contains(@class, '{p}')" for p in parts)
+
+
+# Dieselben Regeln wie im BeautifulSoup-Weg, jeweils erster Treffer in Dokumentreihenfolge
+_TITLE = lxml.etree.XPath("descendant::*[self::h2 or self::h3 or self::h4][1]")
+_TITLE_CLASS = lxml.etree.XPath(f"descendant::*[{_class_contains('title', 'titel', 'name', 'heading')}][1]")
+_DATE = lxml.etree.XPath("descendant::time[1]")
+_DATE_CLASS = lxml.etree.XPath(f"descendant::*[{_class_contains('date', 'datum', 'zeit', 'time')}][1]")
+_LOCATION = lxml.etree.XPath(f"descendant::*[{_class_contains('location', 'ort', 'venue', 'place')}][1]")
+_LINK = lxml.etree.XPath("descendant::a[@href][1]")
+_FALLBACK = lxml.etree.XPath(f"(descendant::article | descendant::li)[position() <= {FALLBACK_LIMIT}]")
+# <script>/<style> werden nach dem Parsen entfernt; Texte in <template>/<rt>/<rp> (selten)
+# zählen bei BeautifulSoup ebenfalls nicht – dann der langsamere Weg über XPath
+_HIDDEN = lxml.etree.XPath("boolean(//template | //rt | //rp)")
+_VISIBLE_STRINGS = lxml.etree.XPath(
+    "descendant::text()[not(ancestor::template or ancestor::rt or ancestor::rp)]")
+
+
+def text(el, sep: str = "", hidden: bool = False) -> str:
+    """Wie Tag.get_text(sep, strip=True)."""
+    strings = _VISIBLE_STRINGS(el) if hidden else el.itertext()
+    return sep.join(s for s in (s.strip() for s in strings) if s)
+
+
+def _first(*queries):
+    def find(item):
+        for query in queries:
+            found = query(item)
+            if found:
+                return found[0]
+        return None
+    return find
+
+
+_find_title = _first(_TITLE, _TITLE_CLASS)
+_find_date = _first(_DATE, _DATE_CLASS)
+
+
+def parse(html: str):
+    """HTML → lxml-Dokument ohne <script>/<style> (None bei leerer Seite)."""
+    # Einfache etree-Elemente statt lxml.html-Klassen (deren Klassen-Lookup kostet je Knoten);
+    # Parser-Objekte nicht über Threads teilen
+    parser = lxml.etree.HTMLParser(encoding="utf-8")
+    doc = lxml.etree.fromstring(html.encode("utf-8"), parser=parser)
+    if doc is None:
+        return None
+    lxml.etree.strip_elements(doc, "script", "style", with_tail=False)
+    return doc
+
+
+def _cascade(source: dict, doc, hidden: bool = False) -> tuple[list, str | None, list[str]]:
+    """(Kandidaten, siegreicher Selektor oder None beim Fallback, Selektoren ohne Treffer)."""
+    missed = []
+    for selector in source["selectors"]:
+        found = compiled(selector)(doc)
+        if found:
+            log.info(f"  [{source['name']}] Selektor '{selector}': {len(found)} Treffer")
+            return found, selector, missed
+        missed.append(selector)
+    found = [c for c in _FALLBACK(doc) if len(text(c, hidden=hidden)) > 30]
+    log.info(f"  [{source['name']}] Fallback auf article/li: {len(found)} Treffer")
+    return found, None, missed
+
+
+def candidates(source: dict, doc, hidden: bool = False) -> list:
+    """Erster Selektor der Quelle mit Treffern, sonst <article>/<li> mit genug Text."""
+    return _cascade(source, doc, hidden)[0]
+
+
+FIELDS = ("titel", "datum", "ort", "link")
+_FINDERS = {
+    "titel": _find_title,
+    "datum": _find_date,
+    "ort":   _first(_LOCATION),
+    "link":  _first(_LINK),
+}
+
+
+def _row(item, found: dict, hidden: bool) -> tuple[str, str, str | None, str | None]:
+    title_el, date_el, loc, link = (found[field] for field in FIELDS)
+    titel = (text(title_el, hidden=hidden) if title_el is not None else text(item, hidden=hidden)[:80]).strip()
+    datum = ""
+    if date_el is not None:
+        datum = date_el.get("datetime", "") or text(date_el, " ", hidden)[:60]
+    return (titel, datum, text(loc, hidden=hidden)[:100] if loc is not None else None,
+            link.get("href") if link is not None else None)
+
+
+def fields(source: dict, html: str) -> list[tuple[str, str, str | None, str | None]]:
+    """(titel, datum, ort, href) je Kandidat – ort/href None, wenn nicht gefunden."""
+    return _fields(source, parse(html))
+
+
+def _fields(source: dict, doc) -> list[tuple[str, str, str | None, str | None]]:
+    if doc is None:
+        log.info(f"  [{source['name']}] Fallback auf article/li: 0 Treffer")
+        return []
+    hidden = _HIDDEN(doc)
+    return [_row(item, {field: find(item) for field, find in _FINDERS.items()}, hidden)
+            for item in candidates(source, doc, hidden)[:MAX_ITEMS]]
+
+
+# ── Extraktionspläne ─────────────────────────────────────────────────────────
+# Plan einer Quelle: {"selektor": CSS für die Events, "felder": {feld: CSS relativ zum Event}}.
+# Feld "" = gibt es bei dieser Quelle nicht (keine Abfrage), Feld fehlt = Regeln wie oben.
+# Gelernt wird nur, was auf der Lernseite exakt dieselben Elemente liefert wie die Regeln.
+
+_SIMPLE = re.compile(r"[a-zA-Z][\w-]*")
+
+
+def _sub_selectors(el) -> list[str]:
+    """Kandidaten für ein gefundenes Element, spezifischste zuerst: tag.klasse, dann tag."""
+    tag = el.tag if isinstance(el.tag, str) and _SIMPLE.fullmatch(el.tag) else "*"
+    attr = "[href]" if tag == "a" else ""
+    classes = [c for c in (el.get("class") or "").split() if _SIMPLE.fullmatch(c)]
+    return [f"{tag}.{c}{attr}" for c in classes] + ([f"{tag}{attr}"] if tag != "*" else [])
+
+
+def _hit(query, item):
+    found = query(item)
+    return found[0] if found else None
+
+
+def _derive_selector(doc, items: list) -> str | None:
+    """Selektor, der genau die Kandidaten des article/li-Fallbacks liefert (oder None)."""
+    own = _sub_selectors(items[0])
+    parent = items[0].getparent()
+    outer = []
+    if parent is not None:
+        if parent.get("id") and _SIMPLE.fullmatch(parent.get("id")):
+            outer.append(f"#{parent.get('id')}")
+        outer += _sub_selectors(parent)
+    for selector in own + [f"{p} > {c}" for p in outer for c in own]:
+        hits = compiled(selector)(doc)[:MAX_ITEMS]
+        if len(hits) == len(items) and all(a is b for a, b in zip(hits, items)):
+            return selector
+    return None
+
+
+def learn(doc, selector: str | None, items: list, found: list[dict]) -> dict | None:
+    """Plan aus einem Lauf über die Regeln: items[:MAX_ITEMS] und die je Feld gefundenen Elemente."""
+    if not items:
+        return None
+    selector = selector or _derive_selector(doc, items)
+    if selector is None:
+        return None
+    felder = {}
+    for field in FIELDS:
+        els = [f[field] for f in found]
+        sample = next((el for el in els if el is not None), None)
+        if sample is None:
+            felder[field] = ""
+            continue
+        for sub in _sub_selectors(sample):
+            query = compiled(sub)
+            if all(_hit(query, item) is el for item, el in zip(items, els)):
+                felder[field] = sub
+                break
+    return {"selektor": selector, "felder": felder}
+
+
+def _planned(item, sub: str | None, find):
+    if sub == "":
+        return None
+    if sub is None:
+        return find(item)
+    hit = _hit(compiled(sub), item)
+    return hit if hit is not None else find(item)  # Ausreißer: Regeln für dieses Event
+
+
+def extract(source: dict, doc, plan: dict | None = None) -> tuple[list[tuple], dict]:
+    """
+    Wie _fields, aber zuerst mit dem Plan der Quelle: eine Abfrage für die Events, je Feld
+    eine gezielte Abfrage statt der Regel-Kaskade. Trifft der Plan nichts, laufen die
+    Selektoren der Reihe nach (Reihenfolge bestimmt der Aufrufer).
+    Rückgabe (fields, info) mit info = {"modus": "plan" | "kaskade", "selektor",
+    "verfehlt": Selektoren ohne Treffer, "plan": bestätigter bzw. neu gelernter Plan oder None}.
+    """
+    if doc is None:
+        log.info(f"  [{source['name']}] Fallback auf article/li: 0 Treffer")
+        return [], {"modus": "kaskade", "selektor": None, "verfehlt": [], "plan": None}
+    hidden = _HIDDEN(doc)
+    verfehlt = []
+    if plan and plan.get("selektor"):
+        items = compiled(plan["selektor"])(doc)
+        if items:
+            log.info(f"  [{source['name']}] Plan '{plan['selektor']}': {len(items)} Treffer")
+            felder = plan.get("felder", {})
+            rows = [_row(item, {field: _planned(item, felder.get(field), find) for field, find in _FINDERS.items()},
+                         hidden) for item in items[:MAX_ITEMS]]
+            return rows, {"modus": "plan", "selektor": plan["selektor"], "verfehlt": [], "plan": plan}
+        log.info(f"  [{source['name']}] Plan '{plan['selektor']}' ohne Treffer – Selektoren der Reihe nach")
+        verfehlt.append(plan["selektor"])
+    items, selector, missed = _cascade(source, doc, hidden)
+    items = items[:MAX_ITEMS]
+    found = [{field: find(item) for field, find in _FINDERS.items()} for item in items]
+    verfehlt += [s for s in missed if s not in verfehlt]
+    return ([_row(item, f, hidden) for item, f in zip(items, found)],
+            {"modus": "kaskade", "selektor": selector, "verfehlt": verfehlt,
+             "plan": learn(doc, selector, items, found)})
+
+
+# ── Blättern und Detailseiten ────────────────────────────────────────────────
+
+DESCRIPTION_CHARS = 500
+
+# Nächste Listenseite: rel="next", sonst Link mit next/weiter in der Klasse, sonst Linktext
+_NEXT_REL = lxml.etree.XPath(
+    "//link[@rel='next']/@href | //a[@href][contains(concat(' ', normalize-space(@rel), ' '), ' next ')]/@href")
+_NEXT_CLASS = lxml.etree.XPath(f"//a[@href][{_class_contains('next', 'weiter')}]/@href")
+_LINKS = lxml.etree.XPath("//a[@href]")
+_NEXT_TEXT = re.compile(r"^(weiter|nächste|next|mehr (events|termine|veranstaltungen))\b|^[»›>]+$", re.I)
+
+# Beschreibung auf der Detailseite, in dieser Reihenfolge
+_DESCRIPTION = [
+    lxml.etree.XPath("//*[@itemprop='description']"),
+    lxml.etree.XPath(f"//*[{_class_contains('description', 'beschreibung', 'event-content', 'entry-content')}]"),
+]
+_META_DESCRIPTION = lxml.etree.XPath("//meta[@property='og:description' or @name='description']/@content")
+_PARAGRAPHS = lxml.etree.XPath("//main//p | //article//p")
+
+
+def _same_site(url: str, base: str) -> bool:
+    return urlsplit(url).scheme in ("http", "https") and urlsplit(url).netloc == urlsplit(base).netloc
+
+
+def next_page(doc, url: str) -> str | None:
+    """Absolute URL der nächsten Listenseite (gleicher Host, nicht die Seite selbst) oder None."""
+    if doc is None:
+        return None
+    current = urldefrag(url).url
+    hrefs = _NEXT_REL(doc) or _NEXT_CLASS(doc) or [
+        a.get("href") for a in _LINKS(doc) if _NEXT_TEXT.match(text(a, " "))]
+    for href in hrefs:
+        target = urldefrag(urljoin(url, href.strip())).url
+        if target != current and _same_site(target, url):
+            return target
+    return None
+
+
+def _clean(value: str, limit: int) -> str:
+    return " ".join(value.split())[:limit]
+
+
+def description(html: str, limit: int = DESCRIPTION_CHARS) -> str:
+    """
+    Beschreibungstext einer Event-Detailseite: itemprop="description", Element mit
+    description/beschreibung in der Klasse, og:/meta description, sonst die ersten Absätze
+    im Hauptinhalt – leer, wenn nichts davon passt.
+    """
+    doc = parse(html)
+    if doc is None:
+        return ""
+    hidden = _HIDDEN(doc)
+    for query in _DESCRIPTION:
+        for el in query(doc):
+            if el.tag == "meta":
+                value = el.get("content", "")
+            else:
+                value = text(el, " ", hidden)
+            if len(value) >= 40:  # Kurze Treffer sind meist Slogans im Seitenkopf
+                return _clean(value, limit)
+    meta = [m for m in _META_DESCRIPTION(doc) if m.strip()]
+    if meta:
+        return _clean(meta[0], limit)
+    absaetze = [t for t in (text(p, " ", hidden) for p in _PARAGRAPHS(doc)) if len(t) >= 40]
+    return _clean(" ".join(absaetze), limit)
@@ -0,0 +1,257 @@
+"""
+Event-Speicher
+===============
+Eine Zeile pro Veranstaltung statt einer Zeile pro Veranstaltung und Abruftag:
+- Stabile event_id aus normalisiertem Titel, Datum und Quelle
+- first_seen / last_seen: wann die Veranstaltung zuerst bzw. zuletzt gescrapt wurde
+- beginn / ende als Zeitstempel (event_dates), Tabelle danach sortiert – "die nächsten
+  7 Tage" liest per Parquet-Filter nur die passenden Zeilengruppen
+- Tägliche Scrapes werden eingepflegt (upsert) – die Tabelle wächst mit echten
+  Veranstaltungen, nicht mit Tagen × Veranstaltungen
+
+Aufbau von output/event_store/:
+    events.parquet   ← kanonische Tabelle (eine Zeile je event_id)
+    stand.json       ← letzter übernommener Abruftag
+
+Die Tages-CSVs (output/events_<datum>.csv) bleiben wie beim OSM-Speicher die
+Austauschquelle für Google Sheets – der Speicher wird aus ihnen nachgefüllt.
+
+Voraussetzungen:
+    pip install pandas pyarrow
+"""
+
+import os
+import re
+import glob
+import json
+import hashlib
+import logging
+import unicodedata
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import event_dates
+
+OUTPUT_DIR = "output"
+EVENT_STORE_DIR = f"{OUTPUT_DIR}/event_store"
+
+log = logging.getLogger(__name__)
+
+# ── Schema ───────────────────────────────────────────────────────────────────
+
+VALUE_COLUMNS = ["titel", "datum_event", "ort", "beschreibung", "link", "quelle", "quellen"]
+DATE_COLUMNS = ["beginn", "ende", "ganztags"]
+EVENT_COLUMNS = ["event_id", *VALUE_COLUMNS, *DATE_COLUMNS, "first_seen", "last_seen", "abrufe"]
+
+SCHEMA = pa.schema([
+    ("event_id",     pa.string()),
+    ("titel",        pa.string()),
+    ("datum_event",  pa.string()),
+    ("ort",          pa.string()),
+    ("beschreibung", pa.string()),
+    ("link",         pa.string()),
+    ("quelle",       pa.dictionary(pa.int32(), pa.string())),
+    ("quellen",      pa.string()),      # Alle Quellen, die die Veranstaltung listen (event_dedup)
+    ("beginn",       pa.timestamp("ms")),
+    ("ende",         pa.timestamp("ms")),
+    ("ganztags",     pa.bool_()),       # Keine Uhrzeit angegeben
+    ("first_seen",   pa.date32()),
+    ("last_seen",    pa.date32()),
+    ("abrufe",       pa.int32()),   # An wie vielen Tagen gescrapt
+])
+
+# ── Schlüssel ────────────────────────────────────────────────────────────────
+
+def normalize_title(titel: str) -> str:
+    """Groß-/Kleinschreibung, Akzent-Varianten, Satzzeichen und Leerraum vereinheitlichen."""
+    text = unicodedata.normalize("NFKC", str(titel)).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def event_id(titel: str, tag: str, quelle: str) -> str:
+    """tag: Veranstaltungstag als YYYY-MM-DD, wenn erkennbar – sonst der normalisierte Datumstext."""
+    key = "\x1f".join([normalize_title(titel), tag, str(quelle or "")])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def with_ids(df: pd.DataFrame, reference) -> pd.DataFrame:
+    """
+    Scrape-Frame (wie events_<datum>.csv) mit geparstem beginn/ende und event_id,
+    fehlende Spalten leer. `reference` = Abrufdatum (für Angaben ohne Jahr).
+    """
+    out = pd.DataFrame({col: df[col].fillna("").astype(str) if col in df.columns else ""
+                        for col in VALUE_COLUMNS}, index=df.index)
+    out["quellen"] = out["quellen"].where(out["quellen"] != "", out["quelle"])  # CSVs von vor event_dedup
+    dates = event_dates.parse(out["datum_event"], out["quelle"], reference)
+    out[DATE_COLUMNS] = dates[DATE_COLUMNS]
+    tage = dates["beginn"].dt.strftime("%Y-%m-%d").where(dates["beginn"].notna(),
+                                                         out["datum_event"].map(normalize_title))
+    out.insert(0, "event_id", [event_id(t, d, q) for t, d, q in zip(out["titel"], tage, out["quelle"])])
+    return out
+
+
+# ── Lesen / Schreiben ────────────────────────────────────────────────────────
+
+def _path(store_dir: str) -> str:
+    return f"{store_dir}/events.parquet"
+
+
+def load_events(start=None, end=None, store_dir: str = EVENT_STORE_DIR,
+                columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Kanonische Tabelle, optional nur Veranstaltungen, die in [start, end] stattfinden
+    (beginn ≤ end und ende ≥ start). Die Tabelle ist nach beginn sortiert, der Filter
+    greift daher schon auf Ebene der Parquet-Zeilengruppen. `columns` liest nur diese Spalten.
+    """
+    path = _path(store_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns or EVENT_COLUMNS)
+    filters = []
+    if end is not None:
+        filters.append(("beginn", "<=", pd.Timestamp(end)))
+    if start is not None:
+        filters.append(("ende", ">=", pd.Timestamp(start)))
+    if "beginn" not in pq.read_schema(path).names:  # Speicher von vor event_dates: einmal nachrechnen
+        df = _with_dates(pq.read_table(path).to_pandas(date_as_object=False))
+        keep = pd.Series(True, index=df.index)
+        if end is not None:
+            keep &= df["beginn"] <= pd.Timestamp(end)
+        if start is not None:
+            keep &= df["ende"] >= pd.Timestamp(start)
+        df = df[keep].reset_index(drop=True)
+    else:
+        vorhanden = pq.read_schema(path).names
+        lesen = None if columns is None else [c for c in columns if c in vorhanden]
+        if lesen is not None and "quellen" in columns and "quellen" not in vorhanden:
+            lesen.append("quelle")
+        df = pq.read_table(path, columns=lesen, filters=filters or None).to_pandas(date_as_object=False)
+    if "quellen" not in df.columns and "quelle" in df.columns:
+        df.insert(df.columns.get_loc("quelle") + 1, "quellen", df["quelle"].astype(str))
+    for col in ("first_seen", "last_seen", "beginn", "ende"):
+        if col in df.columns:
+            df[col] = df[col].astype("datetime64[ns]")
+    if "abrufe" in df.columns:
+        df["abrufe"] = df["abrufe"].astype("int64")
+    return df if columns is None else df[columns]
+
+
+def _with_dates(df: pd.DataFrame) -> pd.DataFrame:
+    dates = event_dates.parse(df["datum_event"], df["quelle"].astype(str), df["first_seen"])
+    df[DATE_COLUMNS] = dates[DATE_COLUMNS]
+    return _sorted(df)
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["beginn", "event_id"], kind="stable", na_position="last", ignore_index=True)
+
+
+def upcoming(days: int = 7, now=None, store_dir: str = EVENT_STORE_DIR) -> pd.DataFrame:
+    """Veranstaltungen, die in den nächsten `days` Tagen (ab jetzt) stattfinden."""
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    return load_events(now, now.normalize() + pd.Timedelta(days=days), store_dir)
+
+
+def _write(df: pd.DataFrame, store_dir: str):
+    os.makedirs(store_dir, exist_ok=True)
+    path = _path(store_dir)
+    table = pa.Table.from_pandas(df[EVENT_COLUMNS], schema=SCHEMA, preserve_index=False)
+    pq.write_table(table, f"{path}.tmp", compression="zstd")
+    os.replace(f"{path}.tmp", path)
+
+
+def read_stand(store_dir: str = EVENT_STORE_DIR) -> dict:
+    try:
+        with open(f"{store_dir}/stand.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_stand(stand: dict, store_dir: str = EVENT_STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    path = f"{store_dir}/stand.json"
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(stand, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+# ── Einpflegen ───────────────────────────────────────────────────────────────
+
+def merge(store: pd.DataFrame, scrape: pd.DataFrame, datum: str) -> pd.DataFrame:
+    """
+    Scrape eines Tages in die kanonische Tabelle übernehmen: bekannte event_ids bekommen
+    last_seen = datum und die Felder des neuesten Abrufs, neue kommen mit first_seen = datum dazu.
+    """
+    tag = pd.Timestamp(datum)
+    neu = with_ids(scrape, tag).drop_duplicates("event_id", keep="first")
+    neu = neu.assign(first_seen=tag, last_seen=tag, abrufe=1)
+    if store.empty:
+        merged = neu
+    else:
+        # Denselben Tag zweimal einpflegen zählt nur einmal als Abruf
+        neu.loc[neu["event_id"].isin(store.loc[store["last_seen"] == tag, "event_id"]), "abrufe"] = 0
+        combined = pd.concat([store.astype({"quelle": str}), neu], ignore_index=True)
+        grouped = combined.groupby("event_id", sort=False)
+        # Felder vom neuesten Abruf (bei Gleichstand der Scrape), Zeitraum und Anzahl über alle Abrufe
+        merged = (combined.sort_values("last_seen", kind="stable")
+                          .drop_duplicates("event_id", keep="last").set_index("event_id"))
+        merged["first_seen"] = grouped["first_seen"].min()
+        merged["abrufe"] = grouped["abrufe"].sum()
+        merged = merged.reset_index()
+    return _sorted(merged[EVENT_COLUMNS])
+
+
+def upsert(scrape: pd.DataFrame, datum: str, store_dir: str = EVENT_STORE_DIR) -> pd.DataFrame:
+    """Scrape eines Tages einpflegen und die aktualisierte Tabelle zurückgeben."""
+    store = load_events(store_dir=store_dir)
+    if scrape.empty:
+        return store
+    merged = merge(store, scrape, datum)
+    _write(merged, store_dir)
+    stand = read_stand(store_dir)
+    write_stand({**stand, "letzter_abruf": max(datum, stand.get("letzter_abruf", ""))}, store_dir)
+    log.info(f"Event-Speicher: {len(merged) - len(store)} neu, {len(merged)} Veranstaltungen gesamt")
+    return merged
+
+
+def sync_from_csv(csv_dir: str = OUTPUT_DIR, store_dir: str = EVENT_STORE_DIR) -> int:
+    """
+    Übernimmt alle events_<datum>.csv nach dem letzten übernommenen Tag.
+    Beim ersten Lauf wird die komplette Historie einmalig eingepflegt.
+    Muss vor dem ersten upsert laufen (collector.scrape_events): ältere Tage als
+    letzter_abruf werden übersprungen.
+    """
+    letzter = read_stand(store_dir).get("letzter_abruf", "")
+    store = load_events(store_dir=store_dir)
+    neu = 0
+    for path in sorted(glob.glob(f"{csv_dir}/events_*.csv")):
+        datum = os.path.basename(path)[len("events_"):-len(".csv")]
+        if datum <= letzter:
+            continue
+        try:
+            df = pd.read_csv(path, dtype=str, encoding="utf-8-sig", keep_default_na=False)
+        except pd.errors.EmptyDataError:
+            continue
+        if not df.empty and "titel" in df.columns:
+            store = merge(store, df, datum)
+            neu += 1
+        letzter = datum
+    if neu:
+        _write(store, store_dir)
+        write_stand({**read_stand(store_dir), "letzter_abruf": letzter}, store_dir)
+        log.info(f"Event-Speicher: {neu} Tages-CSVs übernommen, {len(store)} Veranstaltungen")
+    return neu
+
+
+def daily_counts(events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Je Tag: wie viele Veranstaltungen gelistet waren (first_seen ≤ Tag ≤ last_seen)
+    und wie viele an dem Tag neu aufgetaucht sind.
+    """
+    if events.empty:
+        return pd.DataFrame(columns=["datum", "gelistet", "neu"])
+    tage = pd.date_range(events["first_seen"].min(), events["last_seen"].max(), freq="D")
+    neu = events.groupby("first_seen").size().reindex(tage, fill_value=0)
+    weg = events.groupby(events["last_seen"] + pd.Timedelta(days=1)).size().reindex(tage, fill_value=0)
+    return pd.DataFrame({"datum": tage, "gelistet": (neu - weg).cumsum().to_numpy(), "neu": neu.to_numpy()})
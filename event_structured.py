@@ -0,0 +1,309 @@
+"""
+Strukturierte Event-Daten
+==========================
+Viele Veranstaltungsseiten liefern ihre Termine zusätzlich maschinenlesbar – das ist
+billiger und genauer als die DOM-Heuristik in event_extract:
+- JSON-LD (schema.org Event, auch in @graph, Listen und ItemList): die
+  <script type="application/ld+json">-Blöcke werden per Regex aus dem HTML geschnitten
+  und mit json geladen – ganz ohne DOM-Baum
+- Microdata (itemscope itemtype=".../Event") im ohnehin geparsten lxml-Dokument
+- iCal-Feeds (<link rel="alternate" type="text/calendar"> – einzelne .ics-Links wie
+  "In Kalender eintragen" gehören zu einem Termin, nicht zum Kalender): der Feed
+  wird wie jede Seite komplett über http_cache geladen (der Cache braucht den Body),
+  ausgewertet wird er Zeile für Zeile ohne Zwischenstruktur für alle VEVENTs –
+  iter_ics nimmt auch einen Datei-/Stream-Iterator
+
+Alle liefern dieselben Tupel wie event_extract.fields, ergänzt um die Beschreibung:
+(titel, datum, ort, href, beschreibung) – ort/href None, wenn nicht angegeben.
+datum ist ISO ("2026-03-14T19:30:00+01:00", mit Ende "… – …"), das versteht event_dates.
+
+Voraussetzungen:
+    pip install lxml
+"""
+
+import io
+import re
+import json
+import html
+import logging
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urljoin
+from zoneinfo import ZoneInfo
+
+import lxml.etree
+
+import event_extract
+
+DESCRIPTION_CHARS = event_extract.DESCRIPTION_CHARS
+ICAL_MAX_EVENTS = 500           # Mehr Termine liest niemand aus einem Feed
+ICAL_TIMEZONE = "Europe/Berlin"  # UTC-Zeiten (…Z) werden in Ortszeit umgerechnet
+
+log = logging.getLogger(__name__)
+
+Row = tuple[str, str, str | None, str | None, str]
+
+
+def _is_event(types) -> bool:
+    types = types if isinstance(types, list) else str(types or "").split()
+    return any(isinstance(t, str) and t.rsplit("/", 1)[-1].endswith("Event") for t in types)
+
+
+def _clean(value: str, limit: int | None = None) -> str:
+    """HTML-Tags und Entities raus, Leerraum zusammenfassen."""
+    value = html.unescape(re.sub(r"<[^>]+>", " ", value))
+    value = " ".join(value.split())
+    return value[:limit] if limit else value
+
+
+def _when(start: str, end: str) -> str:
+    return f"{start} – {end}" if start and end and end != start else start
+
+
+# ── JSON-LD ──────────────────────────────────────────────────────────────────
+
+_JSONLD = re.compile(
+    r"<script\b[^>]*\btype\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>", re.I | re.S)
+
+
+def _jsonld_objects(page: str):
+    for block in _JSONLD.findall(page):
+        block = block.strip()
+        if block.startswith("<!--"):
+            block = block[4:].rsplit("-->", 1)[0]
+        try:
+            yield json.loads(block)
+        except ValueError:
+            continue  # Kaputte Blöcke gibt es öfter – die übrigen zählen trotzdem
+
+
+def _walk(node):
+    """Alle Event-Objekte in Dokumentreihenfolge (Events selbst werden nicht weiter durchsucht)."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, list):
+            stack.extend(reversed(current))
+        elif isinstance(current, dict):
+            if _is_event(current.get("@type")):
+                yield current
+            else:
+                stack.extend(reversed([v for v in current.values() if isinstance(v, (list, dict))]))
+
+
+def _ld_text(value) -> str:
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("@value") or value.get("@id") or ""
+    return _clean(str(value)) if value is not None else ""
+
+
+def _ld_place(value) -> str | None:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        if value.get("name"):
+            return _ld_text(value["name"])
+        address = value.get("address")
+        if isinstance(address, dict):
+            address = " ".join(str(address[k]) for k in ("streetAddress", "addressLocality") if address.get(k))
+        return _ld_text(address) or None
+    return _ld_text(value) or None
+
+
+def jsonld(page: str) -> list[Row]:
+    """Events aus den JSON-LD-Blöcken einer Seite – ohne das HTML zu parsen."""
+    out = []
+    for obj in _jsonld_objects(page):
+        for event in _walk(obj):
+            titel = _ld_text(event.get("name"))
+            if not titel:
+                continue
+            url = event.get("url") or event.get("@id")
+            out.append((titel, _when(_ld_text(event.get("startDate")), _ld_text(event.get("endDate"))),
+                        _ld_place(event.get("location")), _ld_text(url) or None,
+                        _clean(_ld_text(event.get("description")), DESCRIPTION_CHARS)))
+    return out
+
+
+def description(page: str) -> str:
+    """Beschreibung aus dem ersten JSON-LD-Event einer Detailseite ("" ohne)."""
+    return next((row[4] for row in jsonld(page) if row[4]), "")
+
+
+# ── Microdata ────────────────────────────────────────────────────────────────
+
+_MICRODATA = lxml.etree.XPath(
+    "//*[@itemscope][contains(@itemtype, 'Event')][not(ancestor::*[@itemscope][contains(@itemtype, 'Event')])]")
+_URL_ATTRS = {"a": "href", "link": "href", "area": "href", "img": "src", "audio": "src", "video": "src",
+              "source": "src", "iframe": "src", "embed": "src", "object": "data"}
+
+
+def _props(scope) -> dict:
+    """Erste Eigenschaft je itemprop-Name – verschachtelte itemscopes gehören ihrem eigenen Item."""
+    out = {}
+    stack = list(reversed(scope))
+    while stack:
+        el = stack.pop()
+        if not isinstance(el.tag, str):
+            continue
+        for name in (el.get("itemprop") or "").split():
+            out.setdefault(name, el)
+        if el.get("itemscope") is None:
+            stack.extend(reversed(el))
+    return out
+
+
+def _md_value(el) -> str:
+    if el.get("itemscope") is not None:
+        nested = _props(el)
+        if "name" in nested:
+            return _md_value(nested["name"])
+    tag = el.tag.lower()
+    if tag == "meta":
+        return el.get("content", "").strip()
+    if tag in _URL_ATTRS:
+        return (el.get(_URL_ATTRS[tag]) or "").strip()
+    if tag == "time" and el.get("datetime"):
+        return el.get("datetime").strip()
+    if tag in ("data", "meter") and el.get("value"):
+        return el.get("value").strip()
+    return " ".join(event_extract.text(el, " ").split())
+
+
+def microdata(doc) -> list[Row]:
+    """Events aus Microdata-Items (schema.org/…Event) eines lxml-Dokuments."""
+    if doc is None:
+        return []
+    out = []
+    for scope in _MICRODATA(doc):
+        if not _is_event(scope.get("itemtype")):
+            continue
+        props = _props(scope)
+        titel = _md_value(props["name"]) if "name" in props else ""
+        if not titel:
+            continue
+        get = lambda name: _md_value(props[name]) if name in props else ""  # noqa: E731
+        out.append((titel, _when(get("startDate"), get("endDate")), get("location") or None,
+                    get("url") or None, _clean(get("description"), DESCRIPTION_CHARS)))
+    return out
+
+
+def page_events(page: str, doc) -> tuple[list[Row], str | None]:
+    """JSON-LD, sonst Microdata: (Events, "json-ld" | "microdata" | None)."""
+    rows = jsonld(page)
+    if rows:
+        return rows, "json-ld"
+    rows = microdata(doc)
+    return (rows, "microdata") if rows else ([], None)
+
+
+# ── iCal ─────────────────────────────────────────────────────────────────────
+
+_ICAL_LINKS = lxml.etree.XPath("//link[@rel='alternate'][@type='text/calendar']/@href")
+
+
+def ical_link(doc, url: str) -> str | None:
+    """
+    Absolute URL des iCal-Feeds, den eine Seite im Kopf anbietet (oder None). <a>-Links
+    auf .ics zählen nicht – meist ist das "In Kalender eintragen" für einen einzelnen Termin.
+    """
+    if doc is None:
+        return None
+    hrefs = _ICAL_LINKS(doc)
+    if not hrefs:
+        return None
+    target = urljoin(url, hrefs[0].strip())
+    return target if target.startswith(("http://", "https://")) else None
+
+
+def _unfold(lines):
+    """Gefaltete Zeilen (Fortsetzung beginnt mit Leerzeichen/Tab) wieder zusammensetzen."""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def _split(line: str) -> tuple[str, dict, str]:
+    """'DTSTART;TZID=Europe/Berlin:20260314T193000' → ("DTSTART", {"TZID": …}, "2026…")."""
+    quoted, cut = False, len(line)
+    for i, ch in enumerate(line):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ":" and not quoted:
+            cut = i
+            break
+    head, value = line[:cut], line[cut + 1:]
+    name, *params = head.split(";")
+    return name.upper(), dict(p.split("=", 1) for p in params if "=" in p), value
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: " " if m[1] in "nN" else m[1], value)
+
+
+def _ics_date(value: str, params: dict) -> str:
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return f"{value[:4]}-{value[4:6]}-{value[6:8]}" if len(value) >= 8 else ""
+    try:
+        if value.endswith("Z"):
+            dt = datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            return dt.astimezone(ZoneInfo(ICAL_TIMEZONE)).strftime("%Y-%m-%dT%H:%M:%S")
+        return datetime.strptime(value[:15], "%Y%m%dT%H%M%S").strftime("%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return ""
+
+
+def iter_ics(lines):
+    """VEVENTs eines Feeds als Row, Zeile für Zeile – lines darf ein Datei-/Stream-Iterator sein."""
+    props, depth = None, 0
+    for line in _unfold(lines):
+        name, params, value = _split(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and props is None:
+                props, depth = {}, 0
+            elif props is not None:
+                depth += 1  # VALARM o.ä. im Event
+            continue
+        if name == "END" and props is not None:
+            if depth:
+                depth -= 1
+                continue
+            titel = _clean(_unescape(props.get("SUMMARY", ({}, ""))[1]))
+            if titel:
+                start = _ics_date(props["DTSTART"][1], props["DTSTART"][0]) if "DTSTART" in props else ""
+                end = _ics_date(props["DTEND"][1], props["DTEND"][0]) if "DTEND" in props else ""
+                if len(end) == 10:  # Ganztägig: DTEND ist der Tag nach dem letzten Tag
+                    end = (date.fromisoformat(end) - timedelta(days=1)).isoformat()
+                ort = _clean(_unescape(props.get("LOCATION", ({}, ""))[1]))
+                url = props.get("URL", ({}, ""))[1].strip()
+                yield (titel, _when(start, end), ort or None, url or None,
+                       _clean(_unescape(props.get("DESCRIPTION", ({}, ""))[1]), DESCRIPTION_CHARS))
+            props = None
+            continue
+        if props is not None and not depth:
+            props.setdefault(name, (params, value))
+
+
+def ics_events(feed: str, since: str | None = None, limit: int = ICAL_MAX_EVENTS) -> list[Row]:
+    """
+    Events eines iCal-Feeds, höchstens `limit`. Mit `since` (ISO-Datum) nur die, die
+    dann noch laufen – maßgeblich ist das Ende des Zeitraums, ohne Ende der Beginn.
+    """
+    out = []
+    for row in iter_ics(io.StringIO(feed)):
+        if since and row[1] and row[1].rsplit(" – ", 1)[-1][:10] < since:
+            continue
+        out.append(row)
+        if len(out) >= limit:
+            break
+    return out
@@ -0,0 +1,240 @@
+"""
+HTTP-Validator-Cache
+=====================
+Gemeinsamer Platten-Cache für alle GET-Abrufe von Webseiten (Event-Quellen,
+SpyFu/Google in ads_intelligence.py, WordPress-Abfragen):
+- Antwort + Validatoren (ETag, Last-Modified) werden unter CACHE_DIR abgelegt
+- Der nächste Abruf fragt bedingt (If-None-Match / If-Modified-Since) – bei
+  304 Not Modified kommt der Inhalt von der Platte, übertragen werden nur die Header
+- Cache-Control wird beachtet: no-store → nie ablegen, max-age / Expires → solange
+  frisch gar nicht erst fragen, no-cache → immer nachfragen
+- Schlüssel ist die URL samt der Anfrage-Header, die die Antwort verändern (VARY_HEADERS,
+  z.B. Accept-Language, User-Agent); nennt der Server per Vary weitere Header (oder *),
+  wird die Antwort nicht abgelegt
+- Pro Lauf: Trefferquote und eingesparte Bytes (stats / log_stats)
+
+Aufrufer bekommen immer eine normale requests.Response – aus dem Cache bediente mit
+Status 200 und dem abgelegten Inhalt, erkennbar an response.from_cache.
+
+Aufbau von CACHE_DIR:
+    <hash des schlüssels>.json  ← URL, Validatoren, Ablaufzeit, Header
+    <hash des schlüssels>.gz    ← Inhalt (gzip)
+
+HTTP_CACHE_DIR= (leer) schaltet den Cache ab.
+
+Voraussetzungen:
+    pip install requests
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "cache/http")
+REQUEST_TIMEOUT = 15
+CACHE_KEEP_DAYS = 30            # Einträge, die so lange nicht bestätigt wurden, fliegen raus
+KEEP_HEADERS = ["Content-Type", "ETag", "Last-Modified", "Cache-Control", "Expires"]
+VARY_HEADERS = ["Accept", "Accept-Language", "User-Agent"]  # Gehen in den Schlüssel ein
+# Vary auf diese Header ist unkritisch: Accept-Encoding dekodiert requests selbst
+VARY_IGNORED = {"accept-encoding", *(h.lower() for h in VARY_HEADERS)}
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_stats = {"abrufe": 0, "frisch": 0, "nicht_geaendert": 0, "geladen": 0, "bytes_gespart": 0, "bytes_geladen": 0}
+
+
+# ── Ablage ───────────────────────────────────────────────────────────────────
+
+def key(url: str, headers=None) -> str:
+    """URL plus die Werte der VARY_HEADERS, die mit der Anfrage rausgehen."""
+    headers = CaseInsensitiveDict(headers or {})
+    variante = "\n".join(f"{h}: {headers[h]}" for h in VARY_HEADERS if headers.get(h))
+    return hashlib.sha256(f"{url}\n{variante}".encode("utf-8")).hexdigest()[:24]
+
+
+def _paths(cache_key: str, cache_dir: str) -> tuple[str, str]:
+    base = f"{cache_dir}/{cache_key}"
+    return f"{base}.json", f"{base}.gz"
+
+
+def _load(url: str, cache_key: str, cache_dir: str) -> tuple[dict, bytes] | None:
+    meta_path, body_path = _paths(cache_key, cache_dir)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with gzip.open(body_path, "rb") as f:
+            body = f.read()
+    except (FileNotFoundError, json.JSONDecodeError, OSError, EOFError):
+        return None
+    return (meta, body) if meta.get("url") == url else None
+
+
+def _store(url: str, cache_key: str, resp: requests.Response, cache_dir: str):
+    meta_path, body_path = _paths(cache_key, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    with gzip.open(f"{body_path}.tmp", "wb", compresslevel=6) as f:
+        f.write(resp.content)
+    meta = {"url": url, "gespeichert": time.time(), "ablauf": _expires(resp.headers),
+            "encoding": resp.encoding,
+            "headers": {h: resp.headers[h] for h in KEEP_HEADERS if h in resp.headers}}
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(f"{body_path}.tmp", body_path)  # Erst der Inhalt, dann die Metadaten
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def _directives(headers) -> dict[str, str]:
+    out = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            out[name.lower()] = value.strip('"')
+    return out
+
+
+def _expires(headers) -> float:
+    """Bis wann die Antwort ohne Nachfrage verwendet werden darf (Unix-Zeit, 0 = immer nachfragen)."""
+    cc = _directives(headers)
+    if "no-cache" in cc or "no-store" in cc:
+        return 0.0
+    if cc.get("max-age", "").isdigit():
+        return time.time() + int(cc["max-age"])
+    if "Expires" in headers:
+        try:
+            return parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+def _cacheable(resp: requests.Response) -> bool:
+    if resp.status_code != 200 or "no-store" in _directives(resp.headers):
+        return False
+    vary = {h.strip().lower() for h in resp.headers.get("Vary", "").split(",") if h.strip()}
+    if vary - VARY_IGNORED:  # Antwort hängt von Headern ab, die nicht im Schlüssel stecken (oder "*")
+        return False
+    return bool(resp.headers.get("ETag") or resp.headers.get("Last-Modified") or _expires(resp.headers))
+
+
+def _from_cache(url: str, meta: dict, body: bytes, resp: requests.Response | None = None) -> requests.Response:
+    """Antwort aus dem Cache als normale 200-Antwort (bei 304 mit den neuen Headern)."""
+    out = resp if resp is not None else requests.Response()
+    out.url = url
+    out.status_code = 200
+    out.reason = "OK"
+    out._content = body
+    out.encoding = meta.get("encoding")
+    out.headers = CaseInsensitiveDict({**meta.get("headers", {}), **dict(out.headers or {})})
+    out.headers.pop("Content-Length", None)
+    out.from_cache = True
+    return out
+
+
+def _count(**delta):
+    with _lock:
+        for name, value in delta.items():
+            _stats[name] += value
+
+
+# ── Abruf ────────────────────────────────────────────────────────────────────
+
+def get(url: str, params: dict | None = None, headers: dict | None = None,
+        session: requests.Session | None = None, timeout: float = REQUEST_TIMEOUT,
+        gate=None, cache_dir: str | None = None) -> requests.Response:
+    """
+    GET mit Validator-Cache. `gate(url)` (Kontextmanager, z.B. HostLimiter.slot) umschließt
+    nur echte Netzabrufe – frische Cache-Treffer warten nicht auf den Host.
+    """
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    http = session or requests
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    gesendet = {**(session.headers if session else requests.utils.default_headers()), **(headers or {})}
+    cache_key = key(full_url, gesendet)
+    cached = _load(full_url, cache_key, cache_dir) if cache_dir else None
+    _count(abrufe=1)
+
+    if cached and cached[0].get("ablauf", 0) > time.time():
+        _count(frisch=1, bytes_gespart=len(cached[1]))
+        return _from_cache(full_url, *cached)
+
+    conditional = dict(headers or {})
+    if cached:
+        if "ETag" in cached[0]["headers"]:
+            conditional["If-None-Match"] = cached[0]["headers"]["ETag"]
+        if "Last-Modified" in cached[0]["headers"]:
+            conditional["If-Modified-Since"] = cached[0]["headers"]["Last-Modified"]
+
+    with gate(full_url) if gate else nullcontext():
+        resp = http.get(full_url, headers=conditional, timeout=timeout)
+
+    if resp.status_code == 304 and cached:
+        meta, body = cached
+        meta = {**meta, "ablauf": _expires(resp.headers) or meta.get("ablauf", 0),
+                "headers": {**meta["headers"], **{h: resp.headers[h] for h in KEEP_HEADERS if h in resp.headers}}}
+        _write_meta(cache_key, meta, cache_dir)
+        _count(nicht_geaendert=1, bytes_gespart=len(body))
+        return _from_cache(full_url, meta, body, resp)
+
+    resp.from_cache = False
+    _count(geladen=1, bytes_geladen=len(resp.content))
+    if cache_dir and _cacheable(resp):
+        _store(full_url, cache_key, resp, cache_dir)
+    return resp
+
+
+def _write_meta(cache_key: str, meta: dict, cache_dir: str):
+    meta_path, _ = _paths(cache_key, cache_dir)
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def prune(keep_days: int = CACHE_KEEP_DAYS, cache_dir: str = CACHE_DIR):
+    """Einträge löschen, die seit keep_days weder neu geladen noch per 304 bestätigt wurden."""
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return
+    grenze = time.time() - keep_days * 86400
+    for name in os.listdir(cache_dir):
+        path = f"{cache_dir}/{name}"
+        if name.endswith(".json") and os.path.getmtime(path) < grenze:
+            for p in (path, path[:-len(".json")] + ".gz"):
+                try:
+                    os.remove(p)
+                except FileNotFoundError:
+                    pass
+
+
+# ── Statistik ────────────────────────────────────────────────────────────────
+
+def stats() -> dict:
+    """Zähler seit Programmstart (bzw. reset_stats) plus Trefferquote."""
+    with _lock:
+        out = dict(_stats)
+    treffer = out["frisch"] + out["nicht_geaendert"]
+    out["trefferquote"] = round(treffer / out["abrufe"], 3) if out["abrufe"] else 0.0
+    return out
+
+
+def reset_stats():
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def log_stats(prefix: str = "HTTP-Cache") -> str:
+    s = stats()
+    text = (f"{prefix}: {s['abrufe']} Abrufe, Trefferquote {s['trefferquote']:.0%} "
+            f"({s['frisch']} frisch, {s['nicht_geaendert']} × 304), "
+            f"{s['bytes_gespart'] / 1024:.0f} KB gespart, {s['bytes_geladen'] / 1024:.0f} KB geladen")
+    log.info(text)
+    return text
@@ -24,6 +24,8 @@ from datetime import date, datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
+import loader
+
 load_dotenv()  # Lädt .env Datei
 
 # ── Konfiguration (in .env Datei eintragen!) ──────────────────────────────────
@@ -98,38 +100,34 @@ def load_top_opportunity() -> dict:
     2. Ads Intelligence Keywords (ads_intelligence.py)
     → Zusammen ergibt das die präzisesten SEO-Keywords
     """
-    import glob
-
     ads_keywords  = ""
     artikel_titel = ""
     primary_kw    = ""
     secondary_kws = ""
 
     # Ads Intelligence Keywords (höchste Priorität)
-    ads_kw_files = sorted(glob.glob(f"{OUTPUT_DIR}/seo_keywords_*.csv"))
-    if ads_kw_files:
-        df_kw = pd.read_csv(ads_kw_files[-1])
+    df_kw = loader.load("seo_keywords", latest=True, columns=["keyword", "prioritaet"], output_dir=OUTPUT_DIR)
+    if not df_kw.empty:
         top_kws = df_kw.sort_values("prioritaet", ascending=False).head(5)
         ads_keywords = ", ".join(top_kws["keyword"].tolist())
         print(f"✓ Ads-Keywords geladen: {ads_keywords[:80]}...")
 
     # KI-generierte Artikel-Ideen
-    ideen_files = sorted(glob.glob(f"{OUTPUT_DIR}/artikel_ideen_*.csv"))
-    if ideen_files:
-        df_art = pd.read_csv(ideen_files[-1])
-        if not df_art.empty:
-            best         = df_art.iloc[0]
-            artikel_titel = best.get("titel", "")
-            primary_kw    = best.get("primary_keyword", "")
-            secondary_kws = best.get("secondary_keywords", "")
-            print(f"✓ Artikel-Idee: {artikel_titel[:60]}")
+    df_art = loader.load("artikel_ideen", latest=True, output_dir=OUTPUT_DIR,
+                         columns=["titel", "primary_keyword", "secondary_keywords"])
+    if not df_art.empty:
+        best         = df_art.iloc[0]
+        artikel_titel = best.get("titel", "")
+        primary_kw    = best.get("primary_keyword", "")
+        secondary_kws = best.get("secondary_keywords", "")
+        print(f"✓ Artikel-Idee: {artikel_titel[:60]}")
 
     # Trend-Daten als Ergänzung
     trend_gruppe = "Fahrrad & Outdoor"
     trend_score  = 75.0
-    trend_files  = sorted(glob.glob(f"{OUTPUT_DIR}/affiliate_chancen_*.csv"))
-    if trend_files:
-        df_t = pd.read_csv(trend_files[-1])
+    df_t = loader.load("affiliate_chancen", latest=True, columns=["gruppe", "affiliate_score"],
+                       output_dir=OUTPUT_DIR)
+    if not df_t.empty:
         top  = df_t.sort_values("affiliate_score", ascending=False).iloc[0]
         trend_gruppe = top["gruppe"]
         trend_score  = float(top["affiliate_score"])
@@ -0,0 +1,231 @@
+"""
+Einheitlicher Datenzugriff
+===========================
+Ein Einstieg für alle historischen Daten – Aufwand und Speicher richten sich nach der
+Abfrage, nicht nach der Größe des Archivs:
+
+    loader.load("affiliate_chancen", latest=True, columns=["gruppe", "affiliate_score"])
+    loader.load("osm_rollup", start="2026-06-01", columns=["datum", "kategorie", "anzahl"])
+    loader.load("events", start="2026-07-01", end="2026-07-07")
+
+- Tagesdateien (<art>_<datum>.csv/.json): Zeitraum über den Dateinamen – nur Dateien
+  im Zeitraum werden geöffnet, davon nur die angefragten Spalten mit festen Typen geparst
+- Speicher (osm_store, osm_rollup, event_store): Zeitraum und Spalten werden als
+  Parquet-Filter bzw. Spaltenauswahl durchgereicht
+- Die Tagesframes werden einzeln gelesen und erst am Ende einmal zusammengefügt
+
+Zusätzlich schreibt write_index() output/index.json: neueste Datei je Art und die
+Kategorien des letzten OSM-Tages – das WordPress-Plugin braucht damit weder die
+GitHub-Ordnerliste noch die komplette OSM-CSV.
+
+Voraussetzungen:
+    pip install pandas pyarrow
+"""
+
+import os
+import re
+import json
+import logging
+import pandas as pd
+
+import event_store
+import osm_rollup
+import osm_store
+
+OUTPUT_DIR = "output"
+INDEX_VERSION = 1
+
+log = logging.getLogger(__name__)
+
+# ── Arten ────────────────────────────────────────────────────────────────────
+
+# Tagesdateien: Dateiendung und Spaltentypen ("datetime" = Datum, "number" = Zahl als float,
+# Unlesbares wird NaN – für die vom Sprachmodell geschriebenen CSVs –, sonst pandas-dtype).
+# Die Spalte datum kommt immer aus dem Dateinamen, Textspalten sind nie leer/None, sondern "".
+DATED_FILES = {
+    "affiliate_chancen": {"ext": ".csv", "dtypes": {
+        "datum": "datetime", "gruppe": str, "kategorie": "category", "trend": "category",
+        "aktueller_wert": float, "veraenderung_%": float, "affiliate_score": float,
+        "empfohlene_partner": str, "keywords": str,
+    }},
+    "seo_keywords": {"ext": ".csv", "dtypes": {
+        "keyword": str, "prioritaet": "number", "suchvolumen_schaetzung": "category",
+        "affiliate_potenzial": "category", "begruendung": str, "datum": "datetime",
+    }},
+    "artikel_ideen": {"ext": ".csv", "dtypes": {
+        "titel": str, "primary_keyword": str, "secondary_keywords": str,
+        "content_strategie": str, "affiliate_partner": str,
+        "geschaetzte_wortanzahl": "number", "datum": "datetime",
+    }},
+    "summary": {"ext": ".json", "dtypes": {
+        "datum": "datetime", "osm_gesamt": "Int64", "osm_laeden": "Int64",
+        "osm_gastronomie": "Int64", "osm_freizeit": "Int64", "events_gesamt": "Int64",
+        "bevoelkerung_aktuell": "Int64",
+    }},
+}
+
+# Speicher: start/end beziehen sich bei "events" auf den Veranstaltungszeitraum
+# (beginn/ende), sonst auf den Abruftag.
+STORES = {
+    "osm":             lambda start, end, columns: osm_store.load_history(start, end, columns),
+    "osm_aenderungen": lambda start, end, columns: osm_store.load_changes(start, end, columns),
+    "osm_rollup":      lambda start, end, columns: osm_rollup.read_rollup(start=start, end=end, columns=columns),
+    "events":          lambda start, end, columns: event_store.load_events(start, end, columns=columns),
+}
+
+KINDS = [*STORES, *DATED_FILES]
+
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _spec(kind: str) -> dict:
+    if kind not in DATED_FILES:
+        raise ValueError(f"Unbekannte Datenart {kind!r} – bekannt: {', '.join(KINDS)}")
+    return DATED_FILES[kind]
+
+
+# ── Tagesdateien ─────────────────────────────────────────────────────────────
+
+def _scan(prefix: str, ext: str, output_dir: str, start=None, end=None) -> list[tuple[str, str]]:
+    found = []
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith(prefix) and name.endswith(ext)):
+                continue
+            datum = name[len(prefix):-len(ext)]
+            if _DATE.match(datum) and (start is None or datum >= str(start)[:10]) \
+                    and (end is None or datum <= str(end)[:10]):
+                found.append((datum, entry.path))
+    return sorted(found)
+
+
+def partitions(kind: str, start: str | None = None, end: str | None = None,
+               output_dir: str = OUTPUT_DIR) -> list[tuple[str, str]]:
+    """(datum, pfad) aller Tagesdateien einer Art im Zeitraum, aufsteigend – ohne eine Datei zu öffnen."""
+    return _scan(f"{kind}_", _spec(kind)["ext"], output_dir, start, end)
+
+
+def _typed(df: pd.DataFrame, dtypes: dict, columns: list[str], datum: str) -> pd.DataFrame:
+    """Fehlende Spalten leer ergänzen (ältere Dateien), Typen vereinheitlichen."""
+    out = {}
+    for col in columns:
+        dtype = dtypes.get(col, str)
+        if col == "datum":
+            out[col] = pd.Series(pd.Timestamp(datum), index=df.index, dtype="datetime64[ns]")
+        elif col not in df.columns:
+            leer = {str: "", "Int64": pd.NA, "number": float("nan")}.get(dtype)
+            out[col] = pd.Series(leer, index=df.index, dtype={str: "object", "datetime": "datetime64[ns]",
+                                                              "number": float}.get(dtype, dtype))
+        elif dtype == "datetime":
+            out[col] = pd.to_datetime(df[col], errors="coerce")
+        elif dtype == "number":
+            out[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+        elif dtype is str:
+            out[col] = df[col].fillna("").astype(str)
+        else:
+            out[col] = df[col].astype(dtype)
+    return pd.DataFrame(out, index=df.index)
+
+
+def _read(kind: str, path: str, datum: str, columns: list[str] | None) -> pd.DataFrame:
+    spec = _spec(kind)
+    dtypes = spec["dtypes"]
+    if spec["ext"] == ".json":
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        df = pd.DataFrame([{k: v for k, v in record.items() if columns is None or k in columns}])
+    else:
+        wanted = None if columns is None else set(columns)
+        parse = {c: (str if t in (str, "datetime", "category", "number") else t) for c, t in dtypes.items()}
+        try:
+            df = pd.read_csv(path, encoding="utf-8-sig", keep_default_na=False, na_values=[""],
+                             usecols=None if wanted is None else (lambda c: c in wanted),
+                             dtype={c: t for c, t in parse.items() if wanted is None or c in wanted})
+        except pd.errors.EmptyDataError:
+            df = pd.DataFrame()
+    if columns is None:
+        columns = list(dtypes) + [c for c in df.columns if c not in dtypes]
+    return _typed(df, dtypes, columns, datum)
+
+
+def iter_partitions(kind: str, start: str | None = None, end: str | None = None,
+                    columns: list[str] | None = None, output_dir: str = OUTPUT_DIR):
+    """Liefert (datum, frame) je Tagesdatei im Zeitraum – immer nur eine Datei im Speicher."""
+    for datum, path in partitions(kind, start, end, output_dir):
+        yield datum, _read(kind, path, datum, columns)
+
+
+# ── Einstieg ─────────────────────────────────────────────────────────────────
+
+def load(kind: str, start: str | None = None, end: str | None = None,
+         columns: list[str] | None = None, latest: bool = False,
+         output_dir: str = OUTPUT_DIR) -> pd.DataFrame:
+    """
+    Daten einer Art im Zeitraum [start, end] (ISO-Datum, jeweils inklusive), nur `columns`.
+    latest=True: nur der neueste Tag im Zeitraum (Tagesdateien) bzw. der neueste Stand.
+    """
+    if kind in STORES:
+        if latest and kind in ("osm", "osm_aenderungen"):
+            dates = [d for d in osm_store.list_dates() if end is None or d <= str(end)[:10]]
+            start = end = dates[-1] if dates else end
+        df = STORES[kind](start, end, columns)
+        if latest and kind == "osm_rollup" and not df.empty and "datum" in df.columns:
+            df = df[df["datum"] == df["datum"].max()].reset_index(drop=True)
+        return df
+
+    parts = partitions(kind, start, end, output_dir)
+    if latest:
+        parts = parts[-1:]
+    dtypes = _spec(kind)["dtypes"]
+    frames = [_read(kind, path, datum, columns) for datum, path in parts]
+    if not frames:
+        return _typed(pd.DataFrame(), dtypes, columns or list(dtypes), "1970-01-01")
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    # Unterschiedliche Kategorien je Datei ergeben beim Zusammenfügen object – einmal vereinheitlichen
+    for col in [c for c in df.columns if dtypes.get(c) == "category"]:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def latest_date(kind: str, output_dir: str = OUTPUT_DIR) -> str | None:
+    if kind in ("osm", "osm_aenderungen", "osm_rollup"):
+        dates = osm_store.list_dates()
+    elif kind == "events":
+        return event_store.read_stand().get("letzter_abruf")
+    else:
+        dates = [d for d, _ in partitions(kind, output_dir=output_dir)]
+    return dates[-1] if dates else None
+
+
+# ── Index für das WordPress-Plugin ───────────────────────────────────────────
+
+def build_index(output_dir: str = OUTPUT_DIR) -> dict:
+    """Neueste Datei je Tagesdatei-Art und Anzahl je Kategorie am letzten OSM-Tag."""
+    dateien = {}
+    for kind, spec in DATED_FILES.items():
+        parts = partitions(kind, output_dir=output_dir)
+        if parts:
+            dateien[kind] = {"neueste": os.path.basename(parts[-1][1]), "erste": parts[0][0],
+                             "letzte": parts[-1][0], "anzahl": len(parts)}
+
+    kategorien = {}
+    osm_tag = latest_date("osm_rollup")
+    if osm_tag:
+        rollup = osm_rollup.read_rollup(start=osm_tag, end=osm_tag, columns=["kategorie", "anzahl"])
+        counts = rollup.groupby("kategorie", observed=True)["anzahl"].sum().sort_values(ascending=False, kind="stable")
+        kategorien = {str(k): int(v) for k, v in counts.items()}
+    return {"version": INDEX_VERSION, "dateien": dateien,
+            "osm_kategorien": {"datum": osm_tag, "anzahl": kategorien}}
+
+
+def write_index(output_dir: str = OUTPUT_DIR) -> str:
+    index = build_index(output_dir)
+    path = f"{output_dir}/index.json"
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+    log.info(f"Index geschrieben: {path} ({len(index['dateien'])} Datenarten)")
+    return path
@@ -0,0 +1,154 @@
+"""
+OSM Lebenszyklus-Analyse
+=========================
+Wertet das komplette Änderungsprotokoll aus dem Snapshot-Speicher in einem
+Durchgang aus (statt nur die letzten beiden Tage zu vergleichen):
+- Pro Element: erstmals / zuletzt gesehen, Lücken, Anzahl Tag-Änderungen, Status
+- Eröffnungen / Schließungen für einen beliebigen Zeitraum
+
+Flackernde Elemente (z.B. einen Tag nicht geliefert, weil Overpass zickte)
+gelten erst als geschlossen, wenn sie MIN_ABSENT_SNAPSHOTS erfolgreiche Tage
+in Folge fehlen – ihr Wiederauftauchen ist dann auch keine "Eröffnung".
+Tage ohne Daten (leerer Snapshot) zählen nicht mit, sie stehen gar nicht im Speicher.
+
+Voraussetzungen:
+    pip install pandas pyarrow
+"""
+
+import pandas as pd
+
+import osm_store
+
+MIN_ABSENT_SNAPSHOTS = 2  # So viele erfolgreiche Tage in Folge fehlen → geschlossen
+
+INFO_COLUMNS = ["name", "kategorie", "typ", "strasse", "hausnummer", "plz"]
+
+
+# ── Ereignisse ───────────────────────────────────────────────────────────────
+
+def _presence_events(changes: pd.DataFrame, dates: list[str]) -> pd.DataFrame:
+    """
+    neu/entfernt-Ereignisse je Element mit Position im Kalender der erfolgreichen Tage
+    und Länge der Abwesenheit, die auf ein "entfernt" folgt.
+    """
+    pos = pd.Series(range(len(dates)), index=pd.to_datetime(dates))
+    ev = changes[changes["aktion"].isin(["neu", "entfernt"])].copy()
+    ev["aktion"] = ev["aktion"].astype(str)
+    ev["osm_typ"] = ev["osm_typ"].astype(str)
+    ev["pos"] = pos.reindex(ev["datum"]).to_numpy()
+    ev = ev.sort_values(["osm_typ", "osm_id", "pos"], kind="stable").reset_index(drop=True)
+
+    grp = ev.groupby(["osm_typ", "osm_id"], sort=False)
+    ev["naechste_pos"] = grp["pos"].shift(-1)
+    ev["vorige_pos"] = grp["pos"].shift(1)
+    ev["ist_erstes"] = grp.cumcount() == 0
+
+    # Abwesenheit nach "entfernt": bis zum Wiederauftauchen bzw. bis heute (inkl. letztem Tag)
+    ev["abwesend"] = ev["naechste_pos"].fillna(len(dates)) - ev["pos"]
+    ev.loc[ev["aktion"] != "entfernt", "abwesend"] = 0
+    # Abwesenheit vor einem "neu" (Lücke, die damit endet)
+    ev["luecke_davor"] = (ev["pos"] - ev["vorige_pos"]).where(ev["aktion"] == "neu")
+    return ev
+
+
+def lifecycle_events(changes: pd.DataFrame, dates: list[str],
+                     min_absent: int = MIN_ABSENT_SNAPSHOTS) -> pd.DataFrame:
+    """
+    Bestätigte Eröffnungen und Schließungen über die gesamte Historie.
+    Spalten: osm_typ, osm_id, datum, ereignis ("eroeffnet"/"geschlossen"),
+    bestaetigt_am (ab wann das Ereignis feststeht) + Name/Adresse.
+    """
+    if changes.empty or not dates:
+        return pd.DataFrame(columns=["osm_typ", "osm_id", "datum", "ereignis", "bestaetigt_am"] + INFO_COLUMNS)
+
+    ev = _presence_events(changes, dates)
+
+    geschlossen = (ev["aktion"] == "entfernt") & (ev["abwesend"] >= min_absent)
+    # Neu ist, was nach dem ersten Tag erstmals auftaucht oder nach echter Schließung zurückkommt.
+    # Der erste Tag ist die Ausgangsbasis – dort ist alles "neu", aber nichts eröffnet.
+    eroeffnet = (ev["aktion"] == "neu") & (ev["pos"] > 0) & (
+        ev["ist_erstes"] | (ev["luecke_davor"] >= min_absent)
+    )
+
+    out = ev[geschlossen | eroeffnet].copy()
+    out["ereignis"] = "geschlossen"
+    out.loc[eroeffnet[out.index], "ereignis"] = "eroeffnet"
+    # Schließungen stehen erst fest, wenn min_absent Tage in Folge gefehlt haben
+    best_pos = out["pos"] + (out["ereignis"] == "geschlossen") * (min_absent - 1)
+    out["bestaetigt_am"] = pd.to_datetime([dates[int(p)] for p in best_pos])
+    return out[["osm_typ", "osm_id", "datum", "ereignis", "bestaetigt_am"] + INFO_COLUMNS].reset_index(drop=True)
+
+
+def changes_between(events: pd.DataFrame, start: str | None = None, end: str | None = None,
+                    by: str = "datum") -> pd.DataFrame:
+    """Eröffnungen/Schließungen mit start < by <= end (by = "datum" oder "bestaetigt_am")."""
+    mask = pd.Series(True, index=events.index)
+    if start is not None:
+        mask &= events[by] > pd.Timestamp(start)
+    if end is not None:
+        mask &= events[by] <= pd.Timestamp(end)
+    return events[mask]
+
+
+# ── Lebenszyklus-Tabelle ─────────────────────────────────────────────────────
+
+def build_lifecycle(changes: pd.DataFrame, dates: list[str],
+                    min_absent: int = MIN_ABSENT_SNAPSHOTS) -> pd.DataFrame:
+    """
+    Eine Zeile pro Element:
+      erstmals_gesehen / zuletzt_gesehen  – erfolgreiche Tage mit dem Element
+      luecken          – wie oft das Element verschwand und wiederkam
+      fehlende_tage    – Summe der erfolgreichen Tage in diesen Lücken
+      tag_aenderungen  – Anzahl geänderter Tage (Name, Adresse, Öffnungszeiten, ...)
+      status           – aktiv / geschlossen / unsicher (fehlt erst seit kurzem)
+    """
+    if changes.empty or not dates:
+        return pd.DataFrame()
+
+    ev = _presence_events(changes, dates)
+    key = ["osm_typ", "osm_id"]
+    grp = ev.groupby(key, sort=False)
+
+    wieder = ev["aktion"].eq("neu") & ~ev["ist_erstes"]
+    letztes = grp.tail(1).set_index(key)
+
+    table = pd.DataFrame({
+        "erstmals_pos":   grp["pos"].min(),
+        "luecken":        wieder.groupby([ev["osm_typ"], ev["osm_id"]], sort=False).sum(),
+        "fehlende_tage":  ev["luecke_davor"].where(wieder).groupby([ev["osm_typ"], ev["osm_id"]], sort=False).sum(),
+    })
+    table["letzte_aktion"] = letztes["aktion"]
+    table["letzte_pos"] = letztes["pos"]
+    table["abwesend"] = letztes["abwesend"]
+
+    # Zuletzt gesehen: bei "entfernt" der Tag davor, sonst der letzte erfolgreiche Tag
+    zuletzt_pos = table["letzte_pos"].where(table["letzte_aktion"] == "entfernt", len(dates)) - 1
+    date_index = pd.to_datetime(dates)
+    table["erstmals_gesehen"] = date_index[table["erstmals_pos"].astype(int)]
+    table["zuletzt_gesehen"] = date_index[zuletzt_pos.astype(int)]
+    table["status"] = "aktiv"
+    weg = table["letzte_aktion"] == "entfernt"
+    table.loc[weg, "status"] = "unsicher"
+    table.loc[weg & (table["abwesend"] >= min_absent), "status"] = "geschlossen"
+
+    # Tag-Änderungen und letzte bekannte Stammdaten aus dem vollständigen Protokoll
+    log = changes.assign(osm_typ=changes["osm_typ"].astype(str))
+    table["tag_aenderungen"] = (log["aktion"] == "geaendert").groupby(
+        [log["osm_typ"], log["osm_id"]]).sum().reindex(table.index, fill_value=0)
+    info = log.sort_values("datum", kind="stable").groupby(["osm_typ", "osm_id"]).tail(1).set_index(key)
+    table = table.join(info[INFO_COLUMNS])
+
+    table["luecken"] = table["luecken"].astype(int)
+    table["fehlende_tage"] = table["fehlende_tage"].fillna(0).astype(int)
+    return table.reset_index()[key + INFO_COLUMNS + [
+        "erstmals_gesehen", "zuletzt_gesehen", "luecken", "fehlende_tage", "tag_aenderungen", "status",
+    ]]
+
+
+def load_lifecycle(store_dir: str = osm_store.OSM_STORE_DIR,
+                   min_absent: int = MIN_ABSENT_SNAPSHOTS) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Lebenszyklus-Tabelle und bestätigte Ereignisse direkt aus dem Snapshot-Speicher."""
+    dates = osm_store.list_dates(store_dir)
+    changes = osm_store.load_changes(store_dir=store_dir)
+    return (build_lifecycle(changes, dates, min_absent),
+            lifecycle_events(changes, dates, min_absent))
@@ -0,0 +1,107 @@
+"""
+OSM Tages-Rollup
+=================
+Vorberechnete Anzahl Einrichtungen je Tag × Kategorie × Typ × PLZ
+(output/osm_store/rollup.parquet bzw. osm_staedte/<stadt>/rollup.parquet).
+
+Pro Lauf kommen nur Tage dazu, die noch fehlen oder deren Delta seitdem neu
+geschrieben wurde (zweiter Lauf am selben Tag). Die Plots und KPIs in analyse.py
+lesen nur diese kleine Tabelle – ihr Aufwand bleibt gleich, egal wie viele Tage
+Historie sich ansammeln.
+
+PLZ wie im Raumindex: addr:postcode, sonst per PLZ-Grenze bzw. Nachbarschaft
+ergänzt, "" = unbekannt.
+
+Voraussetzungen:
+    pip install pandas pyarrow
+"""
+
+import os
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import osm_spatial
+import osm_store
+
+ROLLUP_COLUMNS = ["datum", "kategorie", "typ", "plz", "anzahl"]
+ROLLUP_SCHEMA = pa.schema([
+    ("datum",     pa.date32()),
+    ("kategorie", pa.dictionary(pa.int32(), pa.string())),
+    ("typ",       pa.dictionary(pa.int32(), pa.string())),
+    ("plz",       pa.dictionary(pa.int32(), pa.string())),
+    ("anzahl",    pa.int32()),
+])
+
+log = logging.getLogger(__name__)
+
+
+def rollup_path(store_dir: str = osm_store.OSM_STORE_DIR) -> str:
+    return f"{store_dir}/rollup.parquet"
+
+
+def rollup_snapshot(snap: pd.DataFrame, polygons: dict | None = None) -> pd.DataFrame:
+    """Zählungen eines einzelnen Snapshots."""
+    plz, _ = osm_spatial.assign_plz(snap, polygons)
+    keys = pd.DataFrame({
+        "datum": snap["datum"].to_numpy(),
+        "kategorie": snap["kategorie"].astype(str).to_numpy(),
+        "typ": snap["typ"].astype(str).to_numpy(),
+        "plz": plz,
+    })
+    return keys.groupby(ROLLUP_COLUMNS[:-1], sort=True).size().rename("anzahl").reset_index()
+
+
+def read_rollup(store_dir: str = osm_store.OSM_STORE_DIR, start: str | None = None,
+                end: str | None = None, columns: list[str] | None = None) -> pd.DataFrame:
+    """Rollup, optional nur Tage in [start, end] und nur `columns` (Filter greift je Zeilengruppe)."""
+    path = rollup_path(store_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns or ROLLUP_COLUMNS)
+    filters = []
+    if start is not None:
+        filters.append(("datum", ">=", pd.Timestamp(start).date()))
+    if end is not None:
+        filters.append(("datum", "<=", pd.Timestamp(end).date()))
+    df = pq.read_table(path, columns=columns, filters=filters or None).to_pandas(date_as_object=False)
+    if "datum" in df.columns:
+        df["datum"] = df["datum"].astype("datetime64[ns]")
+    if "anzahl" in df.columns:
+        df["anzahl"] = df["anzahl"].astype("int64")
+    for col in ROLLUP_COLUMNS[1:4]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype("category")  # Kategorien alphabetisch wie in to_typed()
+    return df
+
+
+def _write_rollup(df: pd.DataFrame, store_dir: str):
+    path = rollup_path(store_dir)
+    table = pa.Table.from_pandas(df[ROLLUP_COLUMNS], schema=ROLLUP_SCHEMA, preserve_index=False)
+    pq.write_table(table, f"{path}.tmp", compression="zstd")
+    os.replace(f"{path}.tmp", path)
+
+
+def update_rollup(store_dir: str = osm_store.OSM_STORE_DIR) -> pd.DataFrame:
+    """Fehlende bzw. neu geschriebene Tage ergänzen und das komplette Rollup zurückgeben."""
+    dates = osm_store.list_dates(store_dir)
+    rollup = read_rollup(store_dir)
+    stand = os.path.getmtime(rollup_path(store_dir)) if os.path.exists(rollup_path(store_dir)) else 0.0
+
+    vorhanden = set(rollup["datum"].dt.strftime("%Y-%m-%d")) if not rollup.empty else set()
+    offen = [d for d in dates if d not in vorhanden
+             or os.path.getmtime(osm_store._path("delta", d, store_dir)) > stand]
+    if not offen:
+        return rollup
+
+    polygons = osm_spatial.read_polygons(store_dir)
+    neu = [rollup_snapshot(snap, polygons)
+           for d, snap in osm_store.iter_snapshots(offen[0], store_dir=store_dir) if d in offen]
+
+    behalten = rollup[rollup["datum"].isin(pd.to_datetime(dates)) & ~rollup["datum"].isin(pd.to_datetime(offen))]
+    parts = [p for p in [behalten.astype({c: str for c in ROLLUP_COLUMNS[1:4]})] + neu if not p.empty]
+    rollup = pd.concat(parts, ignore_index=True).sort_values(ROLLUP_COLUMNS[:-1], kind="stable")
+    rollup["anzahl"] = rollup["anzahl"].astype("int32")
+    _write_rollup(rollup, store_dir)
+    log.info(f"OSM-Rollup: {len(offen)} Tag(e) ergänzt, {rollup['datum'].nunique()} Tage gesamt")
+    return read_rollup(store_dir)
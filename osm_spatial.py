@@ -0,0 +1,385 @@
+"""
+OSM Raumindex
+==============
+Gitter-Index über lat/lon eines Snapshots – einmal pro Tag gebaut und neben
+dem Snapshot-Speicher abgelegt (spatial_<datum>.npz):
+- Umkreissuche und k nächste Nachbarn ohne Schleife über alle Punkte
+- PLZ-Zuordnung für Elemente ohne addr:postcode: Punkt-in-Polygon gegen die
+  PLZ-Grenzen aus OSM (plz_polygone.json), sonst Mehrheit der nächsten Nachbarn
+
+Die Punkte werden flach auf Meter projiziert (für eine Stadt bzw. das Ruhrgebiet
+genau genug) und in quadratische Zellen einsortiert. Zellen liegen sortiert
+mit Start-Offsets vor (CSR) – eine Abfrage liest pro Gitterzeile einen
+zusammenhängenden Block und prüft nur diese Kandidaten.
+
+Aufbau (zusätzlich in output/osm_store/ bzw. osm_staedte/<stadt>/):
+    spatial_<datum>.npz          ← Index zum neuesten Snapshot (ältere werden gelöscht,
+                                   nicht im Git – load_index baut fehlende neu)
+    plz_polygone.json            ← PLZ-Grenzen {plz: [[[lon, lat], ...], ...]}
+
+Voraussetzungen:
+    pip install numpy pandas pyarrow
+"""
+
+import os
+import glob
+import json
+import logging
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+import osm_store
+
+CELL_M = 250.0          # Kantenlänge einer Gitterzelle in Metern
+M_PER_DEG_LAT = 111_320.0
+PLZ_NEIGHBOURS = 5      # Ersatzweise: Mehrheit dieser nächsten Nachbarn mit PLZ ...
+PLZ_MAX_DIST_M = 500.0  # ... sofern nicht weiter weg als das
+
+log = logging.getLogger(__name__)
+
+
+# ── Index ────────────────────────────────────────────────────────────────────
+
+class SpatialIndex:
+    """
+    Gitter-Index über die Punkte eines Snapshots. Abfragen liefern Positionen
+    (Zeilen im Snapshot bzw. in osm_typ/osm_id/plz) und Entfernungen in Metern.
+    """
+
+    GRID = ["lat0", "ix0", "iy0", "nx", "ny", "keys", "starts", "order"]
+
+    def __init__(self, lat, lon, osm_typ, osm_id, plz, plz_quelle, grid: dict | None = None):
+        self.lat = np.asarray(lat, dtype="float64")
+        self.lon = np.asarray(lon, dtype="float64")
+        self.osm_typ = np.asarray(osm_typ, dtype=str)
+        self.osm_id = np.asarray(osm_id, dtype="int64")
+        self.plz = np.asarray(plz, dtype=str)
+        self.plz_quelle = np.asarray(plz_quelle, dtype=str)
+        valid = ~(np.isnan(self.lat) | np.isnan(self.lon))
+
+        if grid is not None:  # Gespeicherter Index – Zellen nicht neu sortieren
+            self.lat0 = float(grid["lat0"])
+            self.ix0, self.iy0, self.nx, self.ny = (int(grid[k]) for k in ("ix0", "iy0", "nx", "ny"))
+            self.keys, self.starts, self.order = grid["keys"], grid["starts"], grid["order"]
+            self.x, self.y = self._project(self.lat, self.lon)
+            return
+
+        self.lat0 = float(self.lat[valid].mean()) if valid.any() else 0.0
+        self.x, self.y = self._project(self.lat, self.lon)
+
+        # Zellen: (zeile, spalte) → fortlaufender Schlüssel, Punkte nach Schlüssel sortiert
+        pos = np.flatnonzero(valid)
+        ix = np.floor(self.x[pos] / CELL_M).astype("int64")
+        iy = np.floor(self.y[pos] / CELL_M).astype("int64")
+        self.ix0 = int(ix.min()) if len(pos) else 0
+        self.iy0 = int(iy.min()) if len(pos) else 0
+        self.nx = int(ix.max()) - self.ix0 + 1 if len(pos) else 1
+        self.ny = int(iy.max()) - self.iy0 + 1 if len(pos) else 1
+        cell = (iy - self.iy0) * self.nx + (ix - self.ix0)
+        order = np.argsort(cell, kind="stable")
+        self.order = pos[order]
+        self.keys, starts = np.unique(cell[order], return_index=True)
+        self.starts = np.append(starts, len(order)).astype("int64")
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def _project(self, lat, lon):
+        kx = M_PER_DEG_LAT * np.cos(np.radians(self.lat0))
+        return np.asarray(lon) * kx, np.asarray(lat) * M_PER_DEG_LAT
+
+    # ── Abfragen ─────────────────────────────────────────────────────────────
+
+    def _candidates(self, x: float, y: float, radius_m: float) -> np.ndarray:
+        """Alle Punkte in den Zellen, die den Kreis berühren."""
+        ix_lo = max(int(np.floor((x - radius_m) / CELL_M)) - self.ix0, 0)
+        ix_hi = min(int(np.floor((x + radius_m) / CELL_M)) - self.ix0, self.nx - 1)
+        iy_lo = max(int(np.floor((y - radius_m) / CELL_M)) - self.iy0, 0)
+        iy_hi = min(int(np.floor((y + radius_m) / CELL_M)) - self.iy0, self.ny - 1)
+        if ix_lo > ix_hi or iy_lo > iy_hi:
+            return np.empty(0, dtype="int64")
+        rows = np.arange(iy_lo, iy_hi + 1) * self.nx
+        lo = np.searchsorted(self.keys, rows + ix_lo, side="left")
+        hi = np.searchsorted(self.keys, rows + ix_hi, side="right")
+        return np.concatenate([self.order[self.starts[a]:self.starts[b]] for a, b in zip(lo, hi)])
+
+    def radius(self, lat: float, lon: float, radius_m: float) -> tuple[np.ndarray, np.ndarray]:
+        """Positionen und Entfernungen aller Punkte im Umkreis, nach Entfernung sortiert."""
+        x, y = self._project(lat, lon)
+        cand = self._candidates(x, y, radius_m)
+        dist = np.hypot(self.x[cand] - x, self.y[cand] - y)
+        hit = dist <= radius_m
+        cand, dist = cand[hit], dist[hit]
+        order = np.argsort(dist, kind="stable")
+        return cand[order], dist[order]
+
+    def radius_many(self, lat: np.ndarray, lon: np.ndarray,
+                    radius_m: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Umkreissuche für viele Punkte auf einmal: (Nr. der Abfrage, Position, Entfernung).
+        Statt einer Schleife über die Abfragen eine über die Zellen-Nachbarschaft (wenige Versätze).
+        """
+        x, y = self._project(np.asarray(lat, dtype="float64"), np.asarray(lon, dtype="float64"))
+        valid = ~(np.isnan(x) | np.isnan(y))
+        ix = np.where(valid, np.floor(np.nan_to_num(x) / CELL_M), 0).astype("int64") - self.ix0
+        iy = np.where(valid, np.floor(np.nan_to_num(y) / CELL_M), 0).astype("int64") - self.iy0
+        reach = int(np.ceil(radius_m / CELL_M))
+
+        queries, positions = [], []
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                cx, cy = ix + dx, iy + dy
+                q = np.flatnonzero(valid & (cx >= 0) & (cx < self.nx) & (cy >= 0) & (cy < self.ny))
+                key = cy[q] * self.nx + cx[q]
+                slot = np.minimum(np.searchsorted(self.keys, key), len(self.keys) - 1)
+                hit = self.keys[slot] == key if len(self.keys) else np.zeros(len(q), dtype=bool)
+                q, slot = q[hit], slot[hit]
+                count = self.starts[slot + 1] - self.starts[slot]
+                first = np.repeat(self.starts[slot] - (np.cumsum(count) - count), count)
+                queries.append(np.repeat(q, count))
+                positions.append(self.order[first + np.arange(count.sum())])
+
+        q, pos = np.concatenate(queries), np.concatenate(positions)
+        dist = np.hypot(self.x[pos] - x[q], self.y[pos] - y[q])
+        near = dist <= radius_m
+        return q[near], pos[near], dist[near]
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                mask: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Die k nächsten Punkte (optional nur solche mit mask=True).
+        Sucht in wachsenden Ringen, bis der k-te Treffer sicher innerhalb liegt.
+        """
+        x, y = self._project(lat, lon)
+        x_lo, y_lo = self.ix0 * CELL_M, self.iy0 * CELL_M
+        extent = np.hypot(max(abs(x - x_lo), abs(x - x_lo - self.nx * CELL_M)),
+                          max(abs(y - y_lo), abs(y - y_lo - self.ny * CELL_M)))
+        r = CELL_M
+        while True:
+            cand = self._candidates(x, y, r)
+            if mask is not None:
+                cand = cand[mask[cand]]
+            dist = np.hypot(self.x[cand] - x, self.y[cand] - y)
+            if len(cand) >= k:
+                kth = np.partition(dist, k - 1)[k - 1]
+                if kth <= r:
+                    break
+                r = kth  # Alles bis zum k-ten Kandidaten liegt in den Zellen dieses Radius
+                continue
+            if r >= extent:
+                break
+            r *= 2
+        order = np.argsort(dist, kind="stable")[:k]
+        return cand[order], dist[order]
+
+    def plz_at(self, lat: float, lon: float, polygons: dict | None = None) -> str:
+        """PLZ an einem beliebigen Punkt: Polygon, sonst Mehrheit der nächsten Nachbarn."""
+        if polygons:
+            for plz, rings in polygons.items():
+                if points_in_rings(np.array([lon]), np.array([lat]), rings)[0]:
+                    return plz
+        return _majority_plz(self, lat, lon)
+
+    # ── Speichern / Laden ────────────────────────────────────────────────────
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, lat=self.lat, lon=self.lon, osm_typ=self.osm_typ,
+                            osm_id=self.osm_id, plz=self.plz, plz_quelle=self.plz_quelle,
+                            **{k: np.asarray(getattr(self, k)) for k in self.GRID})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SpatialIndex":
+        with np.load(path) as z:
+            return cls(z["lat"], z["lon"], z["osm_typ"], z["osm_id"], z["plz"], z["plz_quelle"],
+                       grid={k: z[k] for k in cls.GRID})
+
+
+# ── PLZ-Polygone ─────────────────────────────────────────────────────────────
+
+def rings_from_ways(ways: list[list[tuple[float, float]]]) -> list[np.ndarray]:
+    """
+    Setzt die Außen-/Innen-Ways einer Multipolygon-Relation zu geschlossenen Ringen
+    zusammen (Ways teilen sich Endpunkte, Richtung beliebig). Koordinaten als (lon, lat).
+    """
+    offen = [list(w) for w in ways if len(w) >= 2]
+    rings = []
+    while offen:
+        ring = offen.pop(0)
+        while ring[0] != ring[-1]:
+            for i, w in enumerate(offen):
+                if w[0] == ring[-1]:
+                    ring += w[1:]
+                elif w[-1] == ring[-1]:
+                    ring += w[-2::-1]
+                else:
+                    continue
+                offen.pop(i)
+                break
+            else:
+                break  # Unvollständige Grenze – Ring trotzdem schließen statt verwerfen
+        if len(ring) >= 3:
+            rings.append(np.array(ring + ([ring[0]] if ring[0] != ring[-1] else []), dtype="float64"))
+    return rings
+
+
+def points_in_rings(lon: np.ndarray, lat: np.ndarray, rings: list[np.ndarray]) -> np.ndarray:
+    """
+    Even-odd-Regel über alle Ringe eines Multipolygons (Löcher heben sich dadurch auf).
+    Vektorisiert: pro Ring eine Punkte × Kanten-Matrix, vorab per Bounding-Box gefiltert.
+    """
+    inside = np.zeros(len(lon), dtype=bool)
+    for ring in rings:
+        in_box = np.flatnonzero((lon >= ring[:, 0].min()) & (lon <= ring[:, 0].max())
+                                & (lat >= ring[:, 1].min()) & (lat <= ring[:, 1].max()))
+        if not len(in_box):
+            continue
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        for chunk in np.array_split(in_box, max(1, len(in_box) // 2048)):
+            px, py = lon[chunk, None], lat[chunk, None]
+            kreuzt = (y1 > py) != (y2 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xs = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            inside[chunk] ^= ((kreuzt & (px < xs)).sum(axis=1) % 2).astype(bool)
+    return inside
+
+
+def polygons_path(store_dir: str = osm_store.OSM_STORE_DIR) -> str:
+    return f"{store_dir}/plz_polygone.json"
+
+
+def read_polygons(store_dir: str = osm_store.OSM_STORE_DIR) -> dict[str, list[np.ndarray]]:
+    """PLZ-Grenzen aus dem Speicher – leer, wenn (noch) keine abgerufen wurden."""
+    path = polygons_path(store_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return {plz: [np.asarray(r, dtype="float64") for r in rings] for plz, rings in raw.items()}
+
+
+def write_polygons(polygons: dict[str, list[np.ndarray]], store_dir: str = osm_store.OSM_STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    path = polygons_path(store_dir)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({plz: [np.round(r, 7).tolist() for r in rings] for plz, rings in polygons.items()}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+# ── PLZ-Zuordnung ────────────────────────────────────────────────────────────
+
+def _majority_plz(index: SpatialIndex, lat: float, lon: float) -> str:
+    known = index.plz_quelle == "osm"
+    pos, dist = index.nearest(lat, lon, k=PLZ_NEIGHBOURS, mask=known)
+    pos = pos[dist <= PLZ_MAX_DIST_M]
+    return Counter(index.plz[pos]).most_common(1)[0][0] if len(pos) else ""
+
+
+def _majority_plz_many(lat, lon, known_lat, known_lon, known_plz) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Wie _majority_plz() für viele Punkte: häufigste PLZ unter den PLZ_NEIGHBOURS nächsten
+    bekannten Nachbarn (bis PLZ_MAX_DIST_M), bei Gleichstand die des nächsten. Liefert (plz, nr).
+    """
+    index = SpatialIndex(known_lat, known_lon, np.full(len(known_lat), ""),
+                         np.zeros(len(known_lat)), known_plz, np.full(len(known_lat), "osm"))
+    q, pos, dist = index.radius_many(lat, lon, PLZ_MAX_DIST_M)
+    pairs = pd.DataFrame({"q": q, "plz": index.plz[pos], "dist": dist}).sort_values(["q", "dist"], kind="stable")
+    pairs["rang"] = pairs.groupby("q").cumcount()
+    pairs = pairs[pairs["rang"] < PLZ_NEIGHBOURS]
+    stimmen = pairs.groupby(["q", "plz"], sort=False).agg(n=("rang", "size"), erster=("rang", "min")).reset_index()
+    sieger = stimmen.sort_values(["q", "n", "erster"], ascending=[True, False, True]).drop_duplicates("q")
+    return sieger["plz"].to_numpy(dtype=object), sieger["q"].to_numpy()
+
+
+def assign_plz(df: pd.DataFrame, polygons: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    PLZ je Zeile + Herkunft: "osm" (addr:postcode), "polygon", "nachbarn" oder "" (unbekannt).
+    Vorhandene PLZ bleiben unangetastet.
+    """
+    plz = df["plz"].fillna("").astype(str).to_numpy(dtype=object)
+    quelle = np.where(plz != "", "osm", "").astype(object)
+    lat = df["lat"].to_numpy(dtype="float64")
+    lon = df["lon"].to_numpy(dtype="float64")
+    offen = (plz == "") & ~(np.isnan(lat) | np.isnan(lon))
+
+    for code, rings in (polygons or {}).items():
+        idx = np.flatnonzero(offen)
+        if not len(idx):
+            break
+        hit = idx[points_in_rings(lon[idx], lat[idx], rings)]
+        plz[hit], quelle[hit] = code, "polygon"
+        offen[hit] = False
+
+    bekannt = np.flatnonzero(quelle == "osm")
+    if offen.any() and len(bekannt):
+        idx = np.flatnonzero(offen)
+        code, ziel = _majority_plz_many(lat[idx], lon[idx], lat[bekannt], lon[bekannt], plz[bekannt])
+        plz[idx[ziel]], quelle[idx[ziel]] = code, "nachbarn"
+    return plz.astype(str), quelle.astype(str)
+
+
+# ── Speicher ─────────────────────────────────────────────────────────────────
+
+def index_path(datum: str, store_dir: str = osm_store.OSM_STORE_DIR) -> str:
+    return f"{store_dir}/spatial_{datum}.npz"
+
+
+def build_index(df: pd.DataFrame, polygons: dict | None = None) -> SpatialIndex:
+    plz, quelle = assign_plz(df, polygons)
+    return SpatialIndex(df["lat"], df["lon"], df["osm_typ"].astype(str), df["osm_id"], plz, quelle)
+
+
+def _save_latest(index: SpatialIndex, datum: str, store_dir: str):
+    """Als einzigen Index des Speichers ablegen – ältere spatial_*.npz fliegen raus."""
+    path = index_path(datum, store_dir)
+    index.save(path)
+    for alt in glob.glob(index_path("*", store_dir)):
+        if alt != path:
+            os.remove(alt)
+
+
+def write_index(df: pd.DataFrame, datum: str, store_dir: str = osm_store.OSM_STORE_DIR) -> SpatialIndex:
+    """Index zum Snapshot eines Tages bauen und neben dem Snapshot ablegen – ältere Indizes weg."""
+    index = build_index(df, read_polygons(store_dir))
+    _save_latest(index, datum, store_dir)
+    load_index.cache_clear()
+    n_geo = int((index.plz_quelle != "osm").sum() - (index.plz_quelle == "").sum())
+    log.info(f"Raumindex {datum}: {len(index)} Punkte, {n_geo} PLZ ergänzt")
+    return index
+
+
+@lru_cache(maxsize=32)
+def load_index(datum: str | None = None, store_dir: str = osm_store.OSM_STORE_DIR) -> SpatialIndex | None:
+    """
+    Index zu einem Tag (Standard: letzter erfolgreicher Tag). Fehlt er – etwa für
+    Tage, die aus den CSVs importiert wurden –, wird er gebaut; abgelegt wird nur der
+    des neuesten Tages, ältere Tage bleiben im Speicher dieses Prozesses (lru_cache).
+    """
+    dates = osm_store.list_dates(store_dir)
+    if datum is None:
+        if not dates:
+            return None
+        datum = dates[-1]
+    path = index_path(datum, store_dir)
+    if os.path.exists(path):
+        return SpatialIndex.load(path)
+    if datum not in dates:
+        return None
+    df = osm_store.snapshot(datum, store_dir=store_dir)
+    index = build_index(df, read_polygons(store_dir))
+    if datum == dates[-1]:
+        _save_latest(index, datum, store_dir)
+    return index
+
+
+def with_plz(df: pd.DataFrame, index: SpatialIndex) -> pd.DataFrame:
+    """Snapshot-Frame um die zugeordnete PLZ ergänzen (Spalten plz_geo, plz_quelle)."""
+    keys = pd.DataFrame({"osm_typ": index.osm_typ, "osm_id": index.osm_id,
+                         "plz_geo": index.plz, "plz_quelle": index.plz_quelle})
+    out = df.assign(osm_typ=df["osm_typ"].astype(str)).merge(keys, on=["osm_typ", "osm_id"], how="left")
+    out["osm_typ"] = out["osm_typ"].astype("category")
+    return out
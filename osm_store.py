@@ -0,0 +1,354 @@
+"""
+OSM Snapshot-Speicher
+======================
+Spaltenbasierter, typisierter Speicher für die täglichen OSM-Snapshots:
+- Pro Tag nur die Änderungen (neu / entfernt / geändert), Schlüssel osm_typ + osm_id
+- Regelmäßige Voll-Checkpoints, damit die Rekonstruktion kurz bleibt
+- Feste Typen: Kategorien als category, lat/lon als float, osm_id als Integer
+- Snapshot für jedes beliebige Datum auf Abruf rekonstruieren
+
+Aufbau von output/osm_store/:
+    checkpoint_<datum>.parquet   ← vollständiger Snapshot (alle CHECKPOINT_INTERVAL Tage)
+    delta_<datum>.parquet        ← Änderungen ggü. dem vorherigen erfolgreichen Tag
+    stand.json                   ← OSM-Datenstand des letzten Laufs (für Diff-Abfragen)
+
+Jeder erfolgreiche Tag hat eine Delta-Datei (ggf. ohne Zeilen). Tage, an denen
+Overpass komplett ausgefallen ist, fehlen einfach – sie gelten als "keine Daten",
+nicht als "alles geschlossen".
+
+Frühere Läufe haben den ganzen Tag als output/osm_<datum>.csv abgelegt – diese Historie
+wird einmalig übernommen (sync_from_csv), neue Tages-CSVs schreibt der Collector nicht
+mehr. Das WordPress-Plugin liest die Kategorien aus output/index.json (loader.py),
+Google Sheets bekommt den Tages-Snapshot direkt vom Collector.
+
+Voraussetzungen:
+    pip install pandas pyarrow
+"""
+
+import os
+import glob
+import json
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+OUTPUT_DIR = "output"
+OSM_STORE_DIR = f"{OUTPUT_DIR}/osm_store"
+CHECKPOINT_INTERVAL = 30  # Voll-Snapshot spätestens nach so vielen erfolgreichen Tagen
+
+log = logging.getLogger(__name__)
+
+# ── Schema ───────────────────────────────────────────────────────────────────
+
+OSM_COLUMNS = [
+    "datum", "kategorie", "name", "typ", "strasse", "hausnummer",
+    "plz", "ort", "lat", "lon", "oeffnungszeiten", "website", "osm_id", "osm_typ",
+]
+
+CATEGORY_COLUMNS = ["kategorie", "typ", "osm_typ"]
+KEY = ["osm_typ", "osm_id"]
+VALUE_COLUMNS = [c for c in OSM_COLUMNS if c not in ("datum", "osm_typ", "osm_id")]
+
+AKTIONEN = ["neu", "entfernt", "geaendert"]
+
+SCHEMA = pa.schema([
+    ("datum",           pa.date32()),
+    ("kategorie",       pa.dictionary(pa.int32(), pa.string())),
+    ("name",            pa.string()),
+    ("typ",             pa.dictionary(pa.int32(), pa.string())),
+    ("strasse",         pa.string()),
+    ("hausnummer",      pa.string()),
+    ("plz",             pa.string()),   # String – Postleitzahlen sind keine Zahlen
+    ("ort",             pa.string()),
+    ("lat",             pa.float64()),
+    ("lon",             pa.float64()),
+    ("oeffnungszeiten", pa.string()),
+    ("website",         pa.string()),
+    ("osm_id",          pa.int64()),
+    ("osm_typ",         pa.dictionary(pa.int32(), pa.string())),
+])
+DELTA_SCHEMA = SCHEMA.append(pa.field("aktion", pa.dictionary(pa.int32(), pa.string())))
+
+
+def to_typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Bringt einen OSM-Frame (aus parse_osm_elements oder CSV) auf das Speicher-Schema."""
+    out = pd.DataFrame(index=df.index)
+    out["datum"] = pd.to_datetime(df["datum"])
+    for col in OSM_COLUMNS[1:]:
+        if col in CATEGORY_COLUMNS:
+            out[col] = df[col].fillna("–" if col == "typ" else "").astype(str).astype("category")
+        elif col in ("lat", "lon"):
+            out[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        elif col == "osm_id":
+            out[col] = pd.to_numeric(df[col], errors="coerce")
+        else:
+            out[col] = df[col].fillna("").astype(str)
+    # Elemente ohne ID lassen sich nicht verfolgen
+    out = out[out["osm_id"].notna()]
+    out["osm_id"] = out["osm_id"].astype("int64")
+    out = out.drop_duplicates(subset=KEY, keep="first")
+    return out.reset_index(drop=True)
+
+
+def _recategorise(df: pd.DataFrame) -> pd.DataFrame:
+    """pd.concat macht aus Kategorien mit unterschiedlichem Wertebereich object – zurückwandeln."""
+    for col in CATEGORY_COLUMNS + ["aktion"]:
+        if col in df.columns and df[col].dtype != "category":
+            df[col] = df[col].astype("category")
+    return df
+
+
+def sort_like_overpass(df: pd.DataFrame) -> pd.DataFrame:
+    """Overpass liefert erst Nodes, dann Ways, jeweils nach ID sortiert."""
+    order = df["osm_typ"].astype(str).map({"node": 0, "way": 1, "relation": 2}).fillna(3)
+    return (df.assign(_o=order.values)
+              .sort_values(["_o", "osm_id"], kind="stable")
+              .drop(columns="_o")
+              .reset_index(drop=True))
+
+
+# ── Dateien ──────────────────────────────────────────────────────────────────
+
+def _path(art: str, datum: str, store_dir: str) -> str:
+    return f"{store_dir}/{art}_{datum}.parquet"
+
+
+def _dates(art: str, store_dir: str) -> list[str]:
+    files = sorted(glob.glob(f"{store_dir}/{art}_*.parquet"))
+    return [os.path.basename(f)[len(art) + 1:-len(".parquet")] for f in files]
+
+
+def list_dates(store_dir: str = OSM_STORE_DIR) -> list[str]:
+    """Alle erfolgreich gesammelten Tage (ISO-Datum), aufsteigend."""
+    return _dates("delta", store_dir)
+
+
+def list_checkpoints(store_dir: str = OSM_STORE_DIR) -> list[str]:
+    return _dates("checkpoint", store_dir)
+
+
+def _write(df: pd.DataFrame, schema: pa.Schema, path: str):
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    tmp = f"{path}.tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)  # Atomar – ein abgebrochener Lauf hinterlässt keine halbe Datei
+
+
+def _read(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    df = pq.read_table(path, columns=columns).to_pandas(date_as_object=False)
+    if "datum" in df.columns:
+        df["datum"] = df["datum"].astype("datetime64[ns]")
+    return df
+
+
+# ── Delta-Berechnung ─────────────────────────────────────────────────────────
+
+def diff_snapshots(prev: pd.DataFrame, curr: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vergleicht zwei typisierte Snapshots über osm_typ + osm_id.
+    Ergebnis: Zeilen mit Spalte "aktion" –
+      neu       → Werte aus curr
+      entfernt  → letzte bekannte Werte aus prev (für Berichte mit Name/Adresse)
+      geaendert → neue Werte aus curr
+    """
+    p = prev.set_index(KEY)
+    c = curr.set_index(KEY)
+
+    neu_idx = c.index.difference(p.index)
+    weg_idx = p.index.difference(c.index)
+    gemeinsam = c.index.intersection(p.index)
+
+    pv = p.loc[gemeinsam, VALUE_COLUMNS].astype(object).to_numpy()
+    cv = c.loc[gemeinsam, VALUE_COLUMNS].astype(object).to_numpy()
+    gleich = (pv == cv) | (pd.isna(pv) & pd.isna(cv))
+    geaendert_idx = gemeinsam[~gleich.all(axis=1)]
+
+    teile = [
+        c.loc[neu_idx].assign(aktion="neu"),
+        p.loc[weg_idx].assign(aktion="entfernt"),
+        c.loc[geaendert_idx].assign(aktion="geaendert"),
+    ]
+    teile = [t for t in teile if len(t)]
+    delta = pd.concat(teile).reset_index() if teile else curr.iloc[:0].assign(aktion="")
+    delta["datum"] = curr["datum"].iloc[0] if len(curr) else pd.NaT
+    return _recategorise(delta[OSM_COLUMNS + ["aktion"]])
+
+
+def apply_delta(state: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """Wendet ein Tages-Delta auf einen Snapshot an (vektorisiert über den Index)."""
+    s = state.set_index(KEY)
+    d = delta.set_index(KEY)
+    weg = d.index[d["aktion"] == "entfernt"]
+    upsert = d[d["aktion"] != "entfernt"].drop(columns="aktion")
+    s = s.drop(index=weg.union(upsert.index), errors="ignore")
+    if len(upsert):
+        s = pd.concat([s, upsert])
+    return s.reset_index()
+
+
+# ── Schreiben ────────────────────────────────────────────────────────────────
+
+def write_snapshot(df: pd.DataFrame, datum: str, store_dir: str = OSM_STORE_DIR,
+                   prev: pd.DataFrame | None = None) -> str | None:
+    """
+    Speichert den Snapshot eines Tages als Delta zum vorherigen erfolgreichen Tag
+    (plus Checkpoint, wenn fällig). Ein erneuter Lauf am selben Tag ersetzt dessen Delta.
+    Leere Snapshots (Overpass komplett ausgefallen) werden nicht gespeichert.
+    `prev` erspart die Rekonstruktion des Vortags, wenn der Aufrufer ihn schon kennt.
+    """
+    if df.empty:
+        log.warning(f"OSM-Speicher: leerer Snapshot für {datum} – Tag gilt als fehlend")
+        return None
+
+    frueher = [d for d in list_dates(store_dir) if d < datum]
+    spaeter = [d for d in list_dates(store_dir) if d > datum]
+    if spaeter:
+        raise ValueError(f"OSM-Speicher: {datum} liegt vor dem letzten gespeicherten Tag {spaeter[-1]}")
+
+    os.makedirs(store_dir, exist_ok=True)
+    curr = to_typed(df.assign(datum=datum))
+
+    if frueher:
+        if prev is None:
+            prev = snapshot(frueher[-1], store_dir=store_dir)
+        delta = diff_snapshots(prev, curr)
+    else:
+        delta = _recategorise(curr.assign(aktion="neu"))
+
+    path = _path("delta", datum, store_dir)
+    _write(delta, DELTA_SCHEMA, path)
+
+    # Checkpoint, wenn seit dem letzten zu viele Tage vergangen sind
+    checkpoints = [c for c in list_checkpoints(store_dir) if c <= datum]
+    seit_checkpoint = [d for d in frueher if not checkpoints or d > checkpoints[-1]]
+    if not checkpoints or checkpoints[-1] == datum or len(seit_checkpoint) >= CHECKPOINT_INTERVAL - 1:
+        _write(curr, SCHEMA, _path("checkpoint", datum, store_dir))
+
+    zusammenfassung = delta["aktion"].value_counts().reindex(AKTIONEN, fill_value=0)
+    log.info(f"OSM-Speicher: {path} ({len(curr)} Einträge, "
+             + ", ".join(f"{k}: {v}" for k, v in zusammenfassung.items()) + ")")
+    return path
+
+
+# ── Rekonstruktion ───────────────────────────────────────────────────────────
+
+def iter_snapshots(start: str | None = None, end: str | None = None,
+                   store_dir: str = OSM_STORE_DIR):
+    """
+    Liefert (datum, snapshot) für jeden erfolgreichen Tag im Zeitraum.
+    Startet am letzten Checkpoint vor `start` und spielt die Deltas der Reihe nach ein.
+    """
+    dates = [d for d in list_dates(store_dir) if end is None or d <= end]
+    wanted = [d for d in dates if start is None or d >= start]
+    if not wanted:
+        return
+
+    basis = [c for c in list_checkpoints(store_dir) if c <= wanted[0]]
+    if not basis:
+        raise FileNotFoundError(f"OSM-Speicher: kein Checkpoint vor {wanted[0]} in {store_dir}")
+
+    state = _read(_path("checkpoint", basis[-1], store_dir))
+    for d in dates:
+        if d < basis[-1]:
+            continue
+        if d > basis[-1]:
+            state = apply_delta(state, _read(_path("delta", d, store_dir)))
+        if d >= wanted[0]:
+            yield d, sort_like_overpass(_recategorise(state.assign(datum=pd.Timestamp(d).as_unit("ns"))))
+
+
+def snapshot(datum: str | None = None, store_dir: str = OSM_STORE_DIR) -> pd.DataFrame:
+    """Rekonstruiert den Bestand am angegebenen Tag (Standard: letzter erfolgreicher Tag)."""
+    dates = [d for d in list_dates(store_dir) if datum is None or d <= datum]
+    if not dates:
+        return pd.DataFrame(columns=OSM_COLUMNS)
+    for _, snap in iter_snapshots(dates[-1], dates[-1], store_dir):
+        return snap[OSM_COLUMNS]
+    return pd.DataFrame(columns=OSM_COLUMNS)
+
+
+def load_history(start: str | None = None, end: str | None = None,
+                 columns: list[str] | None = None,
+                 store_dir: str = OSM_STORE_DIR) -> pd.DataFrame:
+    """Materialisiert alle Snapshots zwischen start und end (jeweils inklusive) als ein Frame."""
+    columns = columns or OSM_COLUMNS
+    frames = [snap[columns] for _, snap in iter_snapshots(start, end, store_dir)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return _recategorise(pd.concat(frames, ignore_index=True))
+
+
+def load_changes(start: str | None = None, end: str | None = None,
+                 columns: list[str] | None = None,
+                 store_dir: str = OSM_STORE_DIR) -> pd.DataFrame:
+    """Änderungsprotokoll (alle Deltas im Zeitraum) – klein, auch bei langer Historie."""
+    columns = columns or OSM_COLUMNS + ["aktion"]
+    dates = [d for d in list_dates(store_dir)
+             if (start is None or d >= start) and (end is None or d <= end)]
+    if not dates:
+        return pd.DataFrame(columns=columns)
+    dataset = ds.dataset([_path("delta", d, store_dir) for d in dates],
+                         schema=DELTA_SCHEMA, format="parquet")
+    df = dataset.to_table(columns=columns).to_pandas(date_as_object=False)
+    if "datum" in df.columns:
+        df["datum"] = df["datum"].astype("datetime64[ns]")
+    return df
+
+
+# ── Datenstand ───────────────────────────────────────────────────────────────
+
+def read_stand(store_dir: str = OSM_STORE_DIR) -> dict:
+    """
+    Datenstand des letzten gespeicherten Laufs:
+      datum             – Tag des Snapshots
+      osm_base          – Zeitstempel der OSM-Daten laut Overpass
+      letzte_vollabfrage – Tag der letzten kompletten (nicht inkrementellen) Abfrage
+    """
+    path = f"{store_dir}/stand.json"
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_stand(stand: dict, store_dir: str = OSM_STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    path = f"{store_dir}/stand.json"
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(stand, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+# ── Nachfüllen aus den Tages-CSVs ────────────────────────────────────────────
+
+def sync_from_csv(csv_dir: str = OUTPUT_DIR, store_dir: str = OSM_STORE_DIR) -> int:
+    """
+    Übernimmt alle osm_<datum>.csv nach dem letzten gespeicherten Tag in den Speicher.
+    Beim ersten Lauf wird die komplette Historie einmalig konvertiert,
+    danach kostet der Abgleich nur noch ein Verzeichnislisting.
+    Muss vor dem ersten write_snapshot laufen (collector.collect_osm): frühere Tage als
+    der letzte gespeicherte lassen sich nicht mehr einfügen.
+    """
+    dates = list_dates(store_dir)
+    letzter = dates[-1] if dates else ""
+    prev = None
+    neu = verpasst = 0
+    for path in sorted(glob.glob(f"{csv_dir}/osm_*.csv")):
+        datum = os.path.basename(path)[len("osm_"):-len(".csv")]
+        if datum <= letzter:
+            verpasst += datum < dates[0]
+            continue
+        df = pd.read_csv(path, dtype=str, encoding="utf-8-sig", keep_default_na=False)
+        if df.empty:
+            continue
+        if write_snapshot(df, datum, store_dir, prev=prev):
+            prev = to_typed(df.assign(datum=datum))
+            neu += 1
+    if neu:
+        log.info(f"OSM-Speicher: {neu} Tages-CSVs übernommen")
+    if verpasst:
+        log.warning(f"OSM-Speicher: {verpasst} Tages-CSVs vor {dates[0]} fehlen im Speicher – "
+                    f"für die Historie {store_dir} löschen und neu aufbauen")
+    return neu
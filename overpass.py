@@ -0,0 +1,491 @@
+"""
+Overpass-Client
+================
+Gemeinsame Bausteine für die OSM-Abfragen in collector.py:
+- HTTP-Antwort wird gestreamt und Element für Element geparst –
+  die komplette JSON-Antwort liegt nie als Ganzes im Speicher
+- Freie Abfrage-Slots des Servers abfragen (/api/status), bevor parallel gefragt wird
+- Augmented Diffs ([adiff:...]) gestreamt lesen – nur was sich seit dem letzten Lauf geändert hat
+- Eine Retry-Regel für alle Abfragen: exponentielles Backoff mit Jitter, festes Zeitbudget,
+  Wechsel zwischen mehreren Overpass-Servern (schnellster gesunder zuerst, siehe MIRROR_STATS_PATH)
+- Jede Antwort wird beim Lesen gzip-komprimiert in den Rohdaten-Cache geschrieben
+  (CACHE_DIR/<datum>/<hash der abfrage>.gz) – Nachverarbeitung und overpass_replay.py lesen von dort
+
+Voraussetzungen:
+    pip install requests
+"""
+
+import os
+import glob
+import gzip
+import hashlib
+import json
+import codecs
+import shutil
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+import xml.etree.ElementTree as ET
+import requests
+
+USER_AGENT = "RuhrFinds-DataBot/1.0 (research; contact@ruhrfinds.de)"
+CHUNK_SIZE = 64 * 1024
+
+MIRRORS = [
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+    "https://overpass.private.coffee/api/interpreter",
+]
+# Latenz/Fehler je Server, über Läufe hinweg – im Cache (actions/cache), nicht im täglichen Commit
+MIRROR_STATS_PATH = "cache/overpass/mirrors.json"
+REQUEST_TIMEOUT = 90     # Sekunden je Versuch – für die ganze Antwort, nicht nur je Lesevorgang
+SLOT_WAIT_MAX = 120      # Höchstens so lange auf einen Slot warten, auch ohne Zeitbudget
+BACKOFF_BASE = 5        # Sekunden – verdoppelt sich pro Versuch ...
+BACKOFF_MAX = 60        # ... bis höchstens hierhin (gewartet wird zufällig 0..Grenze)
+LATENCY_ALPHA = 0.3     # Gewicht des neuesten Laufs im gleitenden Latenz-Mittel
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+CACHE_DIR = os.getenv("OVERPASS_CACHE_DIR", "cache/overpass")  # Leer = keine Rohdaten ablegen
+CACHE_KEEP_DAYS = 30
+
+log = logging.getLogger(__name__)
+
+_WS = re.compile(r"[\s,]*")
+_ELEMENTS = re.compile(r'"elements"\s*:\s*\[')
+_REMARK = re.compile(r'"remark"\s*:\s*("(?:[^"\\]|\\.)*")')
+_SLOTS_NOW = re.compile(r"(\d+) slots? available now")
+_SLOT_AFTER = re.compile(r"Slot available after: \S+, in (-?\d+) seconds")
+
+
+class OverpassError(Exception):
+    """Overpass hat geantwortet, aber keine vollständigen Daten geliefert."""
+
+
+def post(url: str, query: str, timeout: int = 90) -> requests.Response:
+    """Schickt eine Overpass-Abfrage ab; der Body wird erst beim Lesen übertragen."""
+    response = requests.post(
+        url,
+        data={"data": query},
+        timeout=timeout,
+        headers={"User-Agent": USER_AGENT},
+        stream=True,
+    )
+    response.raise_for_status()
+    return response
+
+
+def _iter_text(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_elements(response: requests.Response, meta: dict | None = None):
+    """
+    Liefert die Einträge aus "elements" einzeln, während der Body noch ankommt.
+    Kopfdaten (u.a. osm3s.timestamp_osm_base) landen – falls übergeben – in `meta`.
+    Meldet Overpass am Ende einen Laufzeitfehler ("remark"), gibt es eine OverpassError.
+    """
+    decoder = json.JSONDecoder()
+    texts = _iter_text(response.iter_content(chunk_size=CHUNK_SIZE))
+    buf = ""
+
+    # 1. Kopf bis zum Beginn des elements-Arrays
+    for text in texts:
+        buf += text
+        m = _ELEMENTS.search(buf)
+        if m:
+            if meta is not None:
+                kopf = json.loads(buf[:m.start()] + '"elements": []}')
+                kopf.pop("elements")
+                meta.update(kopf)
+            buf = buf[m.end():]
+            break
+    else:
+        raise OverpassError("Antwort enthält kein elements-Array")
+
+    # 2. Ein Objekt nach dem anderen dekodieren, Puffer dabei laufend kürzen
+    pos = 0
+    exhausted = False
+    while True:
+        pos = _WS.match(buf, pos).end()
+        if pos < len(buf) and buf[pos] == "]":
+            buf = buf[pos + 1:]
+            break
+        try:
+            element, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise OverpassError("Antwort endet mitten in einem Element")
+            try:
+                buf = buf[pos:] + next(texts)
+            except StopIteration:
+                exhausted = True
+            pos = 0
+            continue
+        yield element
+        pos = end
+
+    # 3. Rest der Antwort – Overpass meldet Timeouts nachträglich als "remark"
+    rest = buf + "".join(texts)
+    m = _REMARK.search(rest)
+    if m:
+        remark = json.loads(m.group(1))
+        if meta is not None:
+            meta["remark"] = remark
+        if "error" in remark.lower():
+            raise OverpassError(remark)
+
+
+# ── Augmented Diffs ──────────────────────────────────────────────────────────
+
+def _xml_element(el: ET.Element) -> dict:
+    """OSM-Element aus dem XML-Format in dieselbe Form wie bei [out:json] bringen."""
+    d = {"type": el.tag, "id": int(el.get("id"))}
+    if el.get("lat") is not None:
+        d["lat"] = float(el.get("lat"))
+        d["lon"] = float(el.get("lon"))
+    center = el.find("center")
+    if center is not None:
+        d["center"] = {"lat": float(center.get("lat")), "lon": float(center.get("lon"))}
+    tags = {t.get("k"): t.get("v") for t in el.findall("tag")}
+    if tags:
+        d["tags"] = tags
+    if el.get("timestamp"):
+        d["timestamp"] = el.get("timestamp")
+    return d
+
+
+def iter_adiff(response: requests.Response, meta: dict | None = None):
+    """
+    Liest einen Augmented Diff ([out:xml][adiff:...]) gestreamt und liefert pro Änderung
+    (aktion, element): "create"/"modify" mit der neuen Version, "delete" mit der alten.
+    Overpass liefert Diffs nur als XML; osm_base landet – falls übergeben – in `meta`.
+    """
+    response.raw.decode_content = True
+    root = None
+    action = side = None
+    versions = {}
+    for event, el in ET.iterparse(response.raw, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = el
+            elif el.tag == "action":
+                action, versions = el.get("type"), {}
+            elif el.tag in ("old", "new"):
+                side = el.tag
+            continue
+
+        if el.tag in ("node", "way", "relation") and action:
+            versions[side or "new"] = _xml_element(el)
+        elif el.tag in ("old", "new"):
+            side = None
+        elif el.tag == "action":
+            element = versions.get("old") if action == "delete" else versions.get("new")
+            if element is not None:
+                yield action, element
+            action = None
+            root.clear()  # Verarbeitete Aktionen sofort freigeben
+        elif el.tag == "meta" and meta is not None:
+            meta["osm_base"] = el.get("osm_base")
+        elif el.tag == "remark" and "error" in (el.text or "").lower():
+            raise OverpassError(el.text.strip())
+
+
+# ── Server-Auswahl und Retry ─────────────────────────────────────────────────
+
+_stats_lock = threading.Lock()
+
+
+def load_mirror_stats(path: str = MIRROR_STATS_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def record_mirror(url: str, sekunden: float | None = None, fehler: str | None = None,
+                  path: str = MIRROR_STATS_PATH):
+    """Ergebnis einer Abfrage festhalten: Dauer bei Erfolg, sonst die Fehlermeldung."""
+    with _stats_lock:
+        stats = load_mirror_stats(path)
+        s = stats.setdefault(url, {"latenz_s": None, "erfolge": 0, "fehler": 0, "fehler_in_folge": 0})
+        if fehler is None:
+            alt = s["latenz_s"]
+            s["latenz_s"] = round(sekunden if alt is None else alt + LATENCY_ALPHA * (sekunden - alt), 2)
+            s["erfolge"] += 1
+            s["fehler_in_folge"] = 0
+            s["zuletzt_ok"] = datetime.now().isoformat(timespec="seconds")
+        else:
+            s["fehler"] += 1
+            s["fehler_in_folge"] += 1
+            s["letzter_fehler"] = fehler[:200]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+
+def rank_mirrors(mirrors: list[str], path: str = MIRROR_STATS_PATH) -> list[str]:
+    """Gesunde Server nach Latenz, dann unbekannte, zuletzt die mit Fehlern in Folge."""
+    stats = load_mirror_stats(path)
+
+    def key(url):
+        s = stats.get(url, {})
+        latenz = s.get("latenz_s")
+        return (s.get("fehler_in_folge", 0), latenz is None, latenz or 0.0)
+
+    return sorted(mirrors, key=key)  # Stabil – bei Gleichstand gilt die konfigurierte Reihenfolge
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, requests.HTTPError):
+        return e.response is not None and e.response.status_code in RETRY_STATUS
+    return isinstance(e, (requests.RequestException, OverpassError))
+
+
+def request(query: str, consume, mirrors: list[str] | None = None, versuche: int = 4,
+            deadline: float | None = None, label: str = ""):
+    """
+    Schickt `query` ab und gibt zurück, was `consume(response)` liefert – oder None.
+    Jeder Versuch geht an den nächsten Server der Rangliste; dazwischen exponentielles
+    Backoff mit Jitter. Nichts (weder Warten noch Timeout) reicht über `deadline` hinaus.
+    """
+    order = rank_mirrors(mirrors or MIRRORS)
+    for versuch in range(versuche):
+        url = order[versuch % len(order)]
+        rest = None if deadline is None else deadline - time.monotonic()
+        if rest is not None and rest < 5:
+            log.warning(f"Overpass [{label}]: Zeitbudget aufgebraucht")
+            return None
+        if not wait_for_slot(url, deadline):
+            log.info(f"Overpass [{label}]: kein Slot rechtzeitig frei bei {url} – nächster Server")
+            continue
+
+        log.info(f"Overpass [{label}]: Versuch {versuch + 1}/{versuche} über {url}")
+        start = time.monotonic()
+        try:
+            timeout = REQUEST_TIMEOUT if rest is None else min(REQUEST_TIMEOUT, rest)
+            with post(url, query, timeout=timeout) as response, _caching(response, query) as response:
+                result = consume(_Bounded(response, start + timeout))
+        except Exception as e:
+            record_mirror(url, fehler=f"{type(e).__name__}: {e}")
+            if not _retryable(e):
+                log.error(f"Overpass [{label}]: {e} – kein erneuter Versuch")
+                return None
+            log.warning(f"Overpass [{label}]: Versuch {versuch + 1} fehlgeschlagen: {e}")
+            pause = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** versuch))
+            if versuch + 1 < versuche:
+                if deadline is not None and time.monotonic() + pause >= deadline:
+                    return None
+                time.sleep(pause)
+            continue
+
+        record_mirror(url, sekunden=time.monotonic() - start)
+        return result
+    return None
+
+
+class _Bounded:
+    """
+    Bricht das Lesen der Antwort ab, sobald `stop` (time.monotonic) erreicht ist – der
+    requests-Timeout gilt nur je Lesevorgang, ein tröpfelnder Body käme sonst beliebig spät
+    an. Überzogen wird höchstens um einen Lesevorgang.
+    """
+
+    def __init__(self, response, stop: float):
+        self._response, self._stop = response, stop
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def check(self):
+        if time.monotonic() > self._stop:
+            raise requests.Timeout("Antwort nicht innerhalb des Zeitbudgets gelesen")
+
+    def iter_content(self, chunk_size: int = CHUNK_SIZE):
+        for chunk in self._response.iter_content(chunk_size=chunk_size):
+            self.check()
+            yield chunk
+
+    @property
+    def raw(self):
+        return _BoundedRaw(self._response.raw, self)
+
+
+class _BoundedRaw:
+    """Wie _Bounded, für Leser, die direkt aus response.raw lesen (iter_adiff)."""
+
+    def __init__(self, raw, bounded: _Bounded):
+        raw.decode_content = True
+        self._raw, self._bounded = raw, bounded
+        self.decode_content = True
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self._bounded.check()
+        return data
+
+
+# ── Rohdaten-Cache ───────────────────────────────────────────────────────────
+
+def query_hash(query: str) -> str:
+    """Schlüssel einer Abfrage – Einrückung und Zeilenumbrüche zählen nicht."""
+    return hashlib.sha256(" ".join(query.split()).encode()).hexdigest()[:16]
+
+
+def cache_path(query: str, datum: str | None = None, cache_dir: str = CACHE_DIR) -> str:
+    return f"{cache_dir}/{datum or date.today().isoformat()}/{query_hash(query)}.gz"
+
+
+class _Tee:
+    """Reicht die Antwort an den Parser durch und schreibt dabei jedes Byte komprimiert mit."""
+
+    def __init__(self, response: requests.Response, path: str):
+        self._response = response
+        self._path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._gz = gzip.open(f"{path}.tmp", "wb", compresslevel=6)
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size: int = CHUNK_SIZE):
+        for chunk in self._response.iter_content(chunk_size=chunk_size):
+            self._gz.write(chunk)
+            yield chunk
+
+    @property
+    def raw(self):
+        return _TeeRaw(self._response.raw, self._gz)
+
+    def close(self, keep: bool):
+        self._gz.close()
+        if keep:
+            os.replace(f"{self._path}.tmp", self._path)
+        else:
+            os.remove(f"{self._path}.tmp")
+
+
+class _TeeRaw:
+    """Wie _Tee, für Leser, die direkt aus response.raw lesen (iter_adiff)."""
+
+    def __init__(self, raw, gz):
+        raw.decode_content = True
+        self._raw, self._gz = raw, gz
+        self.decode_content = True
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self._gz.write(data)
+        return data
+
+
+@contextmanager
+def _caching(response: requests.Response, query: str):
+    """Antwort nur ablegen, wenn sie vollständig verarbeitet wurde."""
+    if not CACHE_DIR:
+        yield response
+        return
+    tee = _Tee(response, cache_path(query))
+    try:
+        yield tee
+    except BaseException:
+        tee.close(keep=False)
+        raise
+    tee.close(keep=True)
+    with open(cache_path(query)[:-len(".gz")] + ".query", "w", encoding="utf-8") as f:
+        f.write(query)  # Für Nachverarbeitung: welche Abfrage steckt hinter dem Hash
+
+
+def find_cached(query: str, datum: str | None = None, cache_dir: str = CACHE_DIR) -> str | None:
+    """Pfad der abgelegten Antwort – vom angegebenen Tag, sonst die neueste."""
+    if datum:
+        path = cache_path(query, datum, cache_dir)
+        return path if os.path.exists(path) else None
+    paths = sorted(glob.glob(f"{cache_dir}/*/{query_hash(query)}.gz"))
+    return paths[-1] if paths else None
+
+
+class CachedResponse:
+    """Abgelegte Antwort mit derselben Schnittstelle wie eine gestreamte requests.Response."""
+
+    status_code = 200
+
+    def __init__(self, path: str):
+        self.raw = gzip.open(path, "rb")
+        self.raw.decode_content = True
+
+    def iter_content(self, chunk_size: int = CHUNK_SIZE):
+        while chunk := self.raw.read(chunk_size):
+            yield chunk
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def prune_cache(keep_days: int = CACHE_KEEP_DAYS, cache_dir: str = CACHE_DIR):
+    """Tage älter als keep_days aus dem Cache löschen."""
+    grenze = (date.today() - timedelta(days=keep_days)).isoformat()
+    for day_dir in glob.glob(f"{cache_dir}/*/"):
+        if os.path.basename(day_dir.rstrip("/")) < grenze:
+            shutil.rmtree(day_dir, ignore_errors=True)
+
+
+# ── Slot-Verwaltung ──────────────────────────────────────────────────────────
+
+def status_url(url: str) -> str:
+    return url.rsplit("/", 1)[0] + "/status"
+
+
+def slot_wait(url: str) -> float:
+    """
+    Sekunden bis zum nächsten freien Abfrage-Slot laut /api/status (0 = sofort frei).
+    Ist der Status nicht abrufbar, wird nicht gewartet – Overpass antwortet dann ggf. mit 429.
+    """
+    try:
+        text = requests.get(status_url(url), timeout=10,
+                            headers={"User-Agent": USER_AGENT}).text
+    except requests.RequestException:
+        return 0.0
+    if _SLOTS_NOW.search(text):
+        return 0.0
+    waits = [int(w) for w in _SLOT_AFTER.findall(text)]
+    return float(max(min(waits), 0)) if waits else 0.0
+
+
+def wait_for_slot(url: str, deadline: float | None = None) -> bool:
+    """
+    Wartet auf einen freien Slot. False, wenn das vor `deadline` (time.monotonic) nicht
+    klappt – ohne deadline wird höchstens SLOT_WAIT_MAX Sekunden gewartet.
+    """
+    limit = time.monotonic() + SLOT_WAIT_MAX
+    if deadline is not None:
+        limit = min(limit, deadline)
+    while True:
+        wait = slot_wait(url)
+        if wait <= 0:
+            return True
+        if time.monotonic() + wait > limit:
+            return False
+        log.info(f"Overpass: kein freier Slot – warte {wait:.0f}s")
+        time.sleep(wait + 1)
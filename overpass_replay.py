@@ -0,0 +1,113 @@
+"""
+Overpass-Replay
+================
+Lokaler Ersatz für einen Overpass-Server: beantwortet Abfragen aus dem
+Rohdaten-Cache (overpass.CACHE_DIR) statt aus dem Netz. Damit laufen
+collect_osm() / fetch_osm_data_all() komplett durch – für Tests, Benchmarks,
+Backfills und Parser-Änderungen mit echten Antworten, ohne overpass-api.de.
+
+    python overpass_replay.py                        # Port 8765, jeweils neueste Antwort
+    python overpass_replay.py --datum 2026-10-01     # Stand eines bestimmten Tages
+    python overpass_replay.py --delay 2              # Langsamen Server simulieren
+
+    OSM_OVERPASS_MIRRORS=http://localhost:8765/api/interpreter OVERPASS_CACHE_DIR= python collector.py
+
+- POST/GET /api/interpreter  → abgelegte Antwort (gzip, wie vom Server), sonst 404
+- GET /api/status            → immer freie Slots
+
+Voraussetzungen:
+    nur Standardbibliothek (+ overpass.py)
+"""
+
+import os
+import argparse
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import overpass
+
+log = logging.getLogger(__name__)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    cache_dir = overpass.CACHE_DIR
+    datum = None
+    delay = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/status"):
+            body = b"Connected as: 127.0.0.1\nRate limit: 2\n2 slots available now.\nCurrently running queries:\n"
+            self._send(200, body, "text/plain")
+        elif url.path.endswith("/interpreter"):
+            self._replay(parse_qs(url.query).get("data", [""])[0])
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        self._replay(form.get("data", [""])[0])
+
+    def _replay(self, query: str):
+        path = overpass.find_cached(query, self.datum, self.cache_dir)
+        if path is None:
+            log.warning(f"Replay: keine Antwort für {overpass.query_hash(query)}")
+            self._send(404, b"query not in cache", "text/plain")
+            return
+        time.sleep(self.delay)
+        with open(path, "rb") as f:
+            kind = "application/osm3s+xml" if _first_byte(path) == b"<" else "application/json"
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.end_headers()
+            while chunk := f.read(overpass.CHUNK_SIZE):
+                self.wfile.write(chunk)
+
+    def _send(self, status: int, body: bytes, kind: str):
+        self.send_response(status)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        log.info(f"Replay: {fmt % args}")
+
+
+def _first_byte(path: str) -> bytes:
+    with overpass.CachedResponse(path) as r:
+        return r.raw.read(64).lstrip()[:1]
+
+
+def serve(port: int = 8765, datum: str | None = None, delay: float = 0.0,
+          cache_dir: str = overpass.CACHE_DIR) -> ThreadingHTTPServer:
+    """Server anlegen (noch nicht starten) – für Tests: serve(0) und server.server_address."""
+    handler = type("Handler", (ReplayHandler,), {"cache_dir": cache_dir, "datum": datum, "delay": delay})
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overpass-Antworten aus dem lokalen Cache ausliefern")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--datum", help="Antworten dieses Tages (Standard: jeweils neueste)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Sekunden Verzögerung pro Antwort")
+    parser.add_argument("--cache-dir", default=overpass.CACHE_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    server = serve(args.port, args.datum, args.delay, args.cache_dir)
+    log.info(f"Overpass-Replay auf http://127.0.0.1:{server.server_address[1]}/api/interpreter "
+             f"({args.cache_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
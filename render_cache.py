@@ -0,0 +1,113 @@
+"""
+Render-Cache
+=============
+Überspringt Plots und Reports, deren Eingaben sich nicht geändert haben:
+- Fingerabdruck aus Eingabedaten (DataFrames inhaltlich gehasht), Render-Einstellungen
+  (Matplotlib-rcParams, zusätzliche settings wie das Datum) und dem Code der Funktion
+- Existiert das Ergebnis des letzten Laufs mit gleichem Fingerabdruck noch, wird nicht
+  neu gerendert – die Datei bleibt unverändert (kein Git-Diff beim täglichen Commit)
+- Das Manifest reports/.render_cache.json enthält je Artefakt nur Fingerabdruck und Pfad –
+  es ändert sich nur, wenn wirklich neu gerendert wurde; Treffer/Fehlschläge je Lauf
+  landen im Log (log_run)
+
+Voraussetzungen:
+    pip install pandas matplotlib
+"""
+
+import os
+import json
+import hashlib
+import inspect
+import logging
+import numpy as np
+import pandas as pd
+
+CACHE_MANIFEST = "reports/.render_cache.json"
+
+log = logging.getLogger(__name__)
+
+
+# ── Fingerabdruck ────────────────────────────────────────────────────────────
+
+def _feed(h, obj):
+    """Schreibt obj deterministisch in den Hash (rekursiv für Listen/Dicts)."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"df" + repr((list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+        if len(obj):
+            h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(b"s" + repr((obj.name, str(obj.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(b"a" + repr((obj.dtype.str, obj.shape)).encode() + np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for k in sorted(obj, key=str):
+            _feed(h, k)
+            _feed(h, obj[k])
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _feed(h, item)
+        h.update(b"]")
+    else:
+        h.update(repr(obj).encode())
+
+
+def _code(fn) -> str:
+    try:
+        return inspect.getsource(fn)
+    except (OSError, TypeError):
+        return repr(fn.__code__.co_code)
+
+
+def fingerprint(fn, args: tuple, settings: dict | None = None) -> str:
+    import matplotlib
+    h = hashlib.sha256()
+    _feed(h, [artifact_key(fn), _code(fn), matplotlib.__version__,
+              sorted((k, repr(v)) for k, v in matplotlib.rcParams.items()), settings or {}])
+    for arg in args:
+        _feed(h, arg)
+    return h.hexdigest()[:24]
+
+
+# ── Manifest ─────────────────────────────────────────────────────────────────
+
+def load_manifest(path: str = CACHE_MANIFEST) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"artefakte": {}}
+
+
+def save_manifest(manifest: dict, path: str = CACHE_MANIFEST):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"artefakte": manifest["artefakte"]}, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def artifact_key(fn) -> str:
+    """Modul + Funktion – gleich, ob das Modul als Skript (__main__) oder importiert läuft."""
+    return f"{os.path.splitext(os.path.basename(fn.__code__.co_filename))[0]}.{fn.__qualname__}"
+
+
+def lookup(manifest: dict, fn, fp: str) -> str | None:
+    """Pfad des vorhandenen Ergebnisses, wenn der Fingerabdruck passt und die Datei noch da ist."""
+    eintrag = manifest["artefakte"].get(artifact_key(fn))
+    if eintrag and eintrag["fingerabdruck"] == fp and eintrag["pfad"] and os.path.exists(eintrag["pfad"]):
+        return eintrag["pfad"]
+    return None
+
+
+def remember(manifest: dict, fn, fp: str, path: str | None):
+    if path:
+        manifest["artefakte"][artifact_key(fn)] = {"fingerabdruck": fp, "pfad": path}
+
+
+def log_run(treffer: list[str], neu: list[str]):
+    """Treffer (übersprungen) und Fehlschläge (neu gerendert) dieses Laufs ins Log."""
+    log.info(f"Render-Cache: {len(treffer)} unverändert übersprungen, {len(neu)} neu gerendert"
+             + (f" ({', '.join(neu)})" if neu else ""))
@@ -0,0 +1,90 @@
+"""
+Render-Pool
+============
+Verteilt unabhängige Plot-Jobs auf mehrere Prozesse, statt sie nacheinander zu rendern:
+- Jeder Worker rendert headless (Matplotlib-Backend Agg)
+- Ein Job ist eine Funktion auf Modulebene + Argumente und liefert den Ausgabepfad
+- Pro Plot wird die Renderzeit gemessen und am Ende ausgegeben
+- Scheitert ein Plot, laufen die anderen trotzdem durch
+- Plots mit unveränderten Eingaben werden gar nicht erst verteilt (render_cache)
+
+Mehr Charts oder Städte skalieren damit mit den Kernen, nicht mit der Anzahl Charts.
+RENDER_WORKERS=1 rendert alles im eigenen Prozess (z.B. zum Debuggen).
+
+Voraussetzungen:
+    pip install matplotlib
+"""
+
+import os
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import render_cache
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", os.cpu_count() or 1))
+
+log = logging.getLogger(__name__)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+
+def _render(fn, args: tuple) -> tuple[str | None, float, str | None]:
+    start = time.perf_counter()
+    try:
+        path = fn(*args)
+        fehler = None
+    except Exception as e:  # Ein kaputter Plot soll die anderen nicht mitreißen
+        path, fehler = None, f"{type(e).__name__}: {e}"
+    return path, time.perf_counter() - start, fehler
+
+
+def render_all(jobs: list[tuple], workers: int = RENDER_WORKERS,
+               settings: dict | None = None) -> dict[str, dict]:
+    """
+    Rendert alle Jobs – je Job ein Tupel (funktion, arg1, arg2, ...) – parallel.
+    `settings` fließt in den Fingerabdruck ein (z.B. das Datum, wenn es im Titel steht).
+    Rückgabe: {funktionsname: {"pfad", "sekunden", "fehler", "cache"}} in Job-Reihenfolge.
+    """
+    start = time.perf_counter()
+    manifest = render_cache.load_manifest()
+    fps = [render_cache.fingerprint(fn, tuple(args), settings) for fn, *args in jobs]
+    cached = [render_cache.lookup(manifest, fn, fp) for (fn, *_), fp in zip(jobs, fps)]
+    todo = [i for i, path in enumerate(cached) if path is None]
+
+    workers = max(1, min(workers, len(todo)))
+    if workers == 1:
+        rendered = [_render(jobs[i][0], tuple(jobs[i][1:])) for i in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, jobs[i][0], tuple(jobs[i][1:])) for i in todo]
+            rendered = [f.result() for f in futures]
+    results = {i: r for i, r in zip(todo, rendered)}
+
+    report = {}
+    for i, ((fn, *_), fp) in enumerate(zip(jobs, fps)):
+        if i in results:
+            path, sekunden, fehler = results[i]
+            render_cache.remember(manifest, fn, fp, path)
+        else:
+            path, sekunden, fehler = cached[i], 0.0, None
+        report[fn.__name__] = {"pfad": path, "sekunden": round(sekunden, 2), "fehler": fehler,
+                               "cache": i not in results}
+        if fehler:
+            print(f"✗ {fn.__name__}: {fehler}")
+
+    keys = [render_cache.artifact_key(fn) for fn, *_ in jobs]
+    render_cache.log_run([k for i, k in enumerate(keys) if i not in results], [keys[i] for i in todo])
+    render_cache.save_manifest(manifest)
+
+    gesamt = time.perf_counter() - start
+    summe = sum(r["sekunden"] for r in report.values())
+    print(f"\n⏱ Rendern: {len(todo)} von {len(jobs)} Plots in {gesamt:.1f}s "
+          f"({workers} Prozess(e), Summe {summe:.1f}s)")
+    for name, r in report.items():
+        dauer = "unverändert" if r["cache"] else f"{r['sekunden']:.2f}s"
+        print(f"   {name:<28} {dauer:>11}")
+    return report
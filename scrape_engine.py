@@ -0,0 +1,283 @@
+"""
+Scrape-Engine
+==============
+Holt viele Seiten gleichzeitig und bleibt dabei höflich zu jedem einzelnen Server:
+- Abruf in einem Thread-Pool (SCRAPE_WORKERS), alle Quellen starten sofort
+- Pro Host höchstens HOST_CONCURRENCY gleichzeitige Anfragen und HOST_DELAY Sekunden
+  zwischen zwei Anfragen an denselben Host – verschiedene Hosts warten nicht aufeinander
+- Geparst wird in einem Prozess-Pool (SCRAPE_PARSE_WORKERS), sobald eine Seite da ist –
+  HTML-Parsing blockiert damit weder die Downloads noch die anderen Quellen
+- Scheitert eine Quelle (Timeout, HTTP-Fehler, Parser), laufen die anderen weiter
+- Abrufe laufen über http_cache – unveränderte Seiten kommen per 304 von der Platte
+- crawl(): Folgeseiten (Blättern, Detailseiten) über eine Frontier – jede URL nur
+  einmal, Seitenbudget und Zeitbudget je Lauf
+
+Die Gesamtdauer richtet sich damit nach der langsamsten Quelle bzw. dem vollsten Host,
+nicht nach der Summe aller Quellen. SCRAPE_PARSE_WORKERS=1 parst im eigenen Prozess
+(z.B. zum Debuggen).
+
+Voraussetzungen:
+    pip install requests
+"""
+
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from urllib.parse import urlparse, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_cache
+
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", 16))
+SCRAPE_PARSE_WORKERS = int(os.getenv("SCRAPE_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+HOST_CONCURRENCY = 2
+HOST_DELAY = float(os.getenv("SCRAPE_HOST_DELAY", 2.0))  # Sekunden zwischen Anfragen an denselben Host
+REQUEST_TIMEOUT = 15
+
+HEADERS = {
+    "User-Agent":      "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept-Language": "de-DE,de;q=0.9",
+    "Accept":          "text/html,application/xhtml+xml",
+}
+
+log = logging.getLogger(__name__)
+
+
+# ── Höflichkeit je Host ──────────────────────────────────────────────────────
+
+class HostLimiter:
+    """Gleichzeitige Anfragen und Mindestabstand je Host (netloc) begrenzen – threadsicher."""
+
+    def __init__(self, concurrency: int = HOST_CONCURRENCY, delay: float = HOST_DELAY):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.Semaphore] = {}
+        self._next: dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.Semaphore(self.concurrency))
+        with sem:
+            with self._lock:
+                # Startzeit reservieren, dann außerhalb des Locks warten
+                now = time.monotonic()
+                start = max(now, self._next.get(host, now))
+                self._next[host] = start + self.delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def session(pool_size: int = SCRAPE_WORKERS) -> requests.Session:
+    s = requests.Session()
+    s.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+def fetch(url: str, http: requests.Session, limiter: HostLimiter,
+          timeout: float = REQUEST_TIMEOUT) -> str:
+    """Über den Validator-Cache – nur echte Netzabrufe belegen einen Host-Slot."""
+    resp = http_cache.get(url, session=http, timeout=timeout, gate=limiter.slot)
+    resp.raise_for_status()
+    return resp.text
+
+
+def describe(e: Exception) -> str:
+    """Kurzbeschreibung für das Log – wie bisher in scrape_source."""
+    if isinstance(e, requests.exceptions.Timeout):
+        return "Timeout"
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        return f"HTTP {e.response.status_code}"
+    return f"Fehler – {e}"
+
+
+# ── Frontier ─────────────────────────────────────────────────────────────────
+
+def canonical(url: str) -> str:
+    """Schlüssel für die Dublettenprüfung: ohne #Fragment, Schema und Host klein."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+class Frontier:
+    """
+    Noch abzurufende Seiten: jede URL nur einmal, höchstens `budget` Seiten je Lauf.
+    Kleinere Priorität zuerst, bei Gleichstand in Einfüge-Reihenfolge. Das Budget zählt
+    beim Abruf (pop), nicht beim Aufnehmen – später gefundene Seiten mit kleinerer
+    Priorität (z.B. die nächste Listenseite) ziehen an wartenden Detailseiten vorbei.
+    """
+
+    def __init__(self, budget: int | None = None):
+        self.budget = budget
+        self.abgerufen = 0
+        self._seen: set[str] = set()
+        self._heap: list = []
+        self._seq = itertools.count()
+
+    def add(self, url: str, item, prio: int = 0) -> bool:
+        key = canonical(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        heapq.heappush(self._heap, (prio, next(self._seq), item))
+        return True
+
+    def pop(self):
+        self.abgerufen += 1
+        return heapq.heappop(self._heap)[2]
+
+    def drain(self) -> list:
+        """Übrige Einträge (Budget erschöpft) in Prioritäts-Reihenfolge."""
+        rest = [item for _, _, item in sorted(self._heap)]
+        self._heap.clear()
+        return rest
+
+    def __bool__(self) -> bool:
+        return bool(self._heap) and (self.budget is None or self.abgerufen < self.budget)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+# ── Abruf + Parsing ──────────────────────────────────────────────────────────
+
+def _parse(parse, source: dict, html: str) -> tuple[list | None, float, str | None]:
+    start = time.perf_counter()
+    try:
+        result, fehler = parse(source, html), None
+    except Exception as e:  # Ein kaputter Parser soll die anderen Quellen nicht mitreißen
+        result, fehler = None, f"{type(e).__name__}: {e}"
+    return result, time.perf_counter() - start, fehler
+
+
+def crawl(seeds: list[dict], parse, follow=None, budget: int | None = None,
+          deadline: float | None = None, workers: int = SCRAPE_WORKERS,
+          parse_workers: int = SCRAPE_PARSE_WORKERS, limiter: HostLimiter | None = None,
+          timeout: float = REQUEST_TIMEOUT) -> list[dict]:
+    """
+    Lädt job["url"] für alle Jobs (Start: seeds) und ruft parse(job, html) im Worker-Pool auf.
+    follow(job, ergebnis) liefert weitere (job, priorität) – sie laufen über die Frontier
+    (keine URL doppelt, höchstens `budget` Seiten); ergebnis ist None, wenn Abruf oder
+    Parsing gescheitert sind (z.B. um auf einen anderen Weg auszuweichen). Lehnt die Frontier
+    einen Job als Duplikat ab, geht er ebenfalls mit None an follow zurück. Nach `deadline`
+    (time.monotonic()) startet kein neuer Abruf mehr.
+    Rückgabe je Job in Aufnahme-Reihenfolge (Seeds zuerst):
+    {"job", "name", "ergebnis", "abruf_s", "parse_s", "fehler"} – fehler "Seitenbudget" bzw.
+    "Zeitbudget" für Jobs, die nicht mehr abgerufen wurden.
+    """
+    limiter = limiter or HostLimiter()
+    frontier = Frontier(budget)
+    report: list[dict] = []
+
+    def enqueue(job: dict, prio: int = 0) -> bool:
+        """False, wenn die URL schon in der Frontier war."""
+        entry = {"job": job, "name": job.get("name", job["url"]), "ergebnis": None,
+                 "abruf_s": 0.0, "parse_s": 0.0, "fehler": None}
+        if not frontier.add(job["url"], len(report), prio):
+            return False
+        report.append(entry)
+        return True
+
+    def follow_up(job: dict, result):
+        if follow is None:
+            return
+        for neu, prio in follow(job, result):
+            if not enqueue(neu, prio):
+                follow_up(neu, None)  # Duplikat – der Aufrufer kann auf einen anderen Weg ausweichen
+
+    for seed in seeds:
+        enqueue(seed)
+    if not report:
+        return report
+    start = time.perf_counter()
+    http = session(workers)
+
+    def timed_fetch(i: int) -> str:
+        t = time.perf_counter()
+        try:
+            return fetch(report[i]["job"]["url"], http, limiter, timeout)
+        finally:
+            report[i]["abruf_s"] = round(time.perf_counter() - t, 2)
+
+    def parsed(i: int, result, sekunden: float, fehler: str | None):
+        report[i].update(ergebnis=result, parse_s=round(sekunden, 2), fehler=fehler)
+        if fehler:
+            log.warning(f"  [{report[i]['name']}]: Fehler – {fehler}")
+        follow_up(report[i]["job"], None if fehler else result)
+
+    parse_workers = max(1, parse_workers)
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 1 and len(report) > 1 else None
+    abgebrochen = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            running: dict = {}
+            while True:
+                downloads = sum(art == "abruf" for art, _ in running.values())
+                while frontier and downloads < workers:
+                    i = frontier.pop()
+                    if deadline is not None and time.monotonic() > deadline:
+                        report[i]["fehler"] = "Zeitbudget"
+                        abgebrochen += 1
+                        continue
+                    running[pool.submit(timed_fetch, i)] = ("abruf", i)
+                    downloads += 1
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    art, i = running.pop(future)
+                    if art == "parse":
+                        parsed(i, *future.result())
+                        continue
+                    try:
+                        html = future.result()
+                    except Exception as e:
+                        report[i]["fehler"] = describe(e)
+                        log.warning(f"  [{report[i]['name']}]: {report[i]['fehler']} – überspringe")
+                        follow_up(report[i]["job"], None)
+                        continue
+                    # Parsen, sobald die Seite da ist – die übrigen Downloads laufen weiter
+                    if parse_pool is None:
+                        parsed(i, *_parse(parse, report[i]["job"], html))
+                    else:
+                        running[parse_pool.submit(_parse, parse, report[i]["job"], html)] = ("parse", i)
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        http.close()
+    ueber_budget = frontier.drain()
+    for i in ueber_budget:
+        report[i]["fehler"] = "Seitenbudget"
+
+    ok = sum(r["ergebnis"] is not None for r in report)
+    log.info(f"Scrape-Engine: {ok}/{len(report)} Seiten in {time.perf_counter() - start:.1f}s "
+             f"(Summe Abrufe inkl. Wartezeit {sum(r['abruf_s'] for r in report):.1f}s"
+             + (f", {len(ueber_budget)} über Seitenbudget" if ueber_budget else "")
+             + (f", {abgebrochen} nach Zeitbudget ausgelassen" if abgebrochen else "") + ")")
+    return report
+
+
+def scrape_all(sources: list[dict], parse, workers: int = SCRAPE_WORKERS,
+               parse_workers: int = SCRAPE_PARSE_WORKERS, limiter: HostLimiter | None = None,
+               timeout: float = REQUEST_TIMEOUT) -> list[dict]:
+    """
+    Lädt source["url"] für alle Quellen parallel und ruft parse(source, html) auf
+    (Funktion auf Modulebene – sie läuft in einem Worker-Prozess).
+    Rückgabe in Quellen-Reihenfolge: {"name", "ergebnis", "abruf_s", "parse_s", "fehler"};
+    ergebnis ist None, wenn Abruf oder Parsing scheitern.
+    """
+    return crawl(sources, parse, workers=workers, parse_workers=parse_workers,
+                 limiter=limiter, timeout=timeout)
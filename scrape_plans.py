@@ -0,0 +1,87 @@
+"""
+Extraktionspläne je Event-Quelle
+=================================
+Merkt sich nach jedem Lauf, womit eine Quelle ausgewertet werden konnte, damit der
+nächste Lauf nicht wieder die ganze Selektor-Liste und den article/li-Fallback abklappert:
+- Plan: siegreicher Selektor + Sub-Selektoren für Titel, Datum, Ort, Link
+  (gelernt in event_extract.learn) – wird beim nächsten Lauf zuerst probiert
+- Selektoren ohne Treffer zählen mit; nach DEMOTE_AFTER Läufen in Folge rutschen sie
+  ans Ende der Liste, ein Treffer setzt den Zähler zurück
+- Nach PLAN_MAX_AGE_DAYS wird der Plan über die Kaskade neu gelernt (neue Felder,
+  geänderte Seiten), ebenso sofort, wenn sein Selektor nichts mehr trifft
+
+Aufbau von output/scrape_plans.json:
+    {"version": 1, "quellen": {"<name>": {"plan": {"selektor", "felder"} | null,
+                                          "gelernt": "YYYY-MM-DD", "bestaetigt": "YYYY-MM-DD",
+                                          "fehlschlaege": {"<selektor>": n}}}}
+
+Voraussetzungen:
+    keine (nur Standardbibliothek)
+"""
+
+import os
+import json
+import logging
+from datetime import date
+
+OUTPUT_DIR = "output"
+PLANS_PATH = f"{OUTPUT_DIR}/scrape_plans.json"
+PLAN_MAX_AGE_DAYS = 7       # Spätestens dann den Plan neu lernen
+DEMOTE_AFTER = 3            # Läufe ohne Treffer in Folge, bis ein Selektor nach hinten rutscht
+
+log = logging.getLogger(__name__)
+
+
+def load(path: str = PLANS_PATH) -> dict[str, dict]:
+    """Einträge je Quellenname (leer, wenn es noch keine Datei gibt)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("quellen", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save(plans: dict[str, dict], path: str = PLANS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "quellen": plans}, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def active(entry: dict | None, today: str) -> dict | None:
+    """Plan, der diesmal zuerst probiert wird – None, wenn keiner da oder zu alt."""
+    if not entry or not entry.get("plan") or not entry.get("gelernt"):
+        return None
+    alter = (date.fromisoformat(today) - date.fromisoformat(entry["gelernt"])).days
+    return entry["plan"] if alter < PLAN_MAX_AGE_DAYS else None
+
+
+def ordered(selectors: list[str], entry: dict | None) -> list[str]:
+    """Zuletzt siegreicher Selektor zuerst, wiederholt erfolglose ans Ende, sonst wie konfiguriert."""
+    entry = entry or {}
+    sieger = (entry.get("plan") or {}).get("selektor")
+    misses = entry.get("fehlschlaege", {})
+    return sorted(selectors, key=lambda s: (s != sieger, misses.get(s, 0) >= DEMOTE_AFTER))
+
+
+def update(entry: dict | None, info: dict, today: str) -> dict:
+    """Eintrag einer Quelle nach einem Lauf fortschreiben (info aus event_extract.extract)."""
+    entry = dict(entry or {})
+    misses = dict(entry.get("fehlschlaege", {}))
+    for selector in info["verfehlt"]:
+        misses[selector] = misses.get(selector, 0) + 1
+    if info["selektor"]:
+        misses.pop(info["selektor"], None)
+    entry["fehlschlaege"] = misses
+    if info["modus"] == "plan":
+        entry["bestaetigt"] = today
+    else:
+        entry["plan"] = info["plan"]
+        entry["gelernt"] = today if info["plan"] else None
+    return entry
+
+
+def log_summary(infos: dict[str, dict]):
+    plan = sum(i["modus"] == "plan" for i in infos.values())
+    gelernt = sum(i["modus"] == "kaskade" and i["plan"] is not None for i in infos.values())
+    log.info(f"Extraktionspläne: {plan}/{len(infos)} Quellen per Plan, {gelernt} neu gelernt")
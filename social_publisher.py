@@ -30,6 +30,8 @@ from dotenv import load_dotenv
 from pathlib import Path
 from image_generator import create_social_images
 
+import http_cache
+
 load_dotenv()
 
 # ── Konfiguration (.env Datei) ────────────────────────────────────────────────
@@ -258,7 +260,7 @@ def prepare_image(article: dict) -> str | None:
         try:
             slug = wp_url.rstrip("/").split("/")[-1]
             api_url = f"{os.getenv('WP_URL', '')}/wp-json/wp/v2/posts?slug={slug}&_fields=featured_media_url"
-            resp = requests.get(api_url, timeout=8)
+            resp = http_cache.get(api_url, timeout=8)
             data = resp.json()
             if data and isinstance(data, list) and data[0].get("featured_media_url"):
                 img_url = data[0]["featured_media_url"]
@@ -25,6 +25,8 @@ import seaborn as sns
 from datetime import date, datetime
 from pytrends.request import TrendReq
 
+import render_pool
+
 # ── Konfiguration ─────────────────────────────────────────────────────────────
 
 OUTPUT_DIR = "output"
@@ -230,7 +232,13 @@ def score_affiliate_opportunities(results: list[dict]) -> pd.DataFrame:
 
 # ── Plots ─────────────────────────────────────────────────────────────────────
 
-def plot_affiliate_scores(df: pd.DataFrame):
+def data_stand(results: list[dict]) -> str:
+    """Letzte Woche in den Trend-Daten – "Stand" in den Plots (ändert sich nur mit den Daten)."""
+    wochen = [r["df_detail"].index.max() for r in results if "df_detail" in r]
+    return max(wochen).date().isoformat() if wochen else today
+
+
+def plot_affiliate_scores(df: pd.DataFrame, stand: str):
     """Balkendiagramm: Welche Kategorie hat das höchste Potenzial?"""
     if df.empty:
         return None
@@ -254,7 +262,7 @@ def plot_affiliate_scores(df: pd.DataFrame):
     
     ax.set_xlim(0, 110)
     ax.set_xlabel("Affiliate-Score (0–100)")
-    ax.set_title(f"🏆 Affiliate-Potenzial nach Kategorie\nRegion: NRW | Stand: {today}",
+    ax.set_title(f"🏆 Affiliate-Potenzial nach Kategorie\nRegion: NRW | Stand: {stand}",
                  fontsize=13, fontweight="bold")
     
     # Legende
@@ -314,7 +322,7 @@ def plot_trend_zeitreihen(results: list[dict]):
     for j in range(i + 1, len(axes)):
         axes[j].set_visible(False)
     
-    plt.suptitle(f"Google Trends – NRW – letzte 12 Monate | {today}",
+    plt.suptitle(f"Google Trends – NRW – letzte 12 Monate | Stand: {data_stand(valid)}",
                  fontsize=13, fontweight="bold", y=1.01)
     plt.tight_layout()
     
@@ -446,11 +454,15 @@ def main():
     # 2. Affiliate-Score berechnen
     df_scores = score_affiliate_opportunities(results)
     
-    # 3. Plots erstellen
-    plot_affiliate_scores(df_scores)
-    plot_trend_zeitreihen(results)
+    # 3. Plots erstellen (parallel) – Titel mit dem Stand der Trend-Daten statt dem Laufdatum,
+    # damit unveränderte Daten auch an späteren Tagen nicht neu gerendert werden
+    render_pool.render_all([
+        (plot_affiliate_scores, df_scores.drop(columns="datum"), data_stand(results)),
+        (plot_trend_zeitreihen, results),
+    ])
     
-    # 4. Lesbaren Report generieren
+    # 4. Lesbaren Report generieren – Tagesbericht (Datum im Dateinamen und Text),
+    # wird daher bewusst jeden Tag neu geschrieben und nicht über render_cache geführt
     generate_action_report(df_scores, results)
     
     # 5. Übersicht in der Konsole